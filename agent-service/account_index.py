@@ -0,0 +1,470 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from x_discovery import AccountCandidate
+
+# Rolling engagement behaves like a mean over roughly this many recent tweets
+ROLLING_WINDOW = 20
+# Authors remembered per topic between incremental searches
+MAX_AUTHORS_PER_TOPIC = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    user_id TEXT PRIMARY KEY,
+    username TEXT,
+    display_name TEXT,
+    followers INTEGER,
+    avg_engagement REAL,
+    samples INTEGER,
+    last_tweet_id INTEGER,
+    last_tweet_time TEXT,
+    profile_at TEXT,
+    activity_at TEXT
+);
+CREATE TABLE IF NOT EXISTS topics (
+    topic TEXT PRIMARY KEY,
+    since_id TEXT,
+    author_ids TEXT
+);
+"""
+
+
+def _tweet_id(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _from_iso(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+@dataclass
+class _IndexEntry:
+    account: "AccountCandidate"
+    profile_at: Optional[datetime] = None
+    activity_at: Optional[datetime] = None
+    samples: int = 0
+    last_tweet_id: int = 0
+
+
+@dataclass
+class _TopicState:
+    since_id: Optional[str] = None
+    searched_at: Optional[datetime] = None
+    author_ids: "OrderedDict[str, None]" = None  # type: ignore[assignment]
+
+    def __post_init__(self):
+        if self.author_ids is None:
+            self.author_ids = OrderedDict()
+
+
+class AccountIndex:
+    """
+    Shared, size-bounded index of discovered accounts.
+
+    Profile fields (username, followers) expire on their own TTL. Engagement
+    is a rolling per-account aggregate seeded once from the account's
+    timeline and then advanced only with new tweets seen by incremental
+    (since_id) topic searches. With a path, the index persists to SQLite so
+    a restart resumes from the saved cursors instead of re-crawling.
+    """
+
+    def __init__(
+        self,
+        max_accounts: int = 5000,
+        profile_ttl: timedelta = timedelta(hours=6),
+        activity_ttl: timedelta = timedelta(hours=24),
+        search_ttl: timedelta = timedelta(minutes=5),
+        path: Optional[str] = None,
+    ):
+        self.max_accounts = max(1, max_accounts)
+        self.profile_ttl = profile_ttl
+        self.activity_ttl = activity_ttl
+        self.search_ttl = search_ttl
+        self.path = path
+        self._accounts: "OrderedDict[str, _IndexEntry]" = OrderedDict()
+        self._topics: Dict[str, _TopicState] = {}
+        self._dirty: Set[str] = set()
+        self._evicted: Set[str] = set()
+        # Changes not yet handed out by export_changes(), kept apart from the save() set
+        self._changed: Set[str] = set()
+        self._changed_topics: Set[str] = set()
+        self._seeding: Set[str] = set()
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> "AccountIndex":
+        """
+        Build an index from the global_settings.engagement.discovery_cache block.
+        """
+        return cls(
+            max_accounts=int(settings.get("max_accounts", 5000)),
+            profile_ttl=timedelta(minutes=float(settings.get("profile_ttl_minutes", 360))),
+            activity_ttl=timedelta(minutes=float(settings.get("activity_ttl_minutes", 1440))),
+            search_ttl=timedelta(minutes=float(settings.get("search_ttl_minutes", 5))),
+            path=settings.get("path"),
+        )
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    # Topic searches
+
+    def get_search(self, topic: str, allow_stale: bool = False) -> Optional[List[str]]:
+        """
+        Return the topic's known authors if it was searched within the search TTL,
+        or whenever it was searched at all with allow_stale.
+        """
+        with self._lock:
+            state = self._topics.get(topic)
+            if not state or not (allow_stale or self._fresh(state.searched_at, self.search_ttl)):
+                return None
+            return list(state.author_ids)
+
+    def get_cursor(self, topic: str) -> Optional[str]:
+        with self._lock:
+            state = self._topics.get(topic)
+            return state.since_id if state else None
+
+    def record_search(self, topic: str, author_ids: List[str], newest_id: Optional[str]) -> List[str]:
+        """
+        Merge authors from an incremental search and advance the topic's since_id cursor.
+        """
+        with self._lock:
+            state = self._topics.setdefault(topic, _TopicState())
+            for author_id in author_ids:
+                state.author_ids[author_id] = None
+                state.author_ids.move_to_end(author_id)
+            while len(state.author_ids) > MAX_AUTHORS_PER_TOPIC:
+                state.author_ids.popitem(last=False)
+            if newest_id and _tweet_id(newest_id) > _tweet_id(state.since_id):
+                state.since_id = newest_id
+            state.searched_at = datetime.utcnow()
+            self._changed_topics.add(topic)
+            return list(state.author_ids)
+
+    # Per-account fields
+
+    def get_profile(self, user_id: str) -> Optional["AccountCandidate"]:
+        """
+        Return a copy of the account if its profile fields are still fresh.
+        """
+        with self._lock:
+            entry = self._touch(user_id)
+            if not entry or not self._fresh(entry.profile_at, self.profile_ttl):
+                return None
+            return self._copy(entry.account)
+
+    def put_profile(self, account: "AccountCandidate") -> None:
+        with self._lock:
+            entry = self._touch(account.user_id)
+            if entry:
+                entry.account.username = account.username
+                entry.account.display_name = account.display_name
+                entry.account.followers = account.followers
+                self._update_ratio(entry)
+            else:
+                entry = self._insert(self._copy(account))
+            entry.profile_at = datetime.utcnow()
+            self._mark(account.user_id)
+
+    def reserve_seeds(self, user_ids: List[str]) -> List[str]:
+        """
+        Return the accounts needing a timeline seed that no other agent is already seeding.
+
+        Reserved accounts are released by seed_activity or release_seed.
+        """
+        reserved: List[str] = []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._accounts.get(user_id)
+                if user_id in self._seeding:
+                    continue
+                if entry and self._fresh(entry.activity_at, self.activity_ttl):
+                    continue
+                self._seeding.add(user_id)
+                reserved.append(user_id)
+        return reserved
+
+    def release_seed(self, user_id: str) -> None:
+        """
+        Drop a seed reservation without recording activity, e.g. when the timeline fetch failed.
+        """
+        with self._lock:
+            self._seeding.discard(user_id)
+
+    def seed_activity(self, user_id: str, samples: List[Tuple[str, float, Optional[datetime]]]) -> None:
+        """
+        Reset the rolling aggregate from a timeline sample of (tweet_id, engagement, created_at).
+        """
+        with self._lock:
+            self._seeding.discard(user_id)
+            entry = self._touch(user_id)
+            if not entry:
+                return
+            entry.samples = 0
+            entry.last_tweet_id = 0
+            entry.account.avg_engagement = 0.0
+            for tweet_id, engagement, created_at in sorted(samples, key=lambda s: _tweet_id(s[0])):
+                self._fold(entry, tweet_id, engagement, created_at)
+            entry.activity_at = datetime.utcnow()
+            self._mark(user_id)
+
+    def fold_activity(self, user_id: str, tweet_id: str, engagement: float, created_at: Optional[datetime]) -> None:
+        """
+        Fold one newly seen tweet into the account's rolling aggregate.
+
+        Accounts not yet seeded only track recency; their aggregate comes from
+        the timeline seed so it isn't dominated by minutes-old tweets.
+        """
+        with self._lock:
+            entry = self._accounts.get(user_id)
+            if not entry:
+                entry = self._insert(_blank_account(user_id))
+            if entry.activity_at is None:
+                if created_at and (not entry.account.last_tweet_time or created_at > entry.account.last_tweet_time):
+                    entry.account.last_tweet_time = created_at
+            else:
+                self._fold(entry, tweet_id, engagement, created_at)
+            self._mark(user_id)
+
+    def query(
+        self,
+        user_ids: List[str],
+        min_followers: int = 0,
+        min_avg_engagement: float = 0,
+        active_since: Optional[datetime] = None,
+    ) -> List["AccountCandidate"]:
+        """
+        Return copies of the fresh accounts among user_ids that pass the caller's thresholds.
+        """
+        results: List["AccountCandidate"] = []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._touch(user_id)
+                if not entry:
+                    continue
+                if not self._fresh(entry.profile_at, self.profile_ttl) or entry.activity_at is None:
+                    continue
+                account = entry.account
+                if account.followers < min_followers or account.avg_engagement < min_avg_engagement:
+                    continue
+                if active_since and account.last_tweet_time and account.last_tweet_time < active_since:
+                    continue
+                results.append(self._copy(account))
+        return results
+
+    # Persistence
+
+    def save(self) -> None:
+        """
+        Write changed accounts and topic cursors to SQLite; a no-op without a path.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            rows = [self._row(user_id, self._accounts[user_id]) for user_id in self._dirty if user_id in self._accounts]
+            evicted = [(user_id,) for user_id in self._evicted]
+            topics = [
+                (topic, state.since_id, ",".join(state.author_ids))
+                for topic, state in self._topics.items()
+            ]
+            self._dirty.clear()
+            self._evicted.clear()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("DELETE FROM accounts WHERE user_id = ?", evicted)
+            conn.executemany("INSERT OR REPLACE INTO topics VALUES (?, ?, ?)", topics)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with closing(self._connect()) as conn:
+            for row in conn.execute("SELECT * FROM accounts ORDER BY profile_at"):
+                (user_id, username, display_name, followers, avg_engagement, samples,
+                 last_tweet_id, last_tweet_time, profile_at, activity_at) = row
+                account = _blank_account(user_id)
+                account.username = username or ""
+                account.display_name = display_name or ""
+                account.followers = int(followers or 0)
+                account.avg_engagement = float(avg_engagement or 0.0)
+                account.last_tweet_time = _from_iso(last_tweet_time)
+                entry = self._insert(account)
+                entry.samples = int(samples or 0)
+                entry.last_tweet_id = int(last_tweet_id or 0)
+                entry.profile_at = _from_iso(profile_at)
+                entry.activity_at = _from_iso(activity_at)
+                self._update_ratio(entry)
+            for topic, since_id, author_ids in conn.execute("SELECT * FROM topics"):
+                state = _TopicState(since_id=since_id)
+                for author_id in filter(None, (author_ids or "").split(",")):
+                    state.author_ids[author_id] = None
+                self._topics[topic] = state
+        self._evicted.clear()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    @staticmethod
+    def _row(user_id: str, entry: _IndexEntry) -> tuple:
+        account = entry.account
+        return (
+            user_id, account.username, account.display_name, account.followers,
+            account.avg_engagement, entry.samples, entry.last_tweet_id,
+            _to_iso(account.last_tweet_time), _to_iso(entry.profile_at), _to_iso(entry.activity_at),
+        )
+
+    # Replication between processes
+
+    def export_changes(self) -> Tuple[List[tuple], List[tuple]]:
+        """
+        Return account rows and topic states changed locally since the last export.
+
+        Rows use the SQLite layout so another process's index can merge() them.
+        """
+        with self._lock:
+            rows = [self._row(user_id, self._accounts[user_id]) for user_id in self._changed if user_id in self._accounts]
+            topics = [
+                (topic, self._topics[topic].since_id, ",".join(self._topics[topic].author_ids),
+                 _to_iso(self._topics[topic].searched_at))
+                for topic in self._changed_topics
+                if topic in self._topics
+            ]
+            self._changed.clear()
+            self._changed_topics.clear()
+        return rows, topics
+
+    def merge(self, rows: List[tuple], topics: List[tuple]) -> None:
+        """
+        Merge changes exported by another index, keeping whichever side is newer.
+
+        Profile fields follow profile_at; the engagement aggregate follows the
+        most advanced timeline (seeded first, then highest tweet id). Topic
+        cursors take the higher since_id and the union of authors. Merged
+        changes are saved but not re-exported.
+        """
+        with self._lock:
+            for row in rows:
+                self._merge_row(row)
+            for topic, since_id, author_ids, searched_at in topics:
+                state = self._topics.setdefault(topic, _TopicState())
+                for author_id in filter(None, (author_ids or "").split(",")):
+                    state.author_ids[author_id] = None
+                    state.author_ids.move_to_end(author_id)
+                while len(state.author_ids) > MAX_AUTHORS_PER_TOPIC:
+                    state.author_ids.popitem(last=False)
+                if since_id and _tweet_id(since_id) > _tweet_id(state.since_id):
+                    state.since_id = since_id
+                searched = _from_iso(searched_at)
+                if searched and (not state.searched_at or searched > state.searched_at):
+                    state.searched_at = searched
+
+    def _merge_row(self, row: tuple) -> None:
+        (user_id, username, display_name, followers, avg_engagement, samples,
+         last_tweet_id, last_tweet_time, profile_at, activity_at) = row
+        profile_at = _from_iso(profile_at)
+        activity_at = _from_iso(activity_at)
+        entry = self._accounts.get(user_id)
+        if not entry:
+            entry = self._insert(_blank_account(user_id))
+        account = entry.account
+        if profile_at and (not entry.profile_at or profile_at > entry.profile_at):
+            account.username = username or ""
+            account.display_name = display_name or ""
+            account.followers = int(followers or 0)
+            entry.profile_at = profile_at
+        incoming = (activity_at is not None, int(last_tweet_id or 0), activity_at or datetime.min)
+        current = (entry.activity_at is not None, entry.last_tweet_id, entry.activity_at or datetime.min)
+        if incoming > current:
+            account.avg_engagement = float(avg_engagement or 0.0)
+            entry.samples = int(samples or 0)
+            entry.last_tweet_id = int(last_tweet_id or 0)
+            entry.activity_at = activity_at
+        last_tweet_time = _from_iso(last_tweet_time)
+        if last_tweet_time and (not account.last_tweet_time or last_tweet_time > account.last_tweet_time):
+            account.last_tweet_time = last_tweet_time
+        self._update_ratio(entry)
+        self._dirty.add(user_id)
+
+    # Internals (callers hold the lock)
+
+    def _mark(self, user_id: str) -> None:
+        self._dirty.add(user_id)
+        self._changed.add(user_id)
+
+    def _fold(self, entry: _IndexEntry, tweet_id: str, engagement: float, created_at: Optional[datetime]) -> None:
+        numeric_id = _tweet_id(tweet_id)
+        if numeric_id and numeric_id <= entry.last_tweet_id:
+            return
+        entry.last_tweet_id = max(entry.last_tweet_id, numeric_id)
+        entry.samples += 1
+        account = entry.account
+        account.avg_engagement += (engagement - account.avg_engagement) / min(entry.samples, ROLLING_WINDOW)
+        if created_at and (not account.last_tweet_time or created_at > account.last_tweet_time):
+            account.last_tweet_time = created_at
+        self._update_ratio(entry)
+
+    @staticmethod
+    def _update_ratio(entry: _IndexEntry) -> None:
+        account = entry.account
+        account.engagement_to_followers_ratio = account.avg_engagement / max(1, account.followers)
+
+    def _insert(self, account: "AccountCandidate") -> _IndexEntry:
+        entry = _IndexEntry(account=account)
+        self._accounts[account.user_id] = entry
+        self._evicted.discard(account.user_id)
+        while len(self._accounts) > self.max_accounts:
+            user_id, _ = self._accounts.popitem(last=False)
+            self._dirty.discard(user_id)
+            self._changed.discard(user_id)
+            self._evicted.add(user_id)
+        return entry
+
+    def _touch(self, user_id: str) -> Optional[_IndexEntry]:
+        entry = self._accounts.get(user_id)
+        if entry:
+            self._accounts.move_to_end(user_id)
+        return entry
+
+    @staticmethod
+    def _fresh(fetched_at: Optional[datetime], ttl: timedelta) -> bool:
+        return fetched_at is not None and datetime.utcnow() - fetched_at <= ttl
+
+    @staticmethod
+    def _copy(account: "AccountCandidate") -> "AccountCandidate":
+        return replace(account, topics_matched=list(account.topics_matched))
+
+
+def _blank_account(user_id: str) -> "AccountCandidate":
+    from x_discovery import AccountCandidate
+
+    return AccountCandidate(
+        user_id=user_id,
+        username="",
+        display_name="",
+        followers=0,
+        avg_engagement=0.0,
+        engagement_to_followers_ratio=0.0,
+        last_tweet_time=None,
+        topics_matched=[],
+        score=0.0,
+    )
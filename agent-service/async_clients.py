@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+
+async def _call(client: Any, method: str, *args: Any, **kwargs: Any) -> Any:
+    """
+    Await a client method, preferring a native coroutine ("a" + method) when the client has one.
+    Blocking methods run in the default executor so they don't stall the event loop.
+    """
+    native = getattr(client, f"a{method}", None)
+    if native is not None and asyncio.iscoroutinefunction(native):
+        return await native(*args, **kwargs)
+    return await asyncio.to_thread(getattr(client, method), *args, **kwargs)
+
+
+class AsyncLLMClient:
+    """
+    Async interface over an llm_clients client.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def generate_text(self, system_prompt: str, user_prompt: str) -> str:
+        return await _call(self.client, "generate_text", system_prompt=system_prompt, user_prompt=user_prompt)
+
+
+class AsyncXClient:
+    """
+    Async interface over an x_client.XClient.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def search_recent(self, query: str, max_results: int = 100) -> List[Dict[str, Any]]:
+        return await _call(self.client, "search_recent", query=query, max_results=max_results)
+
+    async def get_users(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        return await _call(self.client, "get_users", user_ids=user_ids)
+
+    async def get_user_tweets(self, user_id: str, max_results: int = 10) -> List[Dict[str, Any]]:
+        return await _call(self.client, "get_user_tweets", user_id=user_id, max_results=max_results)
+
+    async def post_tweet(self, text: str) -> Optional[Dict[str, Any]]:
+        return await _call(self.client, "post_tweet", text)
+
+    async def post_reply(self, tweet_id: str, content: str) -> Optional[Dict[str, Any]]:
+        return await _call(self.client, "post_reply", tweet_id=tweet_id, content=content)
@@ -0,0 +1,348 @@
+"""
+Backtest trigger thresholds and posting frequency against recorded market history.
+
+Run from agent-service/:
+
+    python backtest.py history.jsonl
+    python backtest.py history.jsonl --engagement posts.jsonl --config agent_config.yaml --config tuned.yaml
+    python backtest.py history.jsonl --agent grok_crypto --timeline
+
+history.jsonl has one market context per line, oldest first or not:
+{"ts": "2026-09-01T12:00:00", "price_change": 1.2, "volume_spike": 1.1,
+"news_relevance": 4, "fear_greed_index": 61, ...}. Each line is one
+decision point. ts is ISO 8601 (UTC when naive) or epoch seconds. Fields
+left out take the live defaults.
+
+posts.jsonl holds past posts: {"agent_id", "post_type", "ts", and either
+"engagement" or "public_metrics"}. It drives the expected engagement
+estimate; without it only post counts and times are reported.
+
+Nothing is generated and no API is called. Triggers are evaluated over
+the whole series at once with the same rules decide_action uses, and
+cooldowns and posting hours run on the series' own clock.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config_compiler import CompiledAgentConfig, compile_config
+from engagement import RunningStats, engagement_score
+from scheduler import PostingHours
+from triggers import FIELD_DEFAULTS, agent_rules, fire_mask, posting_cooldown
+
+
+def _to_epoch(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def _read_jsonl(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _shrink(stats: Optional[RunningStats], prior: float, prior_samples: float) -> float:
+    if stats is None or not stats.n:
+        return prior
+    return (stats.n * stats.mean + prior_samples * prior) / (stats.n + prior_samples)
+
+
+@dataclass
+class MarketSeries:
+    """
+    Market contexts as columns: one float array per trigger field, NaN where a value was null.
+    """
+
+    ts: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "MarketSeries":
+        rows = list(rows)
+        ts = np.fromiter((_to_epoch(row["ts"]) for row in rows), dtype=np.float64, count=len(rows))
+        order = np.argsort(ts, kind="stable")
+        columns: Dict[str, np.ndarray] = {}
+        for name, default in FIELD_DEFAULTS.items():
+            values = np.fromiter(
+                (np.nan if (v := row.get(name, default)) is None else float(v) for row in rows),
+                dtype=np.float64,
+                count=len(rows),
+            )
+            columns[name] = values[order]
+        return cls(ts[order], columns)
+
+    @classmethod
+    def load(cls, path: str) -> "MarketSeries":
+        return cls.from_rows(_read_jsonl(path))
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def days(self) -> float:
+        return float(self.ts[-1] - self.ts[0]) / 86400 if len(self.ts) > 1 else 0.0
+
+
+class EngagementModel:
+    """
+    Expected engagement of a post from a corpus of past posts.
+
+    Per-agent and per-post-type means are shrunk toward the level above
+    them (global, then agent) by prior_samples pseudo observations, and
+    scaled by an hour-of-day factor estimated the same way, so sparse arms
+    don't produce extreme estimates.
+    """
+
+    def __init__(self, prior_samples: float = 5.0):
+        self.prior_samples = prior_samples
+        self.overall = RunningStats()
+        self.by_agent: Dict[str, RunningStats] = {}
+        self.by_type: Dict[Tuple[str, str], RunningStats] = {}
+        self.by_hour = [RunningStats() for _ in range(24)]
+
+    @classmethod
+    def load(cls, path: str) -> "EngagementModel":
+        model = cls()
+        for row in _read_jsonl(path):
+            model.add(row)
+        return model
+
+    def add(self, row: Dict[str, Any]) -> None:
+        if "engagement" in row:
+            engagement = float(row["engagement"])
+        else:
+            engagement, _ = engagement_score(row.get("public_metrics") or {})
+        agent_id = str(row.get("agent_id", ""))
+        self.overall.add(engagement)
+        self.by_agent.setdefault(agent_id, RunningStats()).add(engagement)
+        if row.get("post_type"):
+            self.by_type.setdefault((agent_id, row["post_type"]), RunningStats()).add(engagement)
+        if row.get("ts") is not None:
+            hour = int(_to_epoch(row["ts"]) // 3600 % 24)
+            self.by_hour[hour].add(engagement)
+
+    def expected(self, agent_id: str, post_types: Sequence[Tuple[str, float]], hours: np.ndarray) -> np.ndarray:
+        """
+        Expected engagement of posts made at the given UTC hours, mixing post types by weight.
+        """
+        if not self.overall.n:
+            return np.zeros(len(hours))
+        k = self.prior_samples
+        agent_mean = _shrink(self.by_agent.get(agent_id), self.overall.mean, k)
+        total = sum(weight for _, weight in post_types) or 1.0
+        per_post = sum(
+            weight / total * _shrink(self.by_type.get((agent_id, post_type)), agent_mean, k)
+            for post_type, weight in post_types
+        ) if post_types else agent_mean
+        hour_factor = np.array([
+            _shrink(stats, self.overall.mean, k) / self.overall.mean if self.overall.mean else 1.0
+            for stats in self.by_hour
+        ])
+        return per_post * hour_factor[hours]
+
+
+def local_hours(ts: np.ndarray, posting_hours: PostingHours) -> np.ndarray:
+    """
+    Local hour of day for each epoch timestamp, resolving the UTC offset once per hour.
+    """
+    buckets = np.floor(ts / 3600).astype(np.int64)
+    unique, inverse = np.unique(buckets, return_inverse=True)
+    offsets = np.array([
+        datetime.fromtimestamp(int(bucket) * 3600, posting_hours.tz).utcoffset().total_seconds()
+        for bucket in unique
+    ])
+    return (np.floor((ts + offsets[inverse]) / 3600) % 24).astype(np.int64)
+
+
+def _active_mask(hours: np.ndarray, posting_hours: PostingHours) -> np.ndarray:
+    if not posting_hours.active_hours:
+        return np.ones(len(hours), dtype=bool)
+    start, end = posting_hours.active_hours
+    if start <= end:
+        return (hours >= start) & (hours < end)
+    return (hours >= start) | (hours < end)
+
+
+def _apply_cooldown(times: np.ndarray, cooldowns: np.ndarray) -> np.ndarray:
+    """
+    Indices of the candidates that would post: a candidate posts when more
+    than its cooldown has passed since the previous post.
+    """
+    if not len(times):
+        return np.zeros(0, dtype=np.int64)
+    shortest = float(cooldowns.min())
+    posted: List[int] = []
+    last = -math.inf
+    i = 0
+    while i < len(times):
+        if times[i] - last > cooldowns[i]:
+            posted.append(i)
+            last = times[i]
+            # Nothing within the shortest cooldown can post; skip it in one step
+            i = max(i + 1, int(np.searchsorted(times, last + shortest, side="right")))
+        else:
+            i += 1
+    return np.asarray(posted, dtype=np.int64)
+
+
+@dataclass
+class AgentBacktest:
+    agent_id: str
+    name: str
+    triggers: int
+    post_times: np.ndarray
+    expected_engagement: np.ndarray
+    post_type_shares: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def posts(self) -> int:
+        return len(self.post_times)
+
+    def as_dict(self, days: float, timeline: bool = False) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "agent_id": self.agent_id,
+            "name": self.name,
+            "posts": self.posts,
+            "posts_per_day": round(self.posts / days, 2) if days else None,
+            "trigger_samples": self.triggers,
+            "first_post": _iso(self.post_times[0]) if self.posts else None,
+            "last_post": _iso(self.post_times[-1]) if self.posts else None,
+            "expected_engagement": round(float(self.expected_engagement.sum()), 1),
+            "expected_engagement_per_post": round(float(self.expected_engagement.mean()), 2) if self.posts else 0.0,
+            "expected_posts_by_type": {
+                post_type: round(share * self.posts, 1) for post_type, share in self.post_type_shares.items()
+            },
+        }
+        if timeline:
+            result["post_times"] = [_iso(t) for t in self.post_times]
+        return result
+
+
+def backtest_agent(
+    agent: CompiledAgentConfig,
+    series: MarketSeries,
+    posting_hours: Optional[PostingHours] = None,
+    model: Optional[EngagementModel] = None,
+) -> AgentBacktest:
+    """
+    Replay one agent's triggers, cooldown and posting hours over a series.
+    """
+    mask = fire_mask(agent_rules(agent.id, agent.strategy.get("triggers", {})), series.columns, len(series))
+    triggers = int(mask.sum())
+    base = posting_cooldown(agent.strategy.get("posting_frequency", "medium")).total_seconds()
+    if posting_hours:
+        hours = local_hours(series.ts, posting_hours)
+        mask &= _active_mask(hours, posting_hours)
+        peak = np.isin(hours, list(posting_hours.peak_hours))
+        cooldowns = np.where(peak, base * posting_hours.peak_cooldown_factor, base)
+    else:
+        cooldowns = np.full(len(series), base)
+
+    candidates = np.flatnonzero(mask)
+    times = series.ts[candidates]
+    post_times = times[_apply_cooldown(times, cooldowns[candidates])]
+
+    post_types = [(spec.type, spec.weight) for spec in agent.post_types.items]
+    total = sum(weight for _, weight in post_types) or 1.0
+    utc_hours = (np.floor(post_times / 3600) % 24).astype(np.int64)
+    expected = model.expected(agent.id, post_types, utc_hours) if model else np.zeros(len(post_times))
+    return AgentBacktest(
+        agent_id=agent.id,
+        name=agent.name,
+        triggers=triggers,
+        post_times=post_times,
+        expected_engagement=expected,
+        post_type_shares={post_type: weight / total for post_type, weight in post_types},
+    )
+
+
+def backtest_config(
+    config_path: str,
+    series: MarketSeries,
+    model: Optional[EngagementModel] = None,
+    agent_ids: Optional[Sequence[str]] = None,
+) -> List[AgentBacktest]:
+    """
+    Backtest every agent (or the given ones) of a config file.
+    """
+    compiled = compile_config(config_path)
+    settings = compiled.global_settings
+    posting_hours = None
+    if settings.get("posting_hours"):
+        posting_hours = PostingHours.from_config(
+            settings["posting_hours"],
+            peak_cooldown_factor=float(settings.get("scheduler", {}).get("peak_cooldown_factor", 1.0)),
+        )
+    return [
+        backtest_agent(agent, series, posting_hours, model)
+        for agent in compiled.agents
+        if not agent_ids or agent.id in agent_ids
+    ]
+
+
+def _print_report(config_path: str, results: List[AgentBacktest], series: MarketSeries, elapsed: float, timeline: bool) -> None:
+    print(f"\n{config_path}: {len(series)} samples over {series.days:.1f} days ({elapsed * 1000:.0f} ms)")
+    print(f"{'agent':<20} {'posts':>6} {'per_day':>8} {'triggers':>9} {'exp_eng':>10} {'per_post':>9}  first -> last")
+    for result in results:
+        row = result.as_dict(series.days, timeline)
+        per_day = "-" if row["posts_per_day"] is None else f"{row['posts_per_day']:.2f}"
+        print(
+            f"{result.agent_id:<20} {row['posts']:>6} {per_day:>8} {row['trigger_samples']:>9} "
+            f"{row['expected_engagement']:>10.1f} {row['expected_engagement_per_post']:>9.2f}  "
+            f"{row['first_post'] or '-'} -> {row['last_post'] or '-'}"
+        )
+        if timeline and row["post_times"]:
+            print("    " + ", ".join(row["post_times"]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("history", help="JSONL market context series")
+    parser.add_argument("--engagement", help="JSONL corpus of past posts with engagement")
+    parser.add_argument("--config", action="append", help="agent config to evaluate (repeatable)")
+    parser.add_argument("--agent", action="append", help="only these agent ids (repeatable)")
+    parser.add_argument("--timeline", action="store_true", help="list every post time")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    series = MarketSeries.load(args.history)
+    if not len(series):
+        print(f"{args.history}: no samples")
+        return 1
+    model = EngagementModel.load(args.engagement) if args.engagement else None
+
+    report: Dict[str, Any] = {}
+    for config_path in args.config or ["agent_config.yaml"]:
+        started = time.perf_counter()
+        results = backtest_config(config_path, series, model, args.agent)
+        elapsed = time.perf_counter() - started
+        if args.json:
+            report[config_path] = [result.as_dict(series.days, args.timeline) for result in results]
+        else:
+            _print_report(config_path, results, series, elapsed, args.timeline)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+import itertools
+import math
+import random
+import sys
+import threading
+import time
+import types
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from rate_limiter import DEFAULT_ENDPOINT_LIMITS
+
+# Fake XClient method -> endpoint, for the simulated per-credential rate limits
+FAKE_ENDPOINTS: Dict[str, str] = {
+    "post_tweet": "POST /2/tweets",
+    "post_reply": "POST /2/tweets",
+    "search_recent": "GET /2/tweets/search/recent",
+    "get_user": "GET /2/users",
+    "get_users": "GET /2/users",
+    "get_user_tweets": "GET /2/users/:id/tweets",
+    "get_tweets": "GET /2/tweets",
+    "get_mentions": "GET /2/users/:id/mentions",
+}
+
+WORDS = (
+    "btc eth sol funding basis whale liquidation chart breakout support resistance "
+    "volume etf flows defi yield l2 rollup memecoin narrative rotation macro cpi "
+    "fed dxy orderbook spot perp open interest airdrop unlock treasury"
+).split()
+
+
+@dataclass
+class LatencyModel:
+    """
+    Lognormal request latency: median_ms with a multiplicative spread.
+
+    scale multiplies every sample, so a whole scenario can run faster or
+    slower than real time while keeping the shape of the distribution.
+    """
+
+    median_ms: float = 50.0
+    sigma: float = 0.5
+    scale: float = 1.0
+
+    def sample(self, rng: random.Random) -> float:
+        return self.median_ms / 1000.0 * math.exp(rng.gauss(0.0, self.sigma)) * self.scale
+
+
+@dataclass
+class Account:
+    user_id: str
+    username: str
+    followers: int
+    topics: Tuple[str, ...]
+    engagement_rate: float
+
+
+class FakeAPIError(Exception):
+    """
+    Mimics an HTTP error from the X client, with a response carrying status and headers.
+    """
+
+    def __init__(self, status_code: int, headers: Dict[str, Any]):
+        super().__init__(f"HTTP {status_code}")
+        self.response = types.SimpleNamespace(status_code=status_code, headers=headers)
+
+
+@dataclass
+class FakeBackend:
+    """
+    Shared state behind every fake client: corpus, latencies, limits and call counts.
+
+    Results depend only on the seed and the request arguments, so repeated
+    runs see the same accounts and tweets regardless of thread scheduling.
+    """
+
+    topics: List[str]
+    num_accounts: int = 2000
+    seed: int = 7
+    x_latency: LatencyModel = field(default_factory=LatencyModel)
+    llm_latency: LatencyModel = field(default_factory=lambda: LatencyModel(median_ms=400.0, sigma=0.6))
+    endpoint_limits: Dict[str, Tuple[int, float]] = field(default_factory=lambda: dict(DEFAULT_ENDPOINT_LIMITS))
+    enforce_rate_limits: bool = True
+
+    def __post_init__(self) -> None:
+        rng = random.Random(self.seed)
+        self.accounts: List[Account] = []
+        self.by_topic: Dict[str, List[Account]] = {t.lower(): [] for t in self.topics}
+        for i in range(self.num_accounts):
+            # Heavy-tailed follower counts, like real crypto Twitter
+            followers = int(min(5_000_000, 500 * rng.paretovariate(1.1)))
+            topics = tuple(rng.sample(self.topics, k=min(len(self.topics), rng.randint(1, 3))))
+            account = Account(
+                user_id=str(10_000 + i),
+                username=f"acct{i}",
+                followers=followers,
+                topics=topics,
+                engagement_rate=rng.uniform(0.0005, 0.01),
+            )
+            self.accounts.append(account)
+            for topic in topics:
+                self.by_topic[topic.lower()].append(account)
+        self.by_id = {a.user_id: a for a in self.accounts}
+        self.calls: Counter = Counter()
+        self.llm_calls = 0
+        self._lock = threading.Lock()
+        self._sequence: Counter = Counter()
+        self._windows: Dict[Tuple[str, str], Deque[float]] = {}
+        self._tweet_ids = itertools.count(1_800_000_000_000_000_000)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.llm_calls = 0
+
+    def rng_for(self, *key: Any) -> random.Random:
+        """
+        A per-request generator seeded from the request key and how often it was made.
+        """
+        name = "|".join(str(k) for k in key)
+        with self._lock:
+            self._sequence[name] += 1
+            n = self._sequence[name]
+        return random.Random(zlib.crc32(f"{self.seed}|{name}|{n}".encode("utf-8")))
+
+    def next_tweet_id(self) -> int:
+        with self._lock:
+            return next(self._tweet_ids)
+
+    def call(self, credential: str, method: str, rng: random.Random) -> Dict[str, Any]:
+        """
+        Count, rate-limit and delay one request; returns the rate-limit headers.
+        """
+        endpoint = FAKE_ENDPOINTS[method]
+        limit, window = self.endpoint_limits.get(endpoint, (10**9, 900.0))
+        now = time.monotonic()
+        with self._lock:
+            self.calls[method] += 1
+            stamps = self._windows.setdefault((credential, endpoint), deque())
+            while stamps and now - stamps[0] >= window:
+                stamps.popleft()
+            reset = int(time.time() + (window - (now - stamps[0]) if stamps else window))
+            limited = self.enforce_rate_limits and len(stamps) >= limit
+            if not limited:
+                stamps.append(now)
+            headers = {
+                "x-rate-limit-limit": limit,
+                "x-rate-limit-remaining": max(0, limit - len(stamps)),
+                "x-rate-limit-reset": reset,
+            }
+        time.sleep(self.x_latency.sample(rng))
+        if limited:
+            raise FakeAPIError(429, headers)
+        return headers
+
+    def make_tweet(self, account: Account, rng: random.Random, age: timedelta) -> Dict[str, Any]:
+        expected = account.followers * account.engagement_rate
+        engagement = max(0, int(rng.lognormvariate(math.log(expected + 1), 0.8)))
+        created = datetime.now(timezone.utc) - age
+        return {
+            "id": str(self.next_tweet_id()),
+            "author_id": account.user_id,
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 24))),
+            "created_at": created.isoformat().replace("+00:00", "Z"),
+            "public_metrics": {
+                "like_count": int(engagement * 0.8),
+                "retweet_count": int(engagement * 0.12),
+                "reply_count": int(engagement * 0.08),
+                "impression_count": int(engagement * rng.uniform(20, 60)),
+            },
+        }
+
+    def user_object(self, account: Account) -> Dict[str, Any]:
+        return {
+            "id": account.user_id,
+            "username": account.username,
+            "name": account.username.title(),
+            "public_metrics": {"followers_count": account.followers},
+        }
+
+    def x_client_class(self) -> type:
+        """
+        An XClient class bound to this backend, constructible like the real one.
+        """
+        backend = self
+
+        class XClient:
+            def __init__(self, api_key: Optional[str] = None, **kwargs: Any):
+                self.credential = api_key or f"fake-{id(self)}"
+                self.last_response_headers: Optional[Dict[str, Any]] = None
+
+            def _call(self, method: str, *key: Any) -> random.Random:
+                rng = backend.rng_for(method, *key)
+                self.last_response_headers = backend.call(self.credential, method, rng)
+                return rng
+
+            def search_recent(self, query: str, max_results: int = 100, since_id: Optional[str] = None) -> List[Dict[str, Any]]:
+                rng = self._call("search_recent", query)
+                pool = backend.by_topic.get(query.lower()) or backend.accounts
+                # An incremental search only sees what was posted since the cursor
+                count = max_results if since_id is None else rng.randint(0, max_results // 4)
+                return [
+                    backend.make_tweet(rng.choice(pool), rng, timedelta(minutes=rng.uniform(0, 24 * 60)))
+                    for _ in range(count)
+                ]
+
+            def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+                self._call("get_user", user_id)
+                account = backend.by_id.get(str(user_id))
+                return backend.user_object(account) if account else None
+
+            def get_users(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+                self._call("get_users", len(user_ids))
+                return [backend.user_object(backend.by_id[u]) for u in user_ids if u in backend.by_id]
+
+            def get_user_tweets(self, user_id: str, max_results: int = 10, since_id: Optional[str] = None) -> List[Dict[str, Any]]:
+                rng = self._call("get_user_tweets", user_id)
+                account = backend.by_id.get(str(user_id))
+                if not account:
+                    return []
+                return [
+                    backend.make_tweet(account, rng, timedelta(minutes=rng.uniform(0, 48 * 60)))
+                    for _ in range(max_results)
+                ]
+
+            def get_tweets(self, tweet_ids: List[str]) -> List[Dict[str, Any]]:
+                rng = self._call("get_tweets", len(tweet_ids))
+                return [
+                    {"id": t, "public_metrics": backend.make_tweet(rng.choice(backend.accounts), rng, timedelta(0))["public_metrics"]}
+                    for t in tweet_ids
+                ]
+
+            def get_mentions(self, user_id: Optional[str] = None, since_id: Optional[str] = None, max_results: int = 100) -> List[Dict[str, Any]]:
+                rng = self._call("get_mentions", user_id)
+                count = rng.randint(0, 5)
+                return [
+                    backend.make_tweet(rng.choice(backend.accounts), rng, timedelta(minutes=rng.uniform(0, 60)))
+                    for _ in range(count)
+                ]
+
+            def post_tweet(self, text: str) -> Dict[str, Any]:
+                self._call("post_tweet")
+                return {"id": str(backend.next_tweet_id()), "text": text}
+
+            def post_reply(self, tweet_id: str, content: str) -> Dict[str, Any]:
+                self._call("post_reply")
+                return {"id": str(backend.next_tweet_id()), "text": content, "in_reply_to": tweet_id}
+
+        return XClient
+
+    def get_llm_client(self, provider: str) -> "FakeLLMClient":
+        return FakeLLMClient(self, provider)
+
+    def install(self) -> None:
+        """
+        Register fake x_client and llm_clients modules so enhanced_agent imports them.
+        """
+        x_module = types.ModuleType("x_client")
+        x_module.XClient = self.x_client_class()
+        llm_module = types.ModuleType("llm_clients")
+        llm_module.get_llm_client = self.get_llm_client
+        sys.modules["x_client"] = x_module
+        sys.modules["llm_clients"] = llm_module
+
+
+class FakeLLMClient:
+    """
+    Returns tweet-length text after a simulated completion latency.
+    """
+
+    def __init__(self, backend: FakeBackend, provider: str):
+        self.backend = backend
+        self.provider = provider
+
+    def generate_text(self, system_prompt: str, user_prompt: str) -> str:
+        rng = self.backend.rng_for("llm", self.provider, zlib.crc32(user_prompt.encode("utf-8")))
+        with self.backend._lock:
+            self.backend.llm_calls += 1
+        time.sleep(self.backend.llm_latency.sample(rng))
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 30)))
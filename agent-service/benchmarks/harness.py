@@ -0,0 +1,275 @@
+"""
+Offline benchmarks for the agent service against simulated X and LLM backends.
+
+Run from agent-service/:
+
+    python -m benchmarks.harness                      # compare against baseline.json
+    python -m benchmarks.harness --save-baseline      # record a new baseline
+    python -m benchmarks.harness --agents 4 40 --scenarios run_cycle
+
+No credentials or network access are needed: fake x_client and llm_clients
+modules are installed before enhanced_agent is imported.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from copy import deepcopy
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+from benchmarks.fakes import FakeBackend, LatencyModel
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(HERE)
+DEFAULT_CONFIG = os.path.join(SERVICE_DIR, "agent_config.yaml")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+AGENT_COUNTS = (4, 40, 400)
+SCENARIOS = ("run_cycle", "search_and_rank_accounts", "find_reply_opportunities")
+
+# Ticks that move price past every agent's trigger, so run_cycle exercises posting
+MARKET_EVENTS = [
+    {"type": "tick", "price": 60000.0, "volume": 100.0},
+    {"type": "tick", "price": 64000.0, "volume": 450.0},
+    {"type": "news", "title": "Spot ETF flows hit a record", "relevance": 9, "topics": ["BTC"]},
+    {"type": "fear_greed", "value": 82},
+]
+
+
+def build_config(base_path: str, num_agents: int, replay_path: str) -> Dict[str, Any]:
+    """
+    Scale the configured agents up to num_agents copies with isolated in-memory state.
+    """
+    with open(base_path, "r") as f:
+        base = yaml.safe_load(f)
+    templates = base["agents"]
+    agents = []
+    for i in range(num_agents):
+        agent = deepcopy(templates[i % len(templates)])
+        if i >= len(templates):
+            agent["id"] = f"{agent['id']}_{i}"
+            agent["x_username"] = f"{agent['x_username']}_{i}"
+        agents.append(agent)
+    base["agents"] = agents
+
+    settings = base.setdefault("global_settings", {})
+    settings["state"] = {"backend": "memory"}
+    settings.setdefault("engagement", {}).setdefault("discovery_cache", {}).pop("path", None)
+    settings.pop("posting_hours", None)
+    settings.setdefault("market_data", {})["replay_path"] = replay_path
+    settings["market_data"]["replay_events_per_poll"] = len(MARKET_EVENTS)
+    return base
+
+
+def agent_topics(config: Dict[str, Any]) -> List[str]:
+    topics: List[str] = []
+    for agent in config["agents"]:
+        for topic in agent.get("engagement", {}).get("topics", []):
+            if topic not in topics:
+                topics.append(topic)
+    return topics or ["Bitcoin", "Ethereum", "DeFi"]
+
+
+async def _gather_bounded(manager: Any, work: Callable[[Any], Any]) -> None:
+    semaphore = asyncio.Semaphore(manager.max_concurrent_agents)
+
+    async def run_one(agent: Any) -> None:
+        async with semaphore:
+            await asyncio.to_thread(work, agent)
+
+    await asyncio.gather(*(run_one(agent) for agent in manager.agents))
+
+
+def _search(agent: Any) -> None:
+    heur = (agent.playbook or {}).get("heuristics", {})
+    agent.discovery.search_and_rank_accounts(
+        topics=agent.engagement.get("topics", ["Bitcoin", "Ethereum", "DeFi"]),
+        min_followers=int(heur.get("min_followers", 10000)),
+        min_avg_engagement=int(heur.get("min_avg_engagement", 50)),
+        engagement_to_followers_ratio=float(heur.get("engagement_to_followers_ratio", 0.003)),
+        recency_hours=int(heur.get("recency_hours", 12)),
+        limit=20,
+        score_weights=heur.get("score_weights"),
+        followers_saturation=float(heur.get("followers_saturation", 100_000)),
+        topics_saturation=float(heur.get("topics_saturation", 5)),
+    )
+
+
+def run_scenario_cycle(manager: Any, scenario: str) -> None:
+    if scenario == "run_cycle":
+        manager.run_cycle()
+    elif scenario == "search_and_rank_accounts":
+        asyncio.run(_gather_bounded(manager, _search))
+    elif scenario == "find_reply_opportunities":
+        asyncio.run(_gather_bounded(manager, lambda agent: agent.find_reply_opportunities()))
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def run_benchmark(
+    scenario: str,
+    num_agents: int,
+    cycles: int,
+    config_path: str,
+    latency_scale: float,
+    seed: int,
+) -> Dict[str, Any]:
+    """
+    Build a fresh manager for num_agents and time `cycles` consecutive cycles of one scenario.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        replay_path = os.path.join(tmp, "market.jsonl")
+        with open(replay_path, "w") as f:
+            for event in MARKET_EVENTS:
+                f.write(json.dumps(event) + "\n")
+        config = build_config(config_path, num_agents, replay_path)
+        bench_config = os.path.join(tmp, "agent_config.yaml")
+        with open(bench_config, "w") as f:
+            yaml.safe_dump(config, f)
+
+        backend = FakeBackend(
+            topics=agent_topics(config),
+            seed=seed,
+            x_latency=LatencyModel(median_ms=50.0, sigma=0.5, scale=latency_scale),
+            llm_latency=LatencyModel(median_ms=400.0, sigma=0.6, scale=latency_scale),
+        )
+        backend.install()
+        import enhanced_agent
+        # Rebind names a previous scenario's import already pulled in
+        enhanced_agent.XClient = sys.modules["x_client"].XClient
+        enhanced_agent.get_llm_client = backend.get_llm_client
+
+        tracemalloc.start()
+        manager = enhanced_agent.AgentManager(bench_config)
+        setup_calls = sum(backend.calls.values())
+        backend.reset_counters()
+
+        timings: List[float] = []
+        api_calls: List[int] = []
+        llm_calls: List[int] = []
+        for _ in range(cycles):
+            before = dict(backend.calls)
+            llm_before = backend.llm_calls
+            started = time.perf_counter()
+            run_scenario_cycle(manager, scenario)
+            timings.append(time.perf_counter() - started)
+            api_calls.append(sum(backend.calls.values()) - sum(before.values()))
+            llm_calls.append(backend.llm_calls - llm_before)
+        by_method = dict(sorted(backend.calls.items()))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        manager.state_store.close()
+
+    return {
+        "scenario": scenario,
+        "agents": num_agents,
+        "cycles": cycles,
+        "latency_scale": latency_scale,
+        "seed": seed,
+        "wall_seconds": [round(t, 4) for t in timings],
+        "wall_seconds_mean": round(statistics.fmean(timings), 4),
+        "api_calls_per_cycle": round(statistics.fmean(api_calls), 2),
+        "api_calls_by_method": by_method,
+        "llm_calls_per_cycle": round(statistics.fmean(llm_calls), 2),
+        "setup_api_calls": setup_calls,
+        "peak_memory_mb": round(peak / 2**20, 2),
+    }
+
+
+# Run settings a result is only comparable under; older baselines record
+# latency_scale and seed once at the top level rather than per result
+RUN_SETTINGS = ("cycles", "latency_scale", "seed")
+
+
+def _settings(result: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: result.get(key, defaults.get(key)) for key in RUN_SETTINGS}
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Lines describing each result against the baseline; regressions beyond tolerance are marked.
+
+    A result is only compared with a baseline entry run with the same
+    cycles, latency_scale and seed; otherwise the differing settings are reported.
+    """
+    previous = {(r["scenario"], r["agents"]): r for r in baseline.get("results", [])}
+    lines = []
+    for result in results:
+        old = previous.get((result["scenario"], result["agents"]))
+        label = f"{result['scenario']:<26} agents={result['agents']:<4}"
+        if not old:
+            lines.append(f"{label} (no baseline)")
+            continue
+        ran, recorded = _settings(result, {}), _settings(old, baseline)
+        if ran != recorded:
+            differing = " ".join(f"{key}={recorded[key]}" for key in RUN_SETTINGS if ran[key] != recorded[key])
+            lines.append(f"{label} (not compared: baseline ran with {differing})")
+            continue
+        parts = []
+        for key in ("wall_seconds_mean", "api_calls_per_cycle", "llm_calls_per_cycle", "peak_memory_mb"):
+            before, after = old.get(key) or 0, result[key]
+            change = (after - before) / before if before else 0.0
+            flag = " REGRESSION" if change > tolerance else ""
+            parts.append(f"{key}={after} ({change:+.0%}){flag}")
+        lines.append(f"{label} " + "  ".join(parts))
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agents", type=int, nargs="+", default=list(AGENT_COUNTS))
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--config", default=DEFAULT_CONFIG)
+    parser.add_argument("--latency-scale", type=float, default=0.1,
+                        help="multiplier on simulated latencies (1.0 = realistic)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative increase reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    for scenario in args.scenarios:
+        for num_agents in args.agents:
+            result = run_benchmark(scenario, num_agents, args.cycles, args.config, args.latency_scale, args.seed)
+            results.append(result)
+            print(
+                f"{scenario:<26} agents={num_agents:<4} "
+                f"wall={result['wall_seconds_mean']:.3f}s api={result['api_calls_per_cycle']} "
+                f"llm={result['llm_calls_per_cycle']} peak={result['peak_memory_mb']}MB"
+            )
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "latency_scale": args.latency_scale,
+                "seed": args.seed,
+                "results": results,
+            }, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline}:")
+        lines = compare(results, baseline, args.tolerance)
+        for line in lines:
+            print(line)
+        return 1 if any("REGRESSION" in line for line in lines) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import metrics
+
+
+class PooledClient:
+    """
+    Handle to a client that is built on first use and closed when idle.
+
+    Attribute access is forwarded to the underlying client. Method calls
+    are counted while in flight so the pool never closes a client that is
+    being used; the next call after a close builds a fresh one.
+    """
+
+    def __init__(self, key: Hashable, factory: Callable[[], Any], pool: "ClientPool"):
+        self._key = key
+        self._factory = factory
+        self._pool = pool
+        self._client: Any = None
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Callable[..., Any]] = {}
+
+    @property
+    def is_open(self) -> bool:
+        return self._client is not None
+
+    def _acquire(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                self._client = self._factory()
+                metrics.inc("clients_created_total", kind=self._kind)
+                self._pool._ensure_reaper()
+            self._active += 1
+            return self._client
+
+    def _release(self) -> None:
+        with self._lock:
+            self._active -= 1
+            self._last_used = time.monotonic()
+
+    @property
+    def _kind(self) -> str:
+        return str(self._key[0]) if isinstance(self._key, tuple) and self._key else str(self._key)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        client = self._acquire()
+        try:
+            value = getattr(client, name)
+        finally:
+            self._release()
+        if not callable(value):
+            return value
+
+        # Resolve on every call so a client rebuilt after a reap is picked up
+        if asyncio.iscoroutinefunction(value):
+            async def method(*args: Any, **kwargs: Any) -> Any:
+                client = self._acquire()
+                try:
+                    return await getattr(client, name)(*args, **kwargs)
+                finally:
+                    self._release()
+        else:
+            def method(*args: Any, **kwargs: Any) -> Any:
+                client = self._acquire()
+                try:
+                    return getattr(client, name)(*args, **kwargs)
+                finally:
+                    self._release()
+        self._methods[name] = method
+        return method
+
+    def close_if_idle(self, idle_seconds: float, now: Optional[float] = None) -> bool:
+        """
+        Close the client if no call is in flight and none finished within idle_seconds.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._client is None or self._active or now - self._last_used < idle_seconds:
+                return False
+            client, self._client = self._client, None
+        _close(client)
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            _close(client)
+
+
+def _close(client: Any) -> None:
+    close = getattr(client, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            print(f"[ClientPool] Error closing client: {e}")
+
+
+class ClientPool:
+    """
+    Shared, lazily built API clients keyed by provider or credential.
+
+    Agents on the same LLM provider share one client, and with it one
+    keep-alive connection pool; X clients stay per credential. Nothing is
+    built until its first call, so startup cost doesn't grow with the
+    roster. A background thread, started with the first client, closes
+    clients left idle for idle_timeout seconds.
+    """
+
+    def __init__(self, idle_timeout: float = 300.0, reap_interval: float = 60.0):
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self._clients: Dict[Hashable, PooledClient] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> "ClientPool":
+        """
+        Build a pool from the global_settings.runtime block.
+        """
+        idle_timeout = float(settings.get("client_idle_seconds", 300))
+        return cls(idle_timeout=idle_timeout, reap_interval=max(1.0, min(60.0, idle_timeout / 2)))
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> PooledClient:
+        """
+        Return the shared handle for key; factory runs on the handle's first call.
+        """
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = PooledClient(key, factory, self)
+            return client
+
+    def __len__(self) -> int:
+        return sum(1 for client in list(self._clients.values()) if client.is_open)
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """
+        Close idle clients; returns how many were closed.
+        """
+        closed = 0
+        for client in list(self._clients.values()):
+            if client.close_if_idle(self.idle_timeout, now):
+                metrics.inc("clients_reaped_total", kind=client._kind)
+                closed += 1
+        return closed
+
+    def _ensure_reaper(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="client-reaper", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.reap_interval):
+            self.reap()
+
+    def close(self) -> None:
+        self._stop.set()
+        for client in list(self._clients.values()):
+            client.close()
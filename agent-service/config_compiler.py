@@ -0,0 +1,229 @@
+import os
+import random
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import accumulate
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+import yaml
+
+from strategies.loader import get_playbook, load_growth_strategies
+
+DEFAULT_STRATEGIES_PATH = os.path.join(os.path.dirname(__file__), "strategies", "growth_strategies.yaml")
+
+
+class ConfigError(ValueError):
+    """
+    Raised when agent_config.yaml or growth_strategies.yaml fails validation.
+    """
+
+
+def freeze(value: Any) -> Any:
+    """
+    Recursively convert dicts to read-only mappings and lists to tuples.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class PostTypeSpec:
+    type: str
+    weight: float
+    templates: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class WeightedTable:
+    """
+    Items with precomputed cumulative weights; a weighted pick is one bisect.
+    """
+
+    items: Tuple[Any, ...]
+    cumulative: Tuple[float, ...]
+
+    @classmethod
+    def build(cls, items: Tuple[Any, ...], weights: Optional[Sequence[float]] = None) -> "WeightedTable":
+        """
+        Table over items, weighted by `weights` or else by each item's own weight.
+        """
+        if weights is None:
+            weights = [item.weight for item in items]
+        return cls(items=tuple(items), cumulative=tuple(accumulate(weights)))
+
+    @property
+    def total(self) -> float:
+        return self.cumulative[-1] if self.cumulative else 0.0
+
+    def pick(self, rng: Any = random) -> Any:
+        index = bisect_right(self.cumulative, rng.uniform(0, self.total))
+        return self.items[min(index, len(self.items) - 1)]
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledAgentConfig:
+    id: str
+    name: str
+    llm_provider: str
+    model: str
+    x_username: str
+    personality: Mapping[str, Any]
+    system_prompt: str
+    strategy: Mapping[str, Any]
+    engagement: Mapping[str, Any]
+    post_types: WeightedTable
+    playbook: Optional[Mapping[str, Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledConfig:
+    agents: Tuple[CompiledAgentConfig, ...]
+    global_settings: Mapping[str, Any]
+    data_sources: Mapping[str, Any]
+    learning: Mapping[str, Any]
+    raw: Mapping[str, Any]
+    strategies: Mapping[str, Any]
+
+    def agent(self, agent_id: str) -> Optional[CompiledAgentConfig]:
+        for agent in self.agents:
+            if agent.id == agent_id:
+                return agent
+        return None
+
+
+def _require(mapping: Dict[str, Any], key: str, where: str) -> Any:
+    if key not in mapping or mapping[key] in (None, ""):
+        raise ConfigError(f"{where}: missing required field '{key}'")
+    return mapping[key]
+
+
+def compile_agent_config(config: Dict[str, Any], strategies: Dict[str, Any]) -> CompiledAgentConfig:
+    """
+    Validate one agent entry and compile it against the parsed strategies.
+    """
+    agent_id = _require(config, "id", "agent")
+    where = f"agent '{agent_id}'"
+    for key in ("name", "llm_provider", "x_username", "system_prompt"):
+        _require(config, key, where)
+    personality = _require(config, "personality", where)
+    for key in ("archetype", "tone"):
+        _require(personality, key, f"{where}.personality")
+    strategy = _require(config, "strategy", where)
+    raw_post_types = _require(strategy, "post_types", f"{where}.strategy")
+
+    post_types = []
+    for pt in raw_post_types:
+        weight = float(pt.get("weight", 0))
+        templates = tuple(pt.get("templates") or ())
+        if weight <= 0:
+            raise ConfigError(f"{where}: post type '{pt.get('type')}' needs a positive weight")
+        if not templates:
+            raise ConfigError(f"{where}: post type '{pt.get('type')}' has no templates")
+        post_types.append(PostTypeSpec(type=_require(pt, "type", f"{where}.post_types"), weight=weight, templates=templates))
+
+    engagement = config.get("engagement", {}) or {}
+    playbook = None
+    try:
+        playbook = get_playbook(
+            strategies,
+            engagement.get("domain", "web3"),
+            engagement.get("playbook", "reply_guy_ct"),
+        )
+    except KeyError:
+        playbook = None
+
+    return CompiledAgentConfig(
+        id=agent_id,
+        name=config["name"],
+        llm_provider=config["llm_provider"],
+        model=config.get("model", "default"),
+        x_username=config["x_username"],
+        personality=freeze(personality),
+        system_prompt=config["system_prompt"],
+        strategy=freeze(strategy),
+        engagement=freeze(engagement),
+        post_types=WeightedTable.build(tuple(post_types)),
+        playbook=freeze(playbook) if playbook else None,
+    )
+
+
+def compile_config(config_path: str, strategies_path: Optional[str] = None) -> CompiledConfig:
+    """
+    Parse and validate agent_config.yaml and growth_strategies.yaml once.
+    """
+    with open(config_path, "r") as f:
+        raw = yaml.safe_load(f) or {}
+    strategies = load_growth_strategies(strategies_path) or {}
+
+    agents = raw.get("agents") or []
+    if not agents:
+        raise ConfigError(f"{config_path}: no agents defined")
+    compiled_agents = tuple(compile_agent_config(agent, strategies) for agent in agents)
+    ids = [agent.id for agent in compiled_agents]
+    if len(set(ids)) != len(ids):
+        raise ConfigError(f"{config_path}: duplicate agent ids")
+
+    return CompiledConfig(
+        agents=compiled_agents,
+        global_settings=freeze(raw.get("global_settings", {}) or {}),
+        data_sources=freeze(raw.get("data_sources", {}) or {}),
+        learning=freeze(raw.get("learning", {}) or {}),
+        raw=freeze(raw),
+        strategies=freeze(strategies),
+    )
+
+
+class ConfigWatcher:
+    """
+    Recompiles the configuration when either YAML file's mtime changes.
+
+    A file that fails to parse or validate is reported and the previous
+    compiled config stays in effect.
+    """
+
+    def __init__(
+        self,
+        config_path: str,
+        strategies_path: Optional[str] = None,
+        check_interval: float = 5.0,
+    ):
+        self.config_path = config_path
+        self.strategies_path = strategies_path or DEFAULT_STRATEGIES_PATH
+        self.check_interval = check_interval
+        self.current = compile_config(self.config_path, self.strategies_path)
+        self._mtimes = self._stat()
+        self._checked_at = time.monotonic()
+
+    def _stat(self) -> Tuple[float, float]:
+        return (os.path.getmtime(self.config_path), os.path.getmtime(self.strategies_path))
+
+    def poll(self, on_reload: Optional[Callable[[CompiledConfig], None]] = None) -> Optional[CompiledConfig]:
+        """
+        Return a newly compiled config if the files changed since the last check, else None.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return None
+        self._checked_at = now
+        try:
+            mtimes = self._stat()
+        except OSError as e:
+            print(f"[ConfigWatcher] Cannot stat config: {e}")
+            return None
+        if mtimes == self._mtimes:
+            return None
+        self._mtimes = mtimes
+        try:
+            compiled = compile_config(self.config_path, self.strategies_path)
+        except Exception as e:
+            print(f"[ConfigWatcher] Keeping previous config, reload failed: {e}")
+            return None
+        self.current = compiled
+        if on_reload:
+            on_reload(compiled)
+        return compiled
@@ -0,0 +1,160 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+def context_fingerprint(context: Dict[str, Any], price_bucket_pct: float = 1.0) -> Tuple:
+    """
+    Coarse view of the context fields a post prompt uses.
+
+    Two contexts with the same fingerprint would produce equivalent prompts,
+    so a draft written for one is still valid for the other. The BTC price
+    is bucketed on a log scale, so a move of about price_bucket_pct percent
+    counts as material.
+    """
+    price = context.get("btc_price")
+    try:
+        price_bucket = round(math.log(float(price)) / math.log1p(price_bucket_pct / 100)) if price else None
+    except (TypeError, ValueError):
+        price_bucket = None
+    change = context.get("price_change_24h")
+    try:
+        change_bucket = round(float(change)) if change is not None else None
+    except (TypeError, ValueError):
+        change_bucket = None
+    return (
+        price_bucket,
+        change_bucket,
+        context.get("sentiment"),
+        context.get("latest_news"),
+        tuple(context.get("trending_topics") or ()),
+    )
+
+
+@dataclass(frozen=True)
+class Draft:
+    text: str
+    post_type: str
+    template: str
+    fingerprint: Tuple
+    created_at: float
+
+
+class DraftPool:
+    """
+    Pre-generated post drafts for one agent, a few per post type.
+
+    A draft is served only while the market context still has the
+    fingerprint it was written for and it is younger than max_age; anything
+    else is dropped on the next lookup.
+    """
+
+    def __init__(self, per_type: int = 1, max_age: timedelta = timedelta(minutes=30), price_bucket_pct: float = 1.0):
+        self.per_type = max(1, per_type)
+        self.max_age = max_age
+        self.price_bucket_pct = price_bucket_pct
+        self._drafts: Dict[str, Deque[Draft]] = {}
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> Optional["DraftPool"]:
+        """
+        Build a pool from the global_settings.drafts block; None when speculation is off.
+        """
+        if not settings.get("speculative", False):
+            return None
+        return cls(
+            per_type=int(settings.get("per_post_type", 1)),
+            max_age=timedelta(minutes=float(settings.get("max_age_minutes", 30))),
+            price_bucket_pct=float(settings.get("price_bucket_pct", 1.0)),
+        )
+
+    def fingerprint(self, context: Dict[str, Any]) -> Tuple:
+        return context_fingerprint(context, self.price_bucket_pct)
+
+    def missing(self, post_type: str, fingerprint: Tuple, now: Optional[float] = None) -> int:
+        """
+        Number of drafts to generate to fill post_type for this fingerprint.
+        """
+        return self.per_type - len(self._valid(post_type, fingerprint, now))
+
+    def put(self, draft: Draft) -> None:
+        self._drafts.setdefault(draft.post_type, deque()).append(draft)
+
+    def take(self, post_type: str, fingerprint: Tuple, now: Optional[float] = None) -> Optional[Draft]:
+        drafts = self._valid(post_type, fingerprint, now)
+        return drafts.popleft() if drafts else None
+
+    def __len__(self) -> int:
+        return sum(len(drafts) for drafts in self._drafts.values())
+
+    def _valid(self, post_type: str, fingerprint: Tuple, now: Optional[float]) -> Deque[Draft]:
+        now = time.monotonic() if now is None else now
+        max_age = self.max_age.total_seconds()
+        drafts = self._drafts.setdefault(post_type, deque())
+        kept = [d for d in drafts if d.fingerprint == fingerprint and now - d.created_at < max_age]
+        if len(kept) != len(drafts):
+            drafts.clear()
+            drafts.extend(kept)
+        return drafts
+
+
+class CompletionCache:
+    """
+    Bounded LRU of LLM completions keyed by a hash of (system_prompt, user_prompt).
+
+    A reply that failed to post is regenerated from the same prompt on the
+    next attempt; the cache returns the earlier completion instead of paying
+    for another call. Entries expire after ttl.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: timedelta = timedelta(minutes=30)):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> "CompletionCache":
+        """
+        Build a cache from the global_settings.drafts block.
+        """
+        return cls(
+            max_entries=int(settings.get("completion_cache_size", 256)),
+            ttl=timedelta(minutes=float(settings.get("completion_ttl_minutes", 30))),
+        )
+
+    @staticmethod
+    def key(system_prompt: str, user_prompt: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(system_prompt.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(user_prompt.encode("utf-8"))
+        return digest.digest()
+
+    def get(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        key = self.key(system_prompt, user_prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] >= self.ttl.total_seconds():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, system_prompt: str, user_prompt: str, completion: str) -> None:
+        key = self.key(system_prompt, user_prompt)
+        with self._lock:
+            self._entries[key] = (completion, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,338 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import metrics
+
+# X API v2 accepts at most 100 ids per /2/tweets lookup
+TWEET_LOOKUP_BATCH_SIZE = 100
+
+
+def engagement_score(public_metrics: Dict[str, Any]) -> Tuple[float, float]:
+    """
+    Engagement (likes + retweets + replies + quotes) and engagement per impression.
+    """
+    engagement = float(
+        int(public_metrics.get("like_count", 0))
+        + int(public_metrics.get("retweet_count", 0))
+        + int(public_metrics.get("reply_count", 0))
+        + int(public_metrics.get("quote_count", 0))
+    )
+    impressions = int(public_metrics.get("impression_count", 0) or 0)
+    return engagement, engagement / impressions if impressions > 0 else 0.0
+
+
+class RunningStats:
+    """
+    Welford running mean and variance.
+
+    replace() swaps one previously added value for a new one in O(1), so a
+    post's refreshed engagement updates the aggregate without re-scanning.
+    """
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def replace(self, old: float, new: float) -> None:
+        if self.n == 0:
+            self.add(new)
+            return
+        delta = new - old
+        old_mean = self.mean
+        self.mean += delta / self.n
+        self.m2 = max(0.0, self.m2 + delta * (new - self.mean + old - old_mean))
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"n": self.n, "mean": round(self.mean, 4), "std": round(self.std, 4)}
+
+    def state(self) -> List[float]:
+        return [self.n, self.mean, self.m2]
+
+    @classmethod
+    def from_state(cls, state: List[float]) -> "RunningStats":
+        stats = cls()
+        stats.n, stats.mean, stats.m2 = int(state[0]), float(state[1]), float(state[2])
+        return stats
+
+
+@dataclass
+class ArmStats:
+    """
+    Aggregates for one agent, post type or template.
+    """
+
+    engagement: RunningStats
+    engagement_rate: RunningStats
+
+    @classmethod
+    def empty(cls) -> "ArmStats":
+        return cls(RunningStats(), RunningStats())
+
+
+@dataclass
+class TrackedPost:
+    tweet_id: str
+    agent_id: str
+    post_type: Optional[str]
+    template: Optional[str]
+    posted_at: datetime
+    engagement: Optional[float] = None
+    engagement_rate: Optional[float] = None
+
+
+ArmKey = Tuple[str, Optional[str], Optional[str]]
+
+
+class EngagementCollector:
+    """
+    Refreshes public metrics for recent posts and keeps per-agent,
+    per-post-type and per-template aggregates.
+
+    Every post inside the tracking window is refreshed with bulk lookups of
+    up to 100 ids per request. Posts older than the window are final and
+    stop being refreshed, so API cost depends on posting rate, not on how
+    long the history is. Lookup batches rotate over the agents' own
+    clients, so no single credential's read budget pays for everyone.
+
+    export() and restore() carry an agent's aggregates across restarts.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: timedelta = timedelta(minutes=30),
+        track_window: timedelta = timedelta(hours=48),
+    ):
+        self.refresh_interval = refresh_interval
+        self.track_window = track_window
+        self._clients: Dict[str, Any] = {}
+        self._rotation = 0
+        self._posts: Dict[str, TrackedPost] = {}
+        self._arms: Dict[ArmKey, ArmStats] = {}
+        # Last known (engagement, rate) of restored posts, applied when they are tracked again
+        self._restored: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._refreshed_at: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, learning: Dict[str, Any]) -> "EngagementCollector":
+        """
+        Build a collector from the learning block.
+        """
+        return cls(
+            refresh_interval=timedelta(minutes=float(learning.get("refresh_minutes", 30))),
+            track_window=timedelta(hours=float(learning.get("track_window_hours", 48))),
+        )
+
+    def add_client(self, agent_id: str, x_client: Any) -> None:
+        """
+        Share an agent's client for lookups.
+        """
+        with self._lock:
+            self._clients[agent_id] = x_client
+
+    def track(
+        self,
+        agent_id: str,
+        tweet_id: Optional[str],
+        post_type: Optional[str] = None,
+        template: Optional[str] = None,
+        posted_at: Optional[datetime] = None,
+    ) -> None:
+        if not tweet_id:
+            return
+        with self._lock:
+            if str(tweet_id) in self._posts:
+                return
+            engagement, rate = self._restored.pop(str(tweet_id), (None, None))
+            self._posts[str(tweet_id)] = TrackedPost(
+                tweet_id=str(tweet_id),
+                agent_id=agent_id,
+                post_type=post_type,
+                template=template,
+                posted_at=posted_at or datetime.now(),
+                engagement=engagement,
+                engagement_rate=rate,
+            )
+
+    def is_due(self) -> bool:
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_interval.total_seconds()
+
+    def maybe_refresh(self, now: Optional[datetime] = None) -> int:
+        if not self.is_due():
+            return 0
+        return self.refresh(now)
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        """
+        Look up metrics for every post still in the window; returns the number updated.
+        """
+        now = now or datetime.now()
+        self._refreshed_at = time.monotonic()
+        cutoff = now - self.track_window
+        with self._lock:
+            # Expired posts keep their final numbers in the aggregates
+            for tweet_id in [t for t, p in self._posts.items() if p.posted_at < cutoff]:
+                del self._posts[tweet_id]
+            ids = list(self._posts)
+            clients = list(self._clients.values())
+        if not clients:
+            return 0
+
+        updated = 0
+        for start in range(0, len(ids), TWEET_LOOKUP_BATCH_SIZE):
+            batch = ids[start:start + TWEET_LOOKUP_BATCH_SIZE]
+            client = clients[self._rotation % len(clients)]
+            self._rotation += 1
+            try:
+                tweets = client.get_tweets(tweet_ids=batch) or []
+            except Exception as e:
+                print(f"[EngagementCollector] Error looking up {len(batch)} tweets: {e}")
+                continue
+            metrics.inc("engagement_lookups_total")
+            for tweet in tweets:
+                if self._update(str(tweet.get("id", "")), tweet.get("public_metrics") or tweet):
+                    updated += 1
+        return updated
+
+    def _update(self, tweet_id: str, public_metrics: Dict[str, Any]) -> bool:
+        engagement, rate = engagement_score(public_metrics)
+        with self._lock:
+            post = self._posts.get(tweet_id)
+            if post is None:
+                return False
+            for key in self._keys(post):
+                arm = self._arms.get(key)
+                if arm is None:
+                    arm = self._arms[key] = ArmStats.empty()
+                if post.engagement is None:
+                    arm.engagement.add(engagement)
+                    arm.engagement_rate.add(rate)
+                else:
+                    arm.engagement.replace(post.engagement, engagement)
+                    arm.engagement_rate.replace(post.engagement_rate or 0.0, rate)
+            post.engagement = engagement
+            post.engagement_rate = rate
+        return True
+
+    @staticmethod
+    def _keys(post: TrackedPost) -> Iterable[ArmKey]:
+        yield (post.agent_id, None, None)
+        if post.post_type:
+            yield (post.agent_id, post.post_type, None)
+            if post.template:
+                yield (post.agent_id, post.post_type, post.template)
+
+    def export(self, agent_id: str) -> Dict[str, Any]:
+        """
+        JSON-serializable aggregates and tracked post metrics for one agent.
+        """
+        with self._lock:
+            arms = [
+                [key[1], key[2], arm.engagement.state(), arm.engagement_rate.state()]
+                for key, arm in self._arms.items()
+                if key[0] == agent_id
+            ]
+            posts = {
+                tweet_id: [post.engagement, post.engagement_rate or 0.0]
+                for tweet_id, post in self._posts.items()
+                if post.agent_id == agent_id and post.engagement is not None
+            }
+        return {"arms": arms, "posts": posts}
+
+    def restore(self, agent_id: str, saved: Optional[Dict[str, Any]]) -> None:
+        """
+        Load what export() returned; call before tracking the agent's recent posts.
+
+        Restored posts refresh in place, so they are not counted twice.
+        """
+        if not saved:
+            return
+        with self._lock:
+            for post_type, template, engagement, rate in saved.get("arms", []):
+                self._arms[(agent_id, post_type, template)] = ArmStats(
+                    RunningStats.from_state(engagement), RunningStats.from_state(rate)
+                )
+            for tweet_id, (engagement, rate) in saved.get("posts", {}).items():
+                self._restored[str(tweet_id)] = (float(engagement), float(rate))
+
+    def stats(self, agent_id: str, post_type: Optional[str] = None, template: Optional[str] = None) -> Optional[ArmStats]:
+        return self._arms.get((agent_id, post_type, template))
+
+    def summary(self, agent_id: str) -> Dict[str, Any]:
+        """
+        Aggregates for one agent and each of its post types.
+        """
+        with self._lock:
+            overall = self._arms.get((agent_id, None, None))
+            by_type = {
+                key[1]: {
+                    "engagement": arm.engagement.as_dict(),
+                    "engagement_rate": arm.engagement_rate.as_dict(),
+                }
+                for key, arm in self._arms.items()
+                if key[0] == agent_id and key[1] and key[2] is None
+            }
+        return {
+            "engagement": overall.engagement.as_dict() if overall else RunningStats().as_dict(),
+            "engagement_rate": overall.engagement_rate.as_dict() if overall else RunningStats().as_dict(),
+            "by_post_type": by_type,
+        }
+
+
+def adaptive_weights(
+    base: List[Tuple[Any, float]],
+    arms: List[Optional[ArmStats]],
+    strength: float = 1.0,
+    prior_samples: float = 5.0,
+    min_factor: float = 0.25,
+    max_factor: float = 4.0,
+) -> List[float]:
+    """
+    Multiplicative-weights update of configured weights from observed engagement.
+
+    Each arm's mean is shrunk toward the pooled mean by prior_samples pseudo
+    observations, then scaled by exp(strength * z) where z is the shrunk
+    mean's distance from the pooled mean in pooled standard deviations.
+    Factors are clamped so every arm keeps being explored.
+    """
+    pooled = RunningStats()
+    for arm in arms:
+        if arm and arm.engagement.n:
+            # Merge per-arm stats (Chan et al.) into one pooled estimate
+            n = pooled.n + arm.engagement.n
+            delta = arm.engagement.mean - pooled.mean
+            pooled.m2 += arm.engagement.m2 + delta * delta * pooled.n * arm.engagement.n / n
+            pooled.mean += delta * arm.engagement.n / n
+            pooled.n = n
+    if pooled.n < 2 or pooled.std == 0:
+        return [weight for _, weight in base]
+
+    weights = []
+    for (_, weight), arm in zip(base, arms):
+        n = arm.engagement.n if arm else 0
+        mean = arm.engagement.mean if arm else pooled.mean
+        shrunk = (n * mean + prior_samples * pooled.mean) / (n + prior_samples)
+        z = (shrunk - pooled.mean) / pooled.std
+        weights.append(weight * min(max_factor, max(min_factor, math.exp(strength * z))))
+    return weights
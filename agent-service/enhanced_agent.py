@@ -1,60 +1,179 @@
 import os
-import yaml
+import asyncio
 import random
+import time
+from collections import deque
+from itertools import islice
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-from strategies.loader import load_growth_strategies, get_playbook
+from typing import Callable, Deque, Dict, Generator, Iterable, Iterator, List, Any, Optional, Set, Union
+from strategies.loader import load_growth_strategies
 from strategies.selector import choose_reply_angles
 from x_discovery import XDiscovery
+from account_index import AccountIndex
+from async_clients import AsyncLLMClient, AsyncXClient
+from client_pool import ClientPool
+from llm_router import LLMRouter
+from drafts import CompletionCache, Draft, DraftPool
+from rate_limiter import RateLimitedXClient, RequestScheduler
+from rate_control import ClaimRegistry, ReplyRateControl
+from state_store import InMemoryStateStore, StateStore, create_state_store
+from similarity import NearDuplicateIndex
+from triggers import agent_rules, fires, posting_cooldown
+from scheduler import AgentScheduler, PostingHours
+from config_compiler import CompiledAgentConfig, CompiledConfig, ConfigWatcher, WeightedTable, compile_agent_config
+from engagement import EngagementCollector, adaptive_weights
+from market_data import MarketIngester
+from mentions import Mention, MentionsPoller
+import metrics
+from event_stream import create_publisher
 from llm_clients import get_llm_client
 from x_client import XClient
 
+def _build_x_client(agent_id: str) -> XClient:
+    prefix = agent_id.upper()
+    return XClient(
+        api_key=os.getenv(f"{prefix}_X_API_KEY"),
+        api_secret=os.getenv(f"{prefix}_X_API_SECRET"),
+        access_token=os.getenv(f"{prefix}_X_ACCESS_TOKEN"),
+        access_token_secret=os.getenv(f"{prefix}_X_ACCESS_TOKEN_SECRET")
+    )
+
+
+# Client I/O written once for the sync and async paths: a generator yields
+# calls to make on a client (LLM or X), is sent each result back, and
+# returns the outcome. _run_steps and _arun_steps supply the client.
+Steps = Generator[Callable[[Any], Any], Any, Any]
+
+
 class EnhancedAIAgent:
     """
     Enhanced AI Agent that uses configuration files for personality and strategy.
     This allows easy customization without code changes.
     """
     
-    def __init__(self, config: Dict[str, Any]):
-        self.id = config["id"]
-        self.name = config["name"]
-        self.llm_provider = config["llm_provider"]
-        self.model = config.get("model", "default")
-        self.x_username = config["x_username"]
-        
-        # Load personality and strategy from config
-        self.personality = config["personality"]
-        self.system_prompt = config["system_prompt"]
-        self.strategy = config["strategy"]
-        self.engagement = config.get("engagement", {})
-        
-        # Initialize clients
-        self.llm_client = get_llm_client(self.llm_provider)
-        self.x_client = XClient(
-            api_key=os.getenv(f"{self.id.upper()}_X_API_KEY"),
-            api_secret=os.getenv(f"{self.id.upper()}_X_API_SECRET"),
-            access_token=os.getenv(f"{self.id.upper()}_X_ACCESS_TOKEN"),
-            access_token_secret=os.getenv(f"{self.id.upper()}_X_ACCESS_TOKEN_SECRET")
-        )
-        self.discovery = XDiscovery(self.x_client)
-        self.strategies_kb = load_growth_strategies()
-        self.playbook = None
-        try:
-            domain = self.engagement.get("domain", "web3")
-            playbook_key = self.engagement.get("playbook", "reply_guy_ct")
-            self.playbook = get_playbook(self.strategies_kb, domain, playbook_key)
-        except Exception:
-            self.playbook = None
+    def __init__(
+        self,
+        config: Union[CompiledAgentConfig, Dict[str, Any]],
+        account_index: Optional[AccountIndex] = None,
+        request_scheduler: Optional[RequestScheduler] = None,
+        state_store: Optional[StateStore] = None,
+        content_index: Optional[NearDuplicateIndex] = None,
+        posting_hours: Optional[PostingHours] = None,
+        strategies: Optional[Dict[str, Any]] = None,
+        engagement_collector: Optional[EngagementCollector] = None,
+        client_pool: Optional[ClientPool] = None,
+        llm_router: Optional[LLMRouter] = None,
+    ):
+        if not isinstance(config, CompiledAgentConfig):
+            config = compile_agent_config(config, strategies if strategies is not None else load_growth_strategies())
+        self.id = config.id
+        self.name = config.name
+        self.llm_provider = config.llm_provider
+        self.model = config.model
+        self.x_username = config.x_username
+        self.posting_hours = posting_hours
+        
+        # Clients are built on first use; agents on the same provider share one LLM client
+        self.client_pool = client_pool if client_pool is not None else ClientPool()
+        provider, agent_id = self.llm_provider, self.id
+        if llm_router is not None:
+            # Deadlines, hedging to a backup provider and circuit breakers; the agent's provider stays primary
+            self.llm_client = llm_router.client(provider)
+        else:
+            self.llm_client = self.client_pool.get(("llm", provider), lambda: get_llm_client(provider))
+        if metrics.get_registry().enabled:
+            self.llm_client = metrics.InstrumentedLLMClient(self.llm_client, self.llm_provider, self.model)
+        # X clients stay per agent: each one posts with its own credentials
+        self.x_client = self.client_pool.get(("x", agent_id), lambda: _build_x_client(agent_id))
+        if request_scheduler is not None:
+            # Each agent posts with its own credentials, so budgets are keyed by agent id
+            self.x_client = RateLimitedXClient(self.x_client, request_scheduler, credential=self.id)
+        self.async_llm = AsyncLLMClient(self.llm_client)
+        self.async_x = AsyncXClient(self.x_client)
+        self.discovery = XDiscovery(self.x_client, account_index=account_index)
+        
+        # Personality, strategy, playbook and reply cadence
+        self.reply_control: Optional[ReplyRateControl] = None
+        self.apply_config(config)
+        
+        # Engagement of past posts, used to reweight post types and templates
+        self.engagement_collector = engagement_collector
+        self.pending_post_info: Optional[Dict[str, Any]] = None
+        
+        # Speculative post drafts and reusable completions; set by AgentManager
+        self.draft_pool: Optional[DraftPool] = None
+        self.completion_cache: Optional[CompletionCache] = None
         
         # Memory and performance tracking
         self.memory = []
-        self.recent_posts = []  # Track to avoid repetition
+        self.recent_posts: Deque[Dict[str, Any]] = deque()  # Track to avoid repetition
         self.performance_metrics = {
             "total_posts": 0,
             "total_engagement": 0,
-            "best_performing_type": None
+            "best_performing_type": None,
+            "rejected_drafts": 0
         }
-        self.recent_replies: List[Dict[str, Any]] = []
+        self.recent_replies: Deque[Dict[str, Any]] = deque()
+        # Ids of the tweets in recent_replies, so answered mentions are skipped without a scan
+        self._replied_tweet_ids: Set[str] = set()
+        
+        # Near-duplicate detection over recent output (quality_control)
+        self.content_index = content_index if content_index is not None else NearDuplicateIndex()
+        
+        # Durable state so cooldowns and daily caps survive restarts
+        self.state_store = state_store if state_store is not None else InMemoryStateStore()
+        self._restore_state()
+
+    def apply_config(self, config: CompiledAgentConfig) -> None:
+        """
+        Switch to a newly compiled config in place.
+        
+        Clients, history and reply counts are kept; only personality,
+        strategy, playbook and cadence limits change.
+        """
+        self.config = config
+        self.personality = config.personality
+        self.system_prompt = config.system_prompt
+        self.strategy = config.strategy
+        self.engagement = config.engagement
+        self.playbook = config.playbook
+        self.trigger_rules = agent_rules(self.id, self.strategy.get("triggers", {}))
+        # Start from configured weights; adapt_weights reweights from observed engagement
+        self.post_type_table = config.post_types
+        self.template_tables: Dict[str, WeightedTable] = {}
+        
+        # Daily cap, per-target limit and same-target cooldown from engagement + playbook cadence
+        cadence = (self.playbook or {}).get("cadence", {})
+        reply_control = ReplyRateControl.from_settings(self.engagement, cadence)
+        if self.reply_control is None:
+            self.reply_control = reply_control
+        else:
+            self.reply_control.reconfigure(reply_control)
+
+    def _restore_state(self):
+        """
+        Rebuild recent history, reply caps and metrics from the state store.
+        """
+        since = datetime.now() - timedelta(hours=24)
+        posts = self.state_store.posts_between(self.id, since)
+        replies = self.state_store.replies_between(self.id, since)
+        self.recent_posts.extend(posts)
+        for reply in replies:
+            self.recent_replies.append(reply)
+            self._replied_tweet_ids.add(str(reply.get("tweet_id")))
+            self.reply_control.record(reply.get("target_user_id"), reply["timestamp"])
+        # The content index expires from the front, so feed it posts and replies in time order
+        for item in sorted(posts + replies, key=lambda item: item["timestamp"]):
+            self.content_index.add(item.get("content") or "", self.id, item["timestamp"])
+        self.memory = self.state_store.recent_memory(self.id)
+        self.performance_metrics.update(self.state_store.load_metrics(self.id) or {})
+
+    def remember(self, item: Dict[str, Any]):
+        """
+        Append an item to the agent's memory and persist it.
+        """
+        self.memory.append(item)
+        self.state_store.record_memory(self.id, item)
     
     def decide_action(self, context: Dict[str, Any]) -> str:
         """
@@ -66,28 +185,8 @@ class EnhancedAIAgent:
         Returns:
             Action to take: "post", "reply", "retweet", "wait"
         """
-        triggers = self.strategy.get("triggers", {})
-        
-        # Check if any trigger conditions are met
-        if context.get("price_change", 0) > triggers.get("price_movement_threshold", 5):
-            return "post"
-        
-        if context.get("volume_spike", 1) > triggers.get("volume_spike_threshold", 2):
-            return "post"
-        
-        if context.get("news_relevance", 0) > triggers.get("news_relevance_score", 7):
-            return "post"
-        
-        # Check for special triggers based on agent personality
-        if self.id == "grok_crypto":
-            fear_greed = context.get("fear_greed_index", 50)
-            if fear_greed > 75 or fear_greed < 25:
-                return "post"
-        
-        if self.id == "gemini_crypto" and context.get("misinformation_detected"):
-            return "post"
-        
-        if self.id == "qwen_coin" and context.get("meme_opportunity"):
+        # Price, volume and news thresholds plus personality-specific triggers (see triggers.py)
+        if fires(self.trigger_rules, context):
             return "post"
         
         # Default: wait for better opportunity
@@ -100,44 +199,52 @@ class EnhancedAIAgent:
         Returns:
             Dict with post type and template
         """
-        post_types = self.strategy["post_types"]
-        
-        # Calculate total weight
-        total_weight = sum(pt["weight"] for pt in post_types)
-        
-        # Weighted random selection
-        rand = random.uniform(0, total_weight)
-        current = 0
-        
-        for post_type in post_types:
-            current += post_type["weight"]
-            if rand <= current:
-                template = random.choice(post_type["templates"])
-                return {
-                    "type": post_type["type"],
-                    "template": template
-                }
-        
-        # Fallback
+        post_type = self.post_type_table.pick()
+        template_table = self.template_tables.get(post_type.type)
+        template = template_table.pick() if template_table else random.choice(post_type.templates)
         return {
-            "type": post_types[0]["type"],
-            "template": post_types[0]["templates"][0]
+            "type": post_type.type,
+            "template": template
         }
+
+    def adapt_weights(self, learning: Dict[str, Any]) -> None:
+        """
+        Reweight post types (adjust_weights) and templates (a_b_testing) from collected engagement.
+        """
+        if self.engagement_collector is None:
+            return
+        adapt = learning.get("adapt_strategy", {})
+        if not adapt.get("enabled", False):
+            return
+        collector = self.engagement_collector
+        strength = float(adapt.get("exploit_strength", 1.0))
+        specs = self.config.post_types.items
+        if adapt.get("adjust_weights", False):
+            weights = adaptive_weights(
+                [(spec, spec.weight) for spec in specs],
+                [collector.stats(self.id, spec.type) for spec in specs],
+                strength=strength,
+            )
+            self.post_type_table = WeightedTable.build(specs, weights)
+        if adapt.get("a_b_testing", False):
+            for spec in specs:
+                weights = adaptive_weights(
+                    [(template, 1.0) for template in spec.templates],
+                    [collector.stats(self.id, spec.type, template) for template in spec.templates],
+                    strength=strength,
+                )
+                self.template_tables[spec.type] = WeightedTable.build(spec.templates, weights)
     
-    def generate_post_content(self, context: Dict[str, Any]) -> str:
+    def _build_post_prompt(self, context: Dict[str, Any], post_info: Optional[Dict[str, Any]] = None) -> str:
         """
-        Generate post content using LLM with personality and context.
-        
-        Args:
-            context: Current market context, news, trends
-        
-        Returns:
-            Generated tweet content
+        Build the user prompt for a new post from the current context.
         """
-        # Select post type and template
-        post_info = self.select_post_type()
-        template = post_info["template"]
-        
+        # Select post type and template; kept so the accepted draft can be attributed
+        post_info = post_info or self.select_post_type()
+        self.pending_post_info = post_info
+        return self._post_prompt(context, post_info["template"])
+
+    def _post_prompt(self, context: Dict[str, Any], template: str) -> str:
         # Build context-aware prompt
         user_prompt = f"""
 Context:
@@ -160,35 +267,181 @@ Guidelines:
 
 Generate the tweet now:
 """
-        
-        # Call LLM
-        tweet_content = self.llm_client.generate_text(
-            system_prompt=self.system_prompt,
-            user_prompt=user_prompt
-        )
-        
-        # Clean up and validate
+        return user_prompt
+
+    @staticmethod
+    def _clean_post(tweet_content: str) -> str:
         tweet_content = tweet_content.strip()
         if len(tweet_content) > 280:
             tweet_content = tweet_content[:277] + "..."
-        
         return tweet_content
 
+    def _is_repetitive(self, draft: str) -> bool:
+        """
+        Check a draft against recent output; repetitive drafts are counted as rejected.
+        """
+        if not self.content_index.is_repetitive(draft, self.id):
+            return False
+        self.performance_metrics["rejected_drafts"] = self.performance_metrics.get("rejected_drafts", 0) + 1
+        metrics.inc("drafts_rejected_total", agent=self.id)
+        return True
+
+    def generate_post_content(self, context: Dict[str, Any]) -> str:
+        """
+        Generate post content using LLM with personality and context.
+        
+        Drafts too similar to recent output are regenerated; if every attempt
+        is repetitive an empty string is returned and nothing should be posted.
+        
+        Args:
+            context: Current market context, news, trends
+        
+        Returns:
+            Generated tweet content
+        """
+        return self._run_steps(self._post_content_steps(context), self.llm_client)
+
+    async def agenerate_post_content(self, context: Dict[str, Any]) -> str:
+        """
+        Async variant of generate_post_content.
+        """
+        return await self._arun_steps(self._post_content_steps(context), self.async_llm)
+
+    def _post_content_steps(self, context: Dict[str, Any]) -> Steps:
+        post_info = self.select_post_type()
+        draft = self._take_draft(post_info["type"], context)
+        if draft:
+            return draft
+        for attempt in range(1 + self.content_index.max_regenerations):
+            user_prompt = self._build_post_prompt(context, post_info if attempt == 0 else None)
+            tweet_content = self._clean_post((yield self._completion(user_prompt)))
+            if not self._is_repetitive(tweet_content):
+                return tweet_content
+        print(f"[{self.name}] Dropped repetitive post drafts")
+        return ""
+
+    def _completion(self, user_prompt: str) -> Callable[[Any], Any]:
+        return lambda llm: llm.generate_text(system_prompt=self.system_prompt, user_prompt=user_prompt)
+
+    @staticmethod
+    def _run_steps(steps: Steps, client: Any) -> Any:
+        """
+        Drive steps against a blocking client: each yielded call is made on
+        the client and its result (or exception) is sent back.
+        """
+        try:
+            call = next(steps)
+            while True:
+                try:
+                    result = call(client)
+                except Exception as e:
+                    call = steps.throw(e)
+                else:
+                    call = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    @staticmethod
+    async def _arun_steps(steps: Steps, client: Any) -> Any:
+        """
+        Async variant of _run_steps, awaiting each call on an async client.
+        """
+        try:
+            call = next(steps)
+            while True:
+                try:
+                    result = await call(client)
+                except Exception as e:
+                    call = steps.throw(e)
+                else:
+                    call = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    def _take_draft(self, post_type: str, context: Dict[str, Any]) -> Optional[str]:
+        """
+        Serve a pre-generated draft of post_type written for an equivalent context.
+        """
+        if self.draft_pool is None:
+            return None
+        fingerprint = self.draft_pool.fingerprint(context)
+        while True:
+            draft = self.draft_pool.take(post_type, fingerprint)
+            if draft is None:
+                return None
+            # Recent output may have changed since the draft was written
+            if not self.content_index.is_repetitive(draft.text, self.id):
+                self.pending_post_info = {"type": draft.post_type, "template": draft.template}
+                metrics.inc("drafts_served_total", agent=self.id)
+                return draft.text
+
+    def wants_drafts(self, context: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+        """
+        True while the agent is in its posting cooldown, the cooldown ends
+        before drafts would expire, and some post type lacks a draft for this context.
+        """
+        if self.draft_pool is None:
+            return False
+        now = now or datetime.now()
+        ready_at = self.next_post_time()
+        if self.posting_hours:
+            ready_at = self.posting_hours.next_active(max(ready_at, now))
+        if ready_at <= now or ready_at - now > self.draft_pool.max_age:
+            return False
+        fingerprint = self.draft_pool.fingerprint(context)
+        return any(self.draft_pool.missing(spec.type, fingerprint) > 0 for spec in self.post_type_table.items)
+
+    async def aprefill_drafts(self, context: Dict[str, Any]) -> int:
+        """
+        Generate drafts for post types missing one, heaviest weight first; returns how many were added.
+        """
+        if self.draft_pool is None:
+            return 0
+        fingerprint = self.draft_pool.fingerprint(context)
+        added = 0
+        for spec in sorted(self.post_type_table.items, key=lambda spec: -spec.weight):
+            for _ in range(self.draft_pool.missing(spec.type, fingerprint)):
+                template_table = self.template_tables.get(spec.type)
+                template = template_table.pick() if template_table else random.choice(spec.templates)
+                text = self._clean_post(await self.async_llm.generate_text(
+                    system_prompt=self.system_prompt,
+                    user_prompt=self._post_prompt(context, template),
+                ))
+                # Speculative drafts aren't counted as rejected; they were never offered
+                if text and not self.content_index.is_repetitive(text, self.id):
+                    self.draft_pool.put(Draft(text, spec.type, template, fingerprint, time.monotonic()))
+                    added += 1
+        metrics.inc("drafts_generated_total", added, agent=self.id)
+        return added
+
     def should_reply_now(self) -> bool:
         """
-        Basic frequency control for replies using engagement settings.
+        Frequency control for replies using engagement settings and playbook cadence.
         """
-        cap = int(self.engagement.get("daily_reply_cap", 10))
-        cutoff = datetime.now() - timedelta(hours=24)
-        recent = [r for r in self.recent_replies if r["timestamp"] > cutoff]
-        return len(recent) < cap
+        if self.posting_hours and not self.posting_hours.is_active():
+            return False
+        return self.reply_control.can_reply()
 
-    def find_reply_opportunities(self) -> List[Dict[str, Any]]:
+    def next_reply_time(self, now: Optional[datetime] = None) -> datetime:
         """
-        Use discovery to find top accounts and return recent tweets to reply to.
+        Earliest time the daily reply cap allows another reply.
+        """
+        return self.reply_control.next_allowed(now or datetime.now())
+
+    def iter_reply_opportunities(
+        self, claims: Optional[ClaimRegistry] = None, max_targets: int = 10
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield reply opportunities best candidate first, fetching one timeline at a time.
+        
+        Targets in cooldown or over their limit are skipped before any fetch,
+        and tweets this agent already answered are passed over. With a claim
+        registry, each yielded tweet is claimed for this agent and tweets
+        claimed by other agents are passed over too. A caller that stops at
+        the first opportunity pays for one timeline lookup, not max_targets.
         """
         if not self.playbook:
-            return []
+            return
         topics = self.engagement.get("topics", ["Bitcoin", "Ethereum", "DeFi"])
         heur = self.playbook.get("heuristics", {})
         candidates = self.discovery.search_and_rank_accounts(
@@ -198,24 +451,47 @@ Generate the tweet now:
             engagement_to_followers_ratio=float(heur.get("engagement_to_followers_ratio", 0.003)),
             recency_hours=int(heur.get("recency_hours", 12)),
             limit=20,
+            score_weights=heur.get("score_weights"),
+            followers_saturation=float(heur.get("followers_saturation", 100_000)),
+            topics_saturation=float(heur.get("topics_saturation", 5)),
         )
-        opportunities: List[Dict[str, Any]] = []
-        for c in candidates[:10]:
+        for c in candidates[:max_targets]:
+            if not self.reply_control.can_reply_to(c.user_id):
+                continue
             # Fetch a recent tweet to reply to
             tweets = self.x_client.get_user_tweets(user_id=c.user_id, max_results=3)
-            if not tweets:
-                continue
-            target_tweet = tweets[0]
-            opportunities.append({
-                "target_user": c,
-                "tweet": target_tweet,
-            })
-        return opportunities
+            for tweet in tweets or []:
+                tweet_id = str(tweet.get("id", ""))
+                # The claim registry lets an agent re-claim its own tweet, so check its history first
+                if self.has_replied_to(tweet_id):
+                    continue
+                if claims is None or claims.claim(tweet_id, self.id):
+                    yield {"target_user": c, "tweet": tweet}
+                    break
 
-    def generate_reply_content(self, target_tweet: Dict[str, Any]) -> str:
-        if not self.playbook:
-            return ""
-        angles = choose_reply_angles(self.playbook, k=1)
+    def find_reply_opportunities(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Use discovery to find top accounts and return recent tweets to reply to.
+        """
+        return list(islice(self.iter_reply_opportunities(), limit))
+
+    def find_reply_opportunity(self, claims: Optional[ClaimRegistry] = None) -> Optional[Dict[str, Any]]:
+        """
+        First eligible opportunity, claimed in `claims` when given; None if there is none.
+        """
+        opportunities = self.iter_reply_opportunities(claims)
+        try:
+            return next(opportunities, None)
+        finally:
+            opportunities.close()
+
+    async def afind_reply_opportunity(self, claims: Optional[ClaimRegistry] = None) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.find_reply_opportunity, claims)
+
+    def _build_reply_prompt(self, target_tweet: Dict[str, Any], stable: bool = False) -> str:
+        # A stable prompt picks the same angle for the same tweet, so retries hit the completion cache
+        rng = random.Random(f"{self.id}:{target_tweet.get('id')}") if stable else None
+        angles = choose_reply_angles(self.playbook, k=1, rng=rng)
         angle = angles[0] if angles else "add one data point"
         guardrails = "\n".join(f"- {g}" for g in self.playbook.get("guardrails", []))
         tweet_text = target_tweet.get("text", "")
@@ -223,9 +499,9 @@ Generate the tweet now:
 
         user_prompt = f"""
 Target tweet (from @{author}):
-"""
+'''
 {tweet_text}
-"""
+'''
 
 Your task:
 - Write a concise, high-signal reply following this angle: {angle}
@@ -238,29 +514,99 @@ Guardrails:
 
 Reply:
 """
-        reply = self.llm_client.generate_text(
-            system_prompt=self.system_prompt,
-            user_prompt=user_prompt,
-        ).strip()
+        return user_prompt
+
+    @staticmethod
+    def _clean_reply(reply: str) -> str:
+        reply = reply.strip()
         if len(reply) > 240:
             reply = reply[:237] + "..."
         return reply
 
-    def reply_to_tweet(self, tweet: Dict[str, Any], content: str) -> bool:
+    def generate_reply_content(self, target_tweet: Dict[str, Any]) -> str:
+        return self._run_steps(self._reply_content_steps(target_tweet), self.llm_client)
+
+    async def agenerate_reply_content(self, target_tweet: Dict[str, Any]) -> str:
+        return await self._arun_steps(self._reply_content_steps(target_tweet), self.async_llm)
+
+    def _reply_content_steps(self, target_tweet: Dict[str, Any]) -> Steps:
+        if not self.playbook:
+            return ""
+        for attempt in range(1 + self.content_index.max_regenerations):
+            user_prompt = self._build_reply_prompt(target_tweet, stable=attempt == 0)
+            reply = self._cached_completion(user_prompt) if attempt == 0 else None
+            if reply is None:
+                reply = self._clean_reply((yield self._completion(user_prompt)))
+            if not self._is_repetitive(reply):
+                self._cache_completion(user_prompt, reply)
+                return reply
+        print(f"[{self.name}] Dropped repetitive reply drafts")
+        return ""
+
+    def _cached_completion(self, user_prompt: str) -> Optional[str]:
+        if self.completion_cache is None:
+            return None
+        reply = self.completion_cache.get(self.system_prompt, user_prompt)
+        if reply is not None:
+            metrics.inc("completion_cache_hits_total", agent=self.id)
+        return reply
+
+    def _cache_completion(self, user_prompt: str, reply: str) -> None:
+        if self.completion_cache is not None:
+            self.completion_cache.put(self.system_prompt, user_prompt, reply)
+
+    def has_replied_to(self, tweet_id: str) -> bool:
+        return str(tweet_id) in self._replied_tweet_ids
+
+    @staticmethod
+    def _prune_history(history: Deque[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+        # Entries are appended in time order, so expired ones are always on the left
+        cutoff = now - timedelta(hours=24)
+        expired = []
+        while history and history[0]["timestamp"] <= cutoff:
+            expired.append(history.popleft())
+        return expired
+
+    def _record_reply(
+        self,
+        tweet: Dict[str, Any],
+        content: str,
+        result: Dict[str, Any],
+        target_user_id: Optional[str],
+    ) -> None:
+        now = datetime.now()
+        self.recent_replies.append({
+            "content": content,
+            "timestamp": now,
+            "tweet_id": tweet.get("id"),
+            "reply_id": result.get("id"),
+            "target_user_id": target_user_id,
+        })
+        for expired in self._prune_history(self.recent_replies, now):
+            self._replied_tweet_ids.discard(str(expired.get("tweet_id")))
+        self._replied_tweet_ids.add(str(tweet.get("id")))
+        self.reply_control.record(target_user_id, now)
+        self.content_index.add(content, self.id, now)
+        self.state_store.record_reply(self.id, self.recent_replies[-1])
+
+    def reply_to_tweet(self, tweet: Dict[str, Any], content: str, target_user_id: Optional[str] = None) -> bool:
+        return self._run_steps(self._reply_steps(tweet, content, target_user_id), self.x_client)
+
+    async def areply_to_tweet(self, tweet: Dict[str, Any], content: str, target_user_id: Optional[str] = None) -> bool:
+        return await self._arun_steps(self._reply_steps(tweet, content, target_user_id), self.async_x)
+
+    def _reply_steps(self, tweet: Dict[str, Any], content: str, target_user_id: Optional[str]) -> Steps:
+        target_user_id = target_user_id or tweet.get("author_id")
+        if target_user_id and not self.reply_control.can_reply_to(target_user_id):
+            return False
         try:
-            result = self.x_client.post_reply(tweet_id=tweet.get("id"), content=content)
+            result = yield lambda x: x.post_reply(tweet_id=tweet.get("id"), content=content)
             if result:
-                self.recent_replies.append({
-                    "content": content,
-                    "timestamp": datetime.now(),
-                    "tweet_id": tweet.get("id"),
-                    "reply_id": result.get("id"),
-                })
-                # prune
-                cutoff = datetime.now() - timedelta(hours=24)
-                self.recent_replies = [r for r in self.recent_replies if r["timestamp"] > cutoff]
+                self._record_reply(tweet, content, result, target_user_id)
+                metrics.inc("posts_total", agent=self.id, kind="reply")
                 return True
         except Exception as e:
+            metrics.inc("post_errors_total", agent=self.id, kind="reply")
             print(f"[{self.name}] Error replying: {e}")
         return False
     
@@ -271,22 +617,33 @@ Reply:
         Returns:
             True if should post, False otherwise
         """
+        if self.posting_hours and not self.posting_hours.is_active():
+            return False
+        
         if not self.recent_posts:
             return True
         
         last_post_time = self.recent_posts[-1]["timestamp"]
         time_since_last = datetime.now() - last_post_time
         
-        # Frequency-based cooldown
-        frequency = self.strategy.get("posting_frequency", "medium")
-        cooldowns = {
-            "very_high": timedelta(minutes=15),
-            "high": timedelta(minutes=30),
-            "medium": timedelta(hours=1),
-            "low": timedelta(hours=2)
-        }
-        
-        return time_since_last > cooldowns.get(frequency, timedelta(hours=1))
+        return time_since_last > self.post_cooldown()
+
+    def post_cooldown(self, when: Optional[datetime] = None) -> timedelta:
+        """
+        Frequency-based cooldown between posts, shortened during peak hours.
+        """
+        cooldown = posting_cooldown(self.strategy.get("posting_frequency", "medium"))
+        if self.posting_hours:
+            cooldown = self.posting_hours.scale_cooldown(cooldown, when)
+        return cooldown
+
+    def next_post_time(self) -> datetime:
+        """
+        Earliest time the posting cooldown allows another post.
+        """
+        if not self.recent_posts:
+            return datetime.min
+        return self.recent_posts[-1]["timestamp"] + self.post_cooldown()
     
     def post_tweet(self, content: str) -> bool:
         """
@@ -298,30 +655,52 @@ Reply:
         Returns:
             True if successful, False otherwise
         """
+        return self._run_steps(self._post_steps(content), self.x_client)
+
+    async def apost_tweet(self, content: str) -> bool:
+        """
+        Async variant of post_tweet.
+        """
+        return await self._arun_steps(self._post_steps(content), self.async_x)
+
+    def _post_steps(self, content: str) -> Steps:
         try:
-            result = self.x_client.post_tweet(content)
+            result = yield lambda x: x.post_tweet(content)
             
             if result:
-                # Track post
-                self.recent_posts.append({
-                    "content": content,
-                    "timestamp": datetime.now(),
-                    "tweet_id": result.get("id")
-                })
-                
-                # Keep only recent posts (last 24 hours)
-                cutoff = datetime.now() - timedelta(hours=24)
-                self.recent_posts = [
-                    p for p in self.recent_posts 
-                    if p["timestamp"] > cutoff
-                ]
-                
-                self.performance_metrics["total_posts"] += 1
+                self._record_post(content, result)
+                metrics.inc("posts_total", agent=self.id, kind="tweet")
                 return True
         except Exception as e:
+            metrics.inc("post_errors_total", agent=self.id, kind="tweet")
             print(f"[{self.name}] Error posting tweet: {e}")
         
         return False
+
+    def _record_post(self, content: str, result: Dict[str, Any]) -> None:
+        # Track post
+        now = datetime.now()
+        post_info = self.pending_post_info or {}
+        self.recent_posts.append({
+            "content": content,
+            "timestamp": now,
+            "tweet_id": result.get("id"),
+            "post_type": post_info.get("type"),
+            "template": post_info.get("template"),
+        })
+        self.pending_post_info = None
+        
+        # Keep only recent posts (last 24 hours)
+        self._prune_history(self.recent_posts, now)
+        
+        self.performance_metrics["total_posts"] += 1
+        if self.engagement_collector is not None:
+            self.engagement_collector.track(
+                self.id, result.get("id"), post_info.get("type"), post_info.get("template"), now
+            )
+        self.content_index.add(content, self.id, now)
+        self.state_store.record_post(self.id, self.recent_posts[-1])
+        self.state_store.save_metrics(self.id, self.performance_metrics)
     
     def analyze_performance(self) -> Dict[str, Any]:
         """
@@ -330,13 +709,46 @@ Reply:
         Returns:
             Performance analysis and recommendations
         """
-        # This would fetch actual engagement data from X API
-        # For now, return structure
+        if self.engagement_collector is None:
+            return {
+                "total_posts": self.performance_metrics["total_posts"],
+                "avg_engagement": self.performance_metrics.get("avg_engagement", 0),
+                "best_post_type": self.performance_metrics.get("best_performing_type"),
+                "recommendations": []
+            }
+        
+        summary = self.engagement_collector.summary(self.id)
+        by_type = summary["by_post_type"]
+        best = max(by_type, key=lambda t: by_type[t]["engagement"]["mean"], default=None)
+        
+        # Compare adapted weights with configured ones
+        configured = {spec.type: spec.weight for spec in self.config.post_types.items}
+        total = self.post_type_table.total or 1.0
+        base_total = self.config.post_types.total or 1.0
+        current: Dict[str, float] = {}
+        previous = 0.0
+        for spec, cumulative in zip(self.post_type_table.items, self.post_type_table.cumulative):
+            current[spec.type] = round((cumulative - previous) / total, 3)
+            previous = cumulative
+        recommendations = []
+        for post_type, share in current.items():
+            base_share = configured[post_type] / base_total
+            if share > base_share * 1.25:
+                recommendations.append(f"Post more {post_type} ({base_share:.0%} -> {share:.0%})")
+            elif share < base_share * 0.8:
+                recommendations.append(f"Post less {post_type} ({base_share:.0%} -> {share:.0%})")
+        
+        self.performance_metrics["avg_engagement"] = summary["engagement"]["mean"]
+        self.performance_metrics["total_engagement"] = round(summary["engagement"]["mean"] * summary["engagement"]["n"], 2)
+        self.performance_metrics["best_performing_type"] = best
         return {
             "total_posts": self.performance_metrics["total_posts"],
-            "avg_engagement": self.performance_metrics.get("avg_engagement", 0),
-            "best_post_type": self.performance_metrics.get("best_performing_type"),
-            "recommendations": []
+            "avg_engagement": summary["engagement"]["mean"],
+            "engagement_rate": summary["engagement_rate"]["mean"],
+            "best_post_type": best,
+            "by_post_type": by_type,
+            "post_type_weights": current,
+            "recommendations": recommendations
         }
 
 
@@ -345,78 +757,387 @@ class AgentManager:
     Manages multiple agents and coordinates their actions.
     """
     
-    def __init__(self, config_path: str = "agent_config.yaml"):
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+    def __init__(self, config_path: str = "agent_config.yaml", agent_ids: Optional[Iterable[str]] = None):
+        """
+        Args:
+            config_path: Path to agent_config.yaml
+            agent_ids: Run only these agents (a shard worker's share); all agents by default
+        """
+        self.config_watcher = ConfigWatcher(config_path)
+        compiled = self.config_watcher.current
+        self.config = compiled.raw
+        self.global_settings = compiled.global_settings
+        
+        # Metrics are a no-op unless global_settings.metrics.enabled is set
+        self.metrics_exporter = metrics.configure(self.global_settings.get("metrics", {}))
+        
+        # Provider-keyed clients built on first use, so startup doesn't scale with the roster
+        self.client_pool = ClientPool.from_config(self.global_settings.get("runtime", {}))
+        self.llm_router = LLMRouter.from_config(
+            self.global_settings.get("llm_router", {}),
+            lambda provider: self.client_pool.get(("llm", provider), lambda: get_llm_client(provider)),
+        )
+        
+        # One account index shared by every agent so overlapping topics are crawled once
+        engagement_settings = self.global_settings.get("engagement", {})
+        self.account_index = AccountIndex.from_config(engagement_settings.get("discovery_cache", {}))
+        # Each target tweet gets at most one agent reply per claim window
+        self.claims = ClaimRegistry.from_settings(engagement_settings)
+        # One poller for every agent's mentions timeline; None unless reply_to_mentions is set
+        self.mentions = MentionsPoller.from_config(engagement_settings)
+        self.request_scheduler = RequestScheduler.from_config(self.global_settings.get("rate_limits", {}))
+        self.state_store = create_state_store(self.global_settings.get("state", {}))
+        self.content_index = NearDuplicateIndex.from_config(self.global_settings.get("quality_control", {}))
+        self.draft_settings = self.global_settings.get("drafts", {})
+        self.completion_cache = CompletionCache.from_config(self.draft_settings)
+        scheduler_settings = self.global_settings.get("scheduler", {})
+        self.posting_hours = PostingHours.from_config(
+            self.global_settings.get("posting_hours", {}),
+            peak_cooldown_factor=float(scheduler_settings.get("peak_cooldown_factor", 1.0)),
+        )
+        
+        # One ingester feeds a shared snapshot to every agent
+        self.market = self._create_market(compiled)
+        
+        selected = set(agent_ids) if agent_ids is not None else None
+        self.agent_filter = selected
+        self.learning = compiled.learning
+        self.engagement_collector: Optional[EngagementCollector] = None
+        self.agents: List[EnhancedAIAgent] = []
+        self.add_agents(
+            [agent_config for agent_config in compiled.agents if selected is None or agent_config.id in selected]
+        )
+        self._reviewed_at = datetime.now()
+        
+        runtime = self.global_settings.get("runtime", {})
+        self.max_concurrent_agents = max(1, int(runtime.get("max_concurrent_agents", 4)))
+        self.agent_timeout_seconds = float(runtime.get("agent_timeout_seconds", 120))
+        self.config_watcher.check_interval = float(runtime.get("config_reload_seconds", 5))
         
-        self.agents = [
-            EnhancedAIAgent(agent_config) 
-            for agent_config in self.config["agents"]
-        ]
+        # Post/reply/decision/metric events for the dashboard's live view
+        self.events = create_publisher(self.global_settings.get("event_stream", {}))
         
-        self.global_settings = self.config.get("global_settings", {})
+        # Shared by every batch on a loop; the scheduler can run several batches at once
+        self._agent_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._agent_semaphore: Optional[asyncio.Semaphore] = None
+        self._refreshing_engagement = False
+        
+        # Background draft generation for agents in cooldown
+        self._prefill_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._prefill_semaphore: Optional[asyncio.Semaphore] = None
+        self._prefilling: Set[str] = set()
+        self._prefill_tasks: Set[asyncio.Task] = set()
+    
+    def _create_market(self, compiled: CompiledConfig) -> Optional[MarketIngester]:
+        return MarketIngester.from_config(compiled.data_sources, self.global_settings.get("market_data", {}))
+    
+    def add_agents(self, agent_configs: List[CompiledAgentConfig]) -> List[int]:
+        """
+        Build agents on the shared components and return their indices in self.agents.
+        
+        Saved history is restored from the state store, so an agent moved here
+        from another shard worker keeps its cooldowns and caps.
+        """
+        start = len(self.agents)
+        for agent_config in agent_configs:
+            agent = EnhancedAIAgent(
+                agent_config,
+                account_index=self.account_index,
+                request_scheduler=self.request_scheduler,
+                state_store=self.state_store,
+                content_index=self.content_index,
+                posting_hours=self.posting_hours,
+                client_pool=self.client_pool,
+                llm_router=self.llm_router,
+            )
+            # Engagement for every agent's posts is looked up in bulk, rotating over the agents' clients
+            if self.engagement_collector is None:
+                self.engagement_collector = EngagementCollector.from_config(self.learning)
+            self.engagement_collector.add_client(agent.id, agent.x_client)
+            self.engagement_collector.restore(agent.id, agent.performance_metrics.get("engagement"))
+            agent.engagement_collector = self.engagement_collector
+            agent.completion_cache = self.completion_cache
+            agent.draft_pool = DraftPool.from_config(self.draft_settings)
+            for post in agent.recent_posts:
+                self.engagement_collector.track(
+                    agent.id, post.get("tweet_id"), post.get("post_type"), post.get("template"), post["timestamp"]
+                )
+            # Start from the weights the restored aggregates support rather than neutral ones
+            agent.adapt_weights(self.learning)
+            if self.mentions:
+                self.mentions.track(agent)
+            self.agents.append(agent)
+        self._watch_triggers()
+        return list(range(start, len(self.agents)))
+
+    def _watch_triggers(self) -> None:
+        # Ticks that cross any agent's post trigger wake the scheduler like news does
+        if self.market is not None:
+            self.market.watch(rule for agent in self.agents for rule in agent.trigger_rules)
+    
+    def maybe_reload_config(self) -> bool:
+        """
+        Apply edits to agent_config.yaml or growth_strategies.yaml without a restart.
+        
+        Existing agents are reconfigured in place. Adding or removing agents
+        and changing global_settings still need a restart.
+        """
+        compiled = self.config_watcher.poll()
+        if compiled is None:
+            return False
+        self._apply_config(compiled)
+        return True
+
+    def _apply_config(self, compiled: CompiledConfig) -> None:
+        self.config = compiled.raw
+        self.learning = compiled.learning
+        for agent in self.agents:
+            agent_config = compiled.agent(agent.id)
+            if agent_config is not None:
+                agent.apply_config(agent_config)
+                agent.adapt_weights(self.learning)
+        self._watch_triggers()
+        roster = {agent.id for agent in self.agents}
+        configured = {agent_config.id for agent_config in compiled.agents}
+        # A shard worker runs a subset, so only agents removed from the file count there
+        if roster - configured or (self.agent_filter is None and configured - roster):
+            print("[AgentManager] Agent roster changed; restart to add or remove agents")
+        if compiled.global_settings != self.global_settings:
+            print("[AgentManager] global_settings changed; restart to apply")
+        print("[AgentManager] Reloaded agent configuration")
     
     def get_market_context(self) -> Dict[str, Any]:
         """
         Gather current market context from various data sources.
         
+        Reads the ingester's latest snapshot. Without the background poller
+        running, sources are polled here at most once per poll interval.
+        
         Returns:
             Dict with market data, news, sentiment, etc.
         """
-        # This would fetch real data from APIs
-        # For now, return mock structure
-        return {
-            "btc_price": 50000,
-            "price_change_24h": 3.5,
-            "volume_spike": 1.2,
-            "sentiment": "bullish",
-            "fear_greed_index": 65,
-            "trending_topics": ["Bitcoin", "ETF", "DeFi"],
-            "latest_news": "Bitcoin breaks $50K resistance",
-            "news_relevance": 8,
-            "meme_opportunity": False,
-            "misinformation_detected": False
-        }
+        with metrics.span("context_fetch"):
+            if not self.market.is_running and self.market.is_stale():
+                self.market.poll_once()
+            return dict(self.market.snapshot())
     
     def run_cycle(self):
         """
         Run one decision-making cycle for all agents.
         """
-        context = self.get_market_context()
+        asyncio.run(self.run_cycle_async())
+
+    async def run_cycle_async(self):
+        """
+        Run one cycle with agents executing concurrently.
+        
+        At most max_concurrent_agents run at once, each one is bounded by
+        agent_timeout_seconds, and a failing agent never affects the others.
+        """
+        await self.run_agents(self.agents, self.get_market_context())
+
+    async def refresh_engagement(self):
+        """
+        Refresh post metrics when due, and reweight strategies every review_interval.
+        """
+        if self.engagement_collector is None or self._refreshing_engagement or not self.engagement_collector.is_due():
+            return
+        # Concurrent batches would otherwise each start a refresh before the first one lands
+        self._refreshing_engagement = True
+        try:
+            await asyncio.to_thread(self.engagement_collector.refresh)
+        finally:
+            self._refreshing_engagement = False
+        adapt = self.learning.get("adapt_strategy", {})
+        now = datetime.now()
+        review = now - self._reviewed_at >= timedelta(hours=float(adapt.get("review_interval", 24)))
+        if review:
+            self._reviewed_at = now
+        for agent in self.agents:
+            if review:
+                agent.adapt_weights(self.learning)
+                # analyze_performance folds the latest aggregates into performance_metrics
+                agent.analyze_performance()
+            # Persisted so a restart resumes the aggregates instead of starting neutral
+            agent.performance_metrics["engagement"] = self.engagement_collector.export(agent.id)
+            self.state_store.save_metrics(agent.id, agent.performance_metrics)
+
+    async def run_agents(self, agents: List[EnhancedAIAgent], context: Dict[str, Any]):
+        """
+        Run the given agents concurrently against one shared context.
         
+        max_concurrent_agents holds across every batch running on the loop.
+        """
+        self.maybe_reload_config()
+        await self.refresh_engagement()
+        loop = asyncio.get_running_loop()
+        if self._agent_loop is not loop:
+            # run_cycle starts a new loop each time; a semaphore can't cross loops
+            self._agent_loop = loop
+            self._agent_semaphore = asyncio.Semaphore(self.max_concurrent_agents)
+        semaphore = self._agent_semaphore
+        
+        async def run_one(agent: EnhancedAIAgent):
+            async with semaphore:
+                try:
+                    await asyncio.wait_for(self._run_agent(agent, context), timeout=self.agent_timeout_seconds)
+                    self._publish_agent_metrics(agent)
+                except asyncio.TimeoutError:
+                    # Blocking calls already handed to a worker thread finish in the background
+                    metrics.inc("agent_timeouts_total", agent=agent.id)
+                    print(f"[{agent.name}] Timed out after {self.agent_timeout_seconds:.0f}s")
+                except Exception as e:
+                    metrics.inc("agent_errors_total", agent=agent.id)
+                    print(f"[{agent.name}] Error during cycle: {e}")
+        
+        with metrics.span("cycle"):
+            await asyncio.gather(*(run_one(agent) for agent in agents))
+            self.account_index.save()
+        metrics.inc("cycles_total")
+        self.prefill_drafts(context)
+
+    def prefill_drafts(self, context: Dict[str, Any]) -> int:
+        """
+        Start background draft generation for agents in cooldown; returns how many were started.
+        
+        Drafts are written against this context, so a trigger that fires when
+        an agent's cooldown ends can be served without waiting on the LLM.
+        Runs on the event loop's spare capacity and never delays a cycle.
+        """
+        loop = asyncio.get_running_loop()
+        if self._prefill_loop is not loop:
+            # run_cycle starts a new loop each time; tasks from an old one are gone
+            self._prefill_loop = loop
+            self._prefill_semaphore = asyncio.Semaphore(self.max_concurrent_agents)
+            self._prefilling.clear()
+        now = datetime.now()
+        started = 0
         for agent in self.agents:
-            # Decide action
+            if agent.id in self._prefilling or not agent.wants_drafts(context, now):
+                continue
+            self._prefilling.add(agent.id)
+            task = asyncio.create_task(self._prefill(agent, context))
+            self._prefill_tasks.add(task)
+            task.add_done_callback(self._prefill_tasks.discard)
+            started += 1
+        return started
+
+    async def _prefill(self, agent: EnhancedAIAgent, context: Dict[str, Any]) -> None:
+        try:
+            async with self._prefill_semaphore:
+                with metrics.span("agent_stage", stage="prefill", agent=agent.id):
+                    await asyncio.wait_for(agent.aprefill_drafts(context), timeout=self.agent_timeout_seconds)
+        except asyncio.TimeoutError:
+            print(f"[{agent.name}] Draft prefill timed out")
+        except Exception as e:
+            print(f"[{agent.name}] Error prefilling drafts: {e}")
+        finally:
+            self._prefilling.discard(agent.id)
+
+    def _publish_agent_metrics(self, agent: EnhancedAIAgent) -> None:
+        self.events.publish(
+            "metric",
+            agent.id,
+            total_posts=agent.performance_metrics.get("total_posts", 0),
+            replies_today=agent.reply_control.replies_today(),
+            rejected_drafts=agent.performance_metrics.get("rejected_drafts", 0),
+        )
+
+    async def _run_agent(self, agent: EnhancedAIAgent, context: Dict[str, Any]):
+        """
+        Run one agent's decide -> generate -> post step.
+        
+        Queued mentions are answered first; discovery only runs when there
+        was no mention to answer.
+        """
+        answered = False
+        if self.mentions and self.mentions.pending(agent.id) and agent.should_reply_now():
+            mention = self.mentions.take(agent.id, self.claims)
+            if mention:
+                answered = await self._answer_mention(agent, mention)
+        
+        # Decide action
+        with metrics.span("agent_stage", stage="decide", agent=agent.id):
             action = agent.decide_action(context)
-            
-            if action == "post" and agent.should_post_now():
-                # Generate and post content
-                content = agent.generate_post_content(context)
-                success = agent.post_tweet(content)
+        self.events.publish("decision", agent.id, action=action)
+        
+        if action == "post" and agent.should_post_now():
+            # Generate and post content
+            with metrics.span("agent_stage", stage="generate_post", agent=agent.id):
+                content = await agent.agenerate_post_content(context)
+            if content:
+                with metrics.span("agent_stage", stage="post", agent=agent.id):
+                    success = await agent.apost_tweet(content)
                 
                 if success:
+                    self.events.publish(
+                        "post", agent.id, name=agent.name, llm=agent.model,
+                        content=content, tweet_id=agent.recent_posts[-1].get("tweet_id"),
+                    )
                     print(f"[{agent.name}] Posted: {content[:50]}...")
-            else:
-                # Try engagement via replies if allowed
-                if agent.should_reply_now():
-                    opportunities = agent.find_reply_opportunities()
-                    if opportunities:
-                        opp = opportunities[0]
-                        reply_text = agent.generate_reply_content(opp["tweet"])
-                        if reply_text:
-                            ok = agent.reply_to_tweet(opp["tweet"], reply_text)
-                            if ok:
-                                print(f"[{agent.name}] Replied to @{opp['target_user'].username}: {reply_text[:50]}...")
-                                continue
-                print(f"[{agent.name}] Waiting for better opportunity...")
+            return
+        
+        if answered:
+            return
+        
+        # Try engagement via replies if allowed
+        if agent.should_reply_now():
+            with metrics.span("agent_stage", stage="discovery", agent=agent.id):
+                opp = await agent.afind_reply_opportunity(self.claims)
+            if opp:
+                target = opp["target_user"]
+                if await self._reply(agent, opp["tweet"], target.user_id, target.username):
+                    return
+        print(f"[{agent.name}] Waiting for better opportunity...")
+
+    async def _answer_mention(self, agent: EnhancedAIAgent, mention: Mention) -> bool:
+        username = mention.author.username if mention.author else mention.tweet.get("author_username", "")
+        ok = await self._reply(agent, mention.tweet, mention.author_id, username)
+        if ok:
+            metrics.inc("mention_replies_total", agent=agent.id)
+        return ok
+
+    async def _reply(
+        self, agent: EnhancedAIAgent, tweet: Dict[str, Any], target_user_id: Optional[str], username: str
+    ) -> bool:
+        """
+        Generate and post a reply to a tweet the agent has claimed; the claim is released if nothing was posted.
+        """
+        ok = False
+        try:
+            with metrics.span("agent_stage", stage="generate_reply", agent=agent.id):
+                reply_text = await agent.agenerate_reply_content(tweet)
+            if reply_text:
+                with metrics.span("agent_stage", stage="reply", agent=agent.id):
+                    ok = await agent.areply_to_tweet(tweet, reply_text, target_user_id)
+        finally:
+            if not ok:
+                # Let another agent take the tweet
+                self.claims.release(str(tweet.get("id", "")), agent.id)
+        if ok:
+            self.events.publish(
+                "reply", agent.id, name=agent.name, llm=agent.model, content=reply_text,
+                tweet_id=agent.recent_replies[-1].get("reply_id"),
+                in_reply_to=username,
+            )
+            print(f"[{agent.name}] Replied to @{username}: {reply_text[:50]}...")
+        return ok
 
 
 # Usage example
 if __name__ == "__main__":
     manager = AgentManager("agent_config.yaml")
     
-    # Run continuous loop
-    import time
-    while True:
-        manager.run_cycle()
-        time.sleep(300)  # Run every 5 minutes
+    # Sleep until the next agent is eligible; market/news events call scheduler.notify
+    scheduler = AgentScheduler.from_config(manager)
+    manager.market.subscribe(scheduler.notify)
+    manager.market.start()
+    # High-reach mentions wake their agent instead of waiting for its next slot
+    if manager.mentions:
+        manager.mentions.subscribe(scheduler.wake)
+        manager.mentions.start()
+    if manager.metrics_exporter:
+        manager.metrics_exporter.start()
+    manager.events.start()
+    asyncio.run(scheduler.run_forever())
 
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import metrics
+
+
+class EventPublisher:
+    """
+    Publishes agent events (post, reply, decision, metric) to the dashboard server.
+
+    publish() only appends to a bounded buffer; a background thread posts
+    batches to the dashboard's ingest endpoint. The agent loop therefore
+    never waits on the network, and when the dashboard is down or slow the
+    oldest events are dropped instead of memory growing. Fan-out to viewers
+    happens in the dashboard server, so viewer count has no cost here.
+    """
+
+    enabled = True
+
+    def __init__(
+        self,
+        url: str = "http://127.0.0.1:3000/api/events",
+        token: Optional[str] = None,
+        max_buffer: int = 5000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        timeout: float = 2.0,
+    ):
+        self.url = url
+        self.token = token
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=max(1, max_buffer))
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def publish(self, kind: str, agent_id: Optional[str] = None, **data: Any) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+            metrics.inc("events_dropped_total")
+        self._buffer.append({"type": kind, "agent": agent_id, "ts": int(time.time() * 1000), "data": data})
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-publisher", daemon=True)
+        self._thread.start()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        return batch
+
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(
+            self.url, data=json.dumps({"events": batch}, default=str).encode("utf-8"), headers=headers, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            # Back off while the dashboard is unreachable; the buffer keeps the newest events
+            self._wakeup.wait(self.flush_interval * min(2 ** failures, 60))
+            self._wakeup.clear()
+            while self._buffer:
+                batch = self._drain()
+                try:
+                    self._send(batch)
+                    failures = 0
+                except Exception:
+                    failures += 1
+                    metrics.inc("events_dropped_total", len(batch))
+                    self.dropped += len(batch)
+                    break
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+
+class NullPublisher:
+    """
+    Used when the event stream is disabled.
+    """
+
+    enabled = False
+
+    def publish(self, kind: str, agent_id: Optional[str] = None, **data: Any) -> None:
+        pass
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+def create_publisher(settings: Dict[str, Any]) -> Any:
+    """
+    Build the publisher selected by the global_settings.event_stream block.
+    """
+    if not settings.get("enabled", False):
+        return NullPublisher()
+    return EventPublisher(
+        url=settings.get("url", "http://127.0.0.1:3000/api/events"),
+        token=os.getenv("DASHBOARD_EVENTS_TOKEN") or None,
+        max_buffer=int(settings.get("max_buffer", 5000)),
+        batch_size=int(settings.get("batch_size", 200)),
+        flush_interval=float(settings.get("flush_interval_seconds", 0.5)),
+    )
@@ -0,0 +1,376 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import metrics
+from async_clients import AsyncLLMClient
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    pass
+
+
+class LLMUnavailable(RuntimeError):
+    """
+    Raised when the primary provider and its backup both have open circuits.
+    """
+
+
+class LatencyTracker:
+    """
+    Latencies of the most recent successful calls to one provider.
+    """
+
+    def __init__(self, window: int = 256):
+        self._samples: Deque[float] = deque(maxlen=max(1, window))
+        self._sorted: Optional[List[float]] = None
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._sorted = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+            ordered = self._sorted
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a provider after consecutive failures.
+
+    After reset_timeout one probe call is let through (half-open); its
+    success closes the circuit and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """
+        Give up an unfinished probe (e.g. cancelled) so the next call can probe instead.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """
+        Count a failure; returns True if this opened the circuit.
+        """
+        with self._lock:
+            self.failures += 1
+            reopen = self._probing
+            self._probing = False
+            if reopen or (self._opened_at is None and self.failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+
+class LLMRouter:
+    """
+    Bounded-latency text generation across LLM providers.
+
+    Every call has a deadline. If the agent's own provider hasn't answered
+    by its recent hedge_percentile latency, the same prompt also goes to the
+    provider's configured backup, and whichever answers first wins. A
+    provider with an open circuit is skipped in favour of its backup.
+    Routing is per provider: llm_clients builds one client per provider,
+    which always calls that provider's configured model, so latency and
+    circuits are tracked per provider too.
+
+    Calls that lose a hedge are not cancelled; they finish (or hit the
+    deadline) in the background so their latency and failures still feed
+    the percentiles and circuit breakers.
+    """
+
+    def __init__(
+        self,
+        clients: Callable[[str], Any],
+        backups: Optional[Dict[str, str]] = None,
+        deadline: float = 30.0,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        hedge_after: float = 8.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        max_workers: int = 32,
+    ):
+        self.clients = clients
+        self.backups = dict(backups or {})
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], clients: Callable[[str], Any]) -> Optional["LLMRouter"]:
+        """
+        Build a router from the global_settings.llm_router block; None when disabled.
+        """
+        if not settings.get("enabled", False):
+            return None
+        backups = {
+            provider: backup if isinstance(backup, str) else backup["provider"]
+            for provider, backup in (settings.get("backups") or {}).items()
+        }
+        return cls(
+            clients,
+            backups=backups,
+            deadline=float(settings.get("deadline_seconds", 30)),
+            hedge_percentile=float(settings.get("hedge_percentile", 95)),
+            hedge_min_samples=int(settings.get("hedge_min_samples", 20)),
+            hedge_after=float(settings.get("hedge_after_seconds", 8)),
+            failure_threshold=int(settings.get("breaker_failures", 5)),
+            reset_timeout=float(settings.get("breaker_reset_seconds", 60)),
+        )
+
+    def client(self, provider: str) -> "RoutedLLMClient":
+        return RoutedLLMClient(self, provider)
+
+    # Routing state
+
+    def tracker(self, provider: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self._latency.get(provider)
+            if tracker is None:
+                tracker = self._latency[provider] = LatencyTracker()
+            return tracker
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                breaker = self._breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def hedge_delay(self, provider: str) -> float:
+        tracker = self.tracker(provider)
+        if len(tracker) < self.hedge_min_samples:
+            return self.hedge_after
+        return tracker.percentile(self.hedge_percentile) or self.hedge_after
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Live p50/p95 and circuit state per provider.
+        """
+        with self._lock:
+            latency = dict(self._latency)
+            breakers = dict(self._breakers)
+        return {
+            provider: {
+                "samples": len(tracker),
+                "p50": tracker.percentile(50),
+                "p95": tracker.percentile(95),
+                "circuit": breakers[provider].state if provider in breakers else "closed",
+            }
+            for provider, tracker in latency.items()
+        }
+
+    def _plan(self, primary: str) -> Tuple[str, Optional[str]]:
+        """
+        (first provider, hedge provider) honouring open circuits.
+        """
+        backup = self.backups.get(primary)
+        if backup == primary:
+            backup = None
+        if self.breaker(primary).allow():
+            return primary, backup
+        metrics.inc("llm_fallbacks_total", provider=primary)
+        if backup is not None and self.breaker(backup).allow():
+            return backup, None
+        raise LLMUnavailable(f"{primary} circuit is open and no backup is available")
+
+    def _record(self, provider: str, started: float, error: Optional[BaseException]) -> None:
+        if error is None:
+            elapsed = time.monotonic() - started
+            self.tracker(provider).add(elapsed)
+            self.breaker(provider).record_success()
+            metrics.observe("llm_attempt_seconds", elapsed, provider=provider)
+            return
+        metrics.inc("llm_attempt_errors_total", provider=provider)
+        if self.breaker(provider).record_failure():
+            metrics.inc("llm_breaker_open_total", provider=provider)
+            print(f"[LLMRouter] Circuit open for {provider}: {error!r}")
+
+    # Blocking path
+
+    def _attempt(self, provider: str, system_prompt: str, user_prompt: str) -> str:
+        started = time.monotonic()
+        try:
+            text = self.clients(provider).generate_text(system_prompt=system_prompt, user_prompt=user_prompt)
+        except Exception as e:
+            self._record(provider, started, e)
+            raise
+        # A call that finishes after the deadline still counts as a failure for the breaker
+        if time.monotonic() - started > self.deadline:
+            self._record(provider, started, LLMDeadlineExceeded(f"{provider} exceeded {self.deadline:g}s"))
+        else:
+            self._record(provider, started, None)
+        return text
+
+    def generate_text(self, primary: str, system_prompt: str, user_prompt: str) -> str:
+        first, hedge = self._plan(primary)
+        deadline = time.monotonic() + self.deadline
+        pending = {self._executor.submit(self._attempt, first, system_prompt, user_prompt): first}
+        hedge_at = time.monotonic() + self.hedge_delay(first)
+        error: Optional[BaseException] = None
+        while pending:
+            now = time.monotonic()
+            wait_until = min(deadline, hedge_at) if hedge is not None else deadline
+            done, _ = concurrent.futures.wait(
+                pending, timeout=max(0.0, wait_until - now), return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if provider != first:
+                    metrics.inc("llm_hedge_wins_total", provider=primary)
+                return text
+            if hedge is not None and (not pending or time.monotonic() >= hedge_at):
+                if self.breaker(hedge).allow():
+                    metrics.inc("llm_hedges_total", provider=primary)
+                    pending[self._executor.submit(self._attempt, hedge, system_prompt, user_prompt)] = hedge
+                hedge = None
+                continue
+            if time.monotonic() >= deadline:
+                break
+        return self._fail(primary, error, bool(pending))
+
+    # Async path
+
+    async def _aattempt(self, provider: str, system_prompt: str, user_prompt: str) -> str:
+        started = time.monotonic()
+        client = AsyncLLMClient(self.clients(provider))
+        try:
+            text = await asyncio.wait_for(
+                client.generate_text(system_prompt=system_prompt, user_prompt=user_prompt), timeout=self.deadline
+            )
+        except asyncio.CancelledError:
+            # No outcome to record, but a cancelled half-open probe must not block the provider for good
+            self.breaker(provider).release_probe()
+            raise
+        except asyncio.TimeoutError:
+            error = LLMDeadlineExceeded(f"{provider} exceeded {self.deadline:g}s")
+            self._record(provider, started, error)
+            raise error
+        except Exception as e:
+            self._record(provider, started, e)
+            raise
+        self._record(provider, started, None)
+        return text
+
+    def _spawn(self, provider: str, system_prompt: str, user_prompt: str) -> asyncio.Task:
+        task = asyncio.ensure_future(self._aattempt(provider, system_prompt, user_prompt))
+        # Losing attempts are never awaited; retrieve their outcome so errors aren't reported as unhandled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def agenerate_text(self, primary: str, system_prompt: str, user_prompt: str) -> str:
+        first, hedge = self._plan(primary)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        pending = {self._spawn(first, system_prompt, user_prompt): first}
+        hedge_at = loop.time() + self.hedge_delay(first)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                wait_until = min(deadline, hedge_at) if hedge is not None else deadline
+                done, _ = await asyncio.wait(
+                    pending, timeout=max(0.0, wait_until - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if provider != first:
+                        metrics.inc("llm_hedge_wins_total", provider=primary)
+                    return task.result()
+                if hedge is not None and (not pending or loop.time() >= hedge_at):
+                    if self.breaker(hedge).allow():
+                        metrics.inc("llm_hedges_total", provider=primary)
+                        pending[self._spawn(hedge, system_prompt, user_prompt)] = hedge
+                    hedge = None
+                    continue
+                if loop.time() >= deadline:
+                    break
+        except asyncio.CancelledError:
+            # The caller gave up (e.g. agent timeout); don't leave attempts running for nobody
+            for task in pending:
+                task.cancel()
+            raise
+        return self._fail(primary, error, bool(pending))
+
+    def _fail(self, primary: str, error: Optional[BaseException], timed_out: bool) -> str:
+        if timed_out or error is None or isinstance(error, LLMDeadlineExceeded):
+            metrics.inc("llm_deadline_exceeded_total", provider=primary)
+            raise LLMDeadlineExceeded(f"No completion for {primary} within {self.deadline:g}s")
+        raise error
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RoutedLLMClient:
+    """
+    llm_clients-compatible client bound to one agent's provider.
+    """
+
+    def __init__(self, router: LLMRouter, provider: str):
+        self.router = router
+        self.provider = provider
+
+    def generate_text(self, system_prompt: str, user_prompt: str) -> str:
+        return self.router.generate_text(self.provider, system_prompt, user_prompt)
+
+    async def agenerate_text(self, system_prompt: str, user_prompt: str) -> str:
+        return await self.router.agenerate_text(self.provider, system_prompt, user_prompt)
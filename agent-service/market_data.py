@@ -0,0 +1,403 @@
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from triggers import ResolvedRule, fires
+
+# Neutral values used until a source has reported
+DEFAULT_CONTEXT: Dict[str, Any] = {
+    "btc_price": None,
+    "price_change": 0.0,
+    "price_change_pct": 0.0,
+    "price_change_24h": None,
+    "volume_spike": 1.0,
+    "sentiment": "neutral",
+    "fear_greed_index": 50,
+    "trending_topics": [],
+    "latest_news": "No major news",
+    "news_relevance": 0,
+    "meme_opportunity": False,
+    "misinformation_detected": False,
+}
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer with a running sum, so push and mean are O(1).
+    """
+
+    def __init__(self, size: int):
+        self.values: Deque[float] = deque(maxlen=max(2, size))
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float) -> None:
+        if len(self.values) == self.values.maxlen:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    @property
+    def oldest(self) -> Optional[float]:
+        return self.values[0] if self.values else None
+
+    @property
+    def latest(self) -> Optional[float]:
+        return self.values[-1] if self.values else None
+
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else 0.0
+
+
+def _get_json(url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10.0) -> Any:
+    if params:
+        url = f"{url}?{urllib.parse.urlencode(params)}"
+    request = urllib.request.Request(url, headers={"User-Agent": "kol-arena-agent-service"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+class SourceAdapter(ABC):
+    """
+    A market data source. poll() returns events of the form
+    {"type": "tick" | "news" | "fear_greed" | "flag", ...}.
+    """
+
+    name = "source"
+
+    @abstractmethod
+    def poll(self) -> List[Dict[str, Any]]:
+        ...
+
+
+class CoinGeckoAdapter(SourceAdapter):
+    name = "coingecko"
+
+    def __init__(self, coin_id: str = "bitcoin", api_key: Optional[str] = None):
+        self.coin_id = coin_id
+        self.api_key = api_key
+
+    def poll(self) -> List[Dict[str, Any]]:
+        params = {
+            "ids": self.coin_id,
+            "vs_currencies": "usd",
+            "include_24hr_change": "true",
+            "include_24hr_vol": "true",
+        }
+        if self.api_key:
+            params["x_cg_demo_api_key"] = self.api_key
+        data = _get_json("https://api.coingecko.com/api/v3/simple/price", params).get(self.coin_id, {})
+        if "usd" not in data:
+            return []
+        return [{
+            "type": "tick",
+            "price": float(data["usd"]),
+            "change_24h": data.get("usd_24h_change"),
+        }]
+
+
+class BinanceAdapter(SourceAdapter):
+    """
+    Latest closed 1-minute kline; its volume feeds the volume-spike signal.
+    """
+
+    name = "binance_api"
+
+    def __init__(self, symbol: str = "BTCUSDT"):
+        self.symbol = symbol
+        self._last_open_time: Optional[int] = None
+
+    def poll(self) -> List[Dict[str, Any]]:
+        klines = _get_json(
+            "https://api.binance.com/api/v3/klines",
+            {"symbol": self.symbol, "interval": "1m", "limit": 2},
+        )
+        if len(klines) < 2:
+            return []
+        closed = klines[-2]
+        if closed[0] == self._last_open_time:
+            return []
+        self._last_open_time = closed[0]
+        return [{"type": "tick", "price": float(closed[4]), "volume": float(closed[5])}]
+
+
+class CryptoPanicAdapter(SourceAdapter):
+    name = "cryptopanic"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._seen: Deque[int] = deque(maxlen=500)
+
+    def poll(self) -> List[Dict[str, Any]]:
+        if not self.api_key:
+            return []
+        data = _get_json(
+            "https://cryptopanic.com/api/v1/posts/",
+            {"auth_token": self.api_key, "kind": "news", "public": "true"},
+        )
+        events = []
+        for post in data.get("results", []):
+            if post.get("id") in self._seen:
+                continue
+            self._seen.append(post.get("id"))
+            votes = post.get("votes", {})
+            # Crowd votes mapped onto the 0-10 scale used by news_relevance_score
+            signal = votes.get("important", 0) * 2 + votes.get("positive", 0) + votes.get("negative", 0)
+            events.append({
+                "type": "news",
+                "title": post.get("title", ""),
+                "relevance": min(10, 5 + signal),
+                "topics": [c.get("code") for c in post.get("currencies", []) if c.get("code")],
+            })
+        return events
+
+
+class FearGreedAdapter(SourceAdapter):
+    name = "fear_greed_index"
+
+    def poll(self) -> List[Dict[str, Any]]:
+        data = _get_json("https://api.alternative.me/fng/", {"limit": 1}).get("data", [])
+        if not data:
+            return []
+        return [{"type": "fear_greed", "value": int(data[0]["value"])}]
+
+
+class ReplayAdapter(SourceAdapter):
+    """
+    Replays recorded events from a JSONL file for offline runs and tests.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, events_per_poll: int = 1, loop: bool = False):
+        self.path = path
+        self.events_per_poll = max(1, events_per_poll)
+        self.loop = loop
+        self._events = self._read()
+
+    def _read(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def poll(self) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        while len(events) < self.events_per_poll:
+            try:
+                events.append(next(self._events))
+            except StopIteration:
+                if not self.loop:
+                    break
+                self._events = self._read()
+        return events
+
+
+class MarketIngester:
+    """
+    Folds events from every source into rolling price/volume windows and
+    publishes one immutable snapshot shared by all agents.
+
+    Each tick updates the windows in O(1). Readers just take the latest
+    snapshot reference, so reading context never triggers a fetch.
+    """
+
+    def __init__(
+        self,
+        adapters: List[SourceAdapter],
+        window_ticks: int = 60,
+        news_ttl: timedelta = timedelta(hours=1),
+        poll_interval: float = 60.0,
+    ):
+        self.adapters = adapters
+        self.prices = RollingWindow(window_ticks)
+        self.volumes = RollingWindow(window_ticks)
+        self.news_ttl = news_ttl
+        self.poll_interval = poll_interval
+        self._news: Deque[Dict[str, Any]] = deque(maxlen=200)
+        self._state: Dict[str, Any] = dict(DEFAULT_CONTEXT)
+        self._snapshot: Mapping[str, Any] = MappingProxyType(dict(self._state))
+        self._updated_at: Optional[float] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._rules: List[ResolvedRule] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, data_sources: Dict[str, List[str]], settings: Dict[str, Any]) -> "MarketIngester":
+        """
+        Build adapters for the data_sources this service can read; others are ignored.
+        """
+        replay_path = settings.get("replay_path")
+        if replay_path:
+            adapters: List[SourceAdapter] = [
+                ReplayAdapter(replay_path, int(settings.get("replay_events_per_poll", 1)))
+            ]
+        else:
+            factories: Dict[str, Callable[[], SourceAdapter]] = {
+                "coingecko": lambda: CoinGeckoAdapter(api_key=os.getenv("COINGECKO_API_KEY") or None),
+                "binance_api": lambda: BinanceAdapter(settings.get("binance_symbol", "BTCUSDT")),
+                "cryptopanic": lambda: CryptoPanicAdapter(os.getenv("CRYPTO_PANIC_API_KEY") or None),
+                "fear_greed_index": FearGreedAdapter,
+            }
+            names = [name for group in (data_sources or {}).values() for name in group]
+            adapters = [factories[name]() for name in names if name in factories]
+        return cls(
+            adapters,
+            window_ticks=int(settings.get("window_ticks", 60)),
+            news_ttl=timedelta(minutes=float(settings.get("news_ttl_minutes", 60))),
+            poll_interval=float(settings.get("poll_seconds", 60)),
+        )
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Register a callback for material events: trigger crossings and relevant news.
+
+        Each update notifies at most once, with the fields that crossed and,
+        when a new item clears a watched news_relevance threshold, the top
+        live headline and its relevance.
+        """
+        self._listeners.append(listener)
+
+    def watch(self, rules: Iterable[ResolvedRule]) -> None:
+        """
+        Notify subscribers when an update makes any of these trigger rules start firing.
+
+        Notifications are edge-triggered: a price change that stays above its
+        threshold is reported once, when it crosses.
+        """
+        with self._lock:
+            self._rules = list(dict.fromkeys(rules))
+
+    def snapshot(self) -> Mapping[str, Any]:
+        return self._snapshot
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def is_stale(self) -> bool:
+        return self._updated_at is None or time.monotonic() - self._updated_at >= self.poll_interval
+
+    def poll_once(self) -> Mapping[str, Any]:
+        events: List[Dict[str, Any]] = []
+        for adapter in self.adapters:
+            try:
+                events.extend(adapter.poll())
+            except Exception as e:
+                print(f"[MarketIngester] Error polling {adapter.name}: {e}")
+        return self.ingest(events)
+
+    def ingest(self, events: List[Dict[str, Any]]) -> Mapping[str, Any]:
+        """
+        Fold events into the rolling state and publish a new snapshot.
+        """
+        with self._lock:
+            before = dict(self._state)
+            for event in events:
+                self._apply(event)
+            self._refresh_news()
+            notification = self._crossed(before, self._state) or {}
+            # A relevant headline wakes agents even while an earlier one keeps news_relevance above threshold
+            news_rules = [rule for rule in self._rules if rule[0] == "news_relevance"]
+            fresh = [float(event.get("relevance", 0)) for event in events if event.get("type") == "news"]
+            if fresh and fires(news_rules, {"news_relevance": max(fresh)}):
+                notification["latest_news"] = self._state["latest_news"]
+                notification["news_relevance"] = self._state["news_relevance"]
+            self._snapshot = MappingProxyType(dict(self._state))
+            self._updated_at = time.monotonic()
+            snapshot = self._snapshot
+        if notification:
+            for listener in self._listeners:
+                listener(notification)
+        return snapshot
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        kind = event.get("type")
+        state = self._state
+        if kind == "tick":
+            if event.get("price") is not None:
+                self.prices.push(float(event["price"]))
+                state["btc_price"] = self.prices.latest
+                oldest = self.prices.oldest
+                change = (self.prices.latest - oldest) / oldest * 100 if oldest else 0.0
+                state["price_change_pct"] = round(change, 3)
+                state["price_change"] = round(abs(change), 3)
+            if event.get("change_24h") is not None:
+                state["price_change_24h"] = round(float(event["change_24h"]), 2)
+            if event.get("volume") is not None:
+                volume = float(event["volume"])
+                baseline = self.volumes.mean()
+                state["volume_spike"] = round(volume / baseline, 3) if baseline > 0 else 1.0
+                self.volumes.push(volume)
+        elif kind == "fear_greed":
+            value = int(event["value"])
+            state["fear_greed_index"] = value
+            state["sentiment"] = "bullish" if value > 55 else "bearish" if value < 45 else "neutral"
+        elif kind == "news":
+            item = {
+                "title": event.get("title", ""),
+                "relevance": float(event.get("relevance", 0)),
+                "topics": list(event.get("topics", [])),
+                "at": datetime.now(),
+            }
+            self._news.append(item)
+        elif kind == "flag":
+            for key in ("meme_opportunity", "misinformation_detected"):
+                if key in event:
+                    state[key] = bool(event[key])
+
+    def _crossed(self, before: Mapping[str, Any], after: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Fields of the watched rules that fire now but didn't before this update.
+        """
+        crossed = {
+            field: after.get(field)
+            for field, op, threshold in self._rules
+            if fires([(field, op, threshold)], after) and not fires([(field, op, threshold)], before)
+        }
+        return crossed or None
+
+    def _refresh_news(self) -> None:
+        cutoff = datetime.now() - self.news_ttl
+        while self._news and self._news[0]["at"] < cutoff:
+            self._news.popleft()
+        if not self._news:
+            self._state["latest_news"] = DEFAULT_CONTEXT["latest_news"]
+            self._state["news_relevance"] = 0
+            self._state["trending_topics"] = []
+            return
+        top = max(self._news, key=lambda n: n["relevance"])
+        self._state["latest_news"] = top["title"]
+        self._state["news_relevance"] = top["relevance"]
+        counts = Counter(topic for n in self._news for topic in n["topics"])
+        self._state["trending_topics"] = [topic for topic, _ in counts.most_common(3)]
+
+    def start(self) -> None:
+        """
+        Poll every adapter on a background thread.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="market-ingester", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.poll_interval)
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,338 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import metrics
+from rate_limiter import PRIORITY_READ, RateLimitedXClient
+
+# Assumes the XClient has get_mentions(since_id=..., max_results=...) returning
+# the authenticated account's mentions, newest first
+
+if TYPE_CHECKING:
+    from enhanced_agent import EnhancedAIAgent
+    from rate_control import ClaimRegistry
+    from x_discovery import AccountCandidate
+
+
+def _tweet_age(tweet: Dict[str, Any], now: datetime) -> Optional[timedelta]:
+    ts = tweet.get("created_at")
+    if not ts:
+        return None
+    try:
+        created = ts if isinstance(ts, datetime) else datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return now - created
+
+
+@dataclass(order=True)
+class Mention:
+    """
+    A tweet mentioning one agent, ordered best first: highest reach, then newest.
+    """
+
+    sort_key: Tuple[int, int] = field(init=False, repr=False)
+    reach: int = field(compare=False)
+    tweet: Dict[str, Any] = field(compare=False)
+    author: Optional["AccountCandidate"] = field(compare=False, default=None)
+    received_at: float = field(compare=False, default=0.0)
+
+    def __post_init__(self):
+        tweet_id = str(self.tweet.get("id", ""))
+        self.sort_key = (-self.reach, -int(tweet_id) if tweet_id.isdigit() else 0)
+
+    @property
+    def tweet_id(self) -> str:
+        return str(self.tweet.get("id", ""))
+
+    @property
+    def author_id(self) -> Optional[str]:
+        return self.tweet.get("author_id") or (self.author.user_id if self.author else None)
+
+
+@dataclass(eq=False)
+class _Timeline:
+    agent: "EnhancedAIAgent"
+    since_id: Optional[str] = None
+    interval: float = 0.0
+    queue: List[Mention] = field(default_factory=list)
+
+
+class MentionsPoller:
+    """
+    Incremental mentions polling for every agent on one schedule.
+
+    A single background thread owns a heap of (next poll, agent) entries, so
+    N agents cost one thread and their polls are spread out instead of
+    bursting. Each poll passes the agent's since_id cursor and only returns
+    new mentions. A timeline that keeps coming back empty backs off from
+    poll_interval to max_poll_interval and snaps back on the next mention.
+
+    Authors of the mentions fetched in one round are resolved through the
+    shared account index, uncached ones with the mentioned agent's own
+    credential at read priority, and each mention is queued for its agent
+    ranked by the author's follower count. Mentions from accounts of
+    at least priority_followers wake the agent through the subscribed
+    listeners. A tweet seen again (cursor overlap, restarts) is dropped; a
+    tweet mentioning several agents is queued for each of them and the
+    claim registry lets only one reply.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 15.0,
+        max_poll_interval: float = 120.0,
+        priority_followers: int = 10000,
+        max_age: timedelta = timedelta(hours=1),
+        queue_size: int = 20,
+        engage_with_other_agents: bool = True,
+        max_results: int = 100,
+        seen_size: int = 10000,
+    ):
+        self.poll_interval = max(1.0, poll_interval)
+        self.max_poll_interval = max(self.poll_interval, max_poll_interval)
+        self.priority_followers = priority_followers
+        self.max_age = max_age
+        self.queue_size = max(1, queue_size)
+        self.engage_with_other_agents = engage_with_other_agents
+        self.max_results = max_results
+        self.seen_size = max(1, seen_size)
+        self._timelines: Dict[str, _Timeline] = {}
+        self._agent_usernames: Dict[str, str] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        self._seen: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, engagement: Dict[str, Any]) -> Optional["MentionsPoller"]:
+        """
+        Build a poller from the global_settings.engagement block; None unless reply_to_mentions is set.
+        """
+        if not engagement.get("reply_to_mentions", False):
+            return None
+        settings = engagement.get("mentions", {})
+        return cls(
+            poll_interval=float(settings.get("poll_seconds", 15)),
+            max_poll_interval=float(settings.get("max_poll_seconds", 120)),
+            priority_followers=int(settings.get("priority_followers", 10000)),
+            max_age=timedelta(minutes=float(settings.get("max_age_minutes", 60))),
+            queue_size=int(settings.get("queue_size", 20)),
+            engage_with_other_agents=bool(engagement.get("engage_with_other_agents", True)),
+        )
+
+    def track(self, agent: "EnhancedAIAgent") -> None:
+        """
+        Start polling an agent's mentions; its first poll lands at a random point in the next interval.
+        """
+        with self._lock:
+            if agent.id in self._timelines:
+                return
+            self._timelines[agent.id] = _Timeline(agent, interval=self.poll_interval)
+            if agent.x_username:
+                self._agent_usernames[agent.x_username.lower()] = agent.id
+            due = time.monotonic() + random.uniform(0, self.poll_interval)
+            heapq.heappush(self._schedule, (due, next(self._counter), agent.id))
+        self._wakeup.set()
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        """
+        Register a callback taking an agent id, called when a high-reach mention is queued for it.
+        """
+        self._listeners.append(listener)
+
+    def pending(self, agent_id: str) -> int:
+        with self._lock:
+            timeline = self._timelines.get(agent_id)
+            return len(timeline.queue) if timeline else 0
+
+    def take(self, agent_id: str, claims: Optional["ClaimRegistry"] = None) -> Optional[Mention]:
+        """
+        Pop the agent's best mention it may still answer, claiming the tweet when a registry is given.
+
+        Expired mentions, tweets the agent already answered (the cursor
+        restarts empty), authors in reply cooldown and tweets another agent
+        claimed are discarded on the way.
+        """
+        with self._lock:
+            timeline = self._timelines.get(agent_id)
+        if timeline is None:
+            return None
+        agent = timeline.agent
+        horizon = time.monotonic() - self.max_age.total_seconds()
+        while True:
+            with self._lock:
+                if not timeline.queue:
+                    return None
+                mention = heapq.heappop(timeline.queue)
+            if mention.received_at < horizon:
+                metrics.inc("mentions_expired_total", agent=agent_id)
+                continue
+            if agent.has_replied_to(mention.tweet_id):
+                continue
+            author_id = mention.author_id
+            if author_id and not agent.reply_control.can_reply_to(author_id):
+                continue
+            if claims is not None and not claims.claim(mention.tweet_id, agent_id):
+                continue
+            return mention
+
+    def poll_due(self, now: Optional[float] = None) -> int:
+        """
+        Poll every timeline that is due and queue what it returned; returns how many mentions were queued.
+        """
+        now = time.monotonic() if now is None else now
+        due: List[_Timeline] = []
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= now:
+                _, _, agent_id = heapq.heappop(self._schedule)
+                due.append(self._timelines[agent_id])
+
+        fetched: List[Tuple[_Timeline, Dict[str, Any]]] = []
+        for timeline in due:
+            tweets = self._fetch(timeline)
+            fetched.extend((timeline, tweet) for tweet in tweets)
+            # Busy timelines are polled at the base rate, quiet ones back off
+            timeline.interval = (
+                self.poll_interval if tweets else min(timeline.interval * 2, self.max_poll_interval)
+            )
+            with self._lock:
+                heapq.heappush(self._schedule, (now + timeline.interval, next(self._counter), timeline.agent.id))
+
+        return self._enqueue(fetched) if fetched else 0
+
+    def _fetch(self, timeline: _Timeline) -> List[Dict[str, Any]]:
+        """
+        New mentions since the timeline's cursor, skipping tweets already seen; advances the cursor.
+        """
+        agent = timeline.agent
+        try:
+            if timeline.since_id:
+                tweets = agent.x_client.get_mentions(since_id=timeline.since_id, max_results=self.max_results)
+            else:
+                tweets = agent.x_client.get_mentions(max_results=self.max_results)
+        except Exception as e:
+            print(f"[MentionsPoller] Error polling mentions for {agent.id}: {e}")
+            return []
+        metrics.inc("mention_polls_total", agent=agent.id)
+
+        fresh: List[Dict[str, Any]] = []
+        wall_now = datetime.now(timezone.utc)
+        with self._lock:
+            for tweet in tweets or []:
+                tweet_id = str(tweet.get("id", ""))
+                if not tweet_id:
+                    continue
+                if tweet_id.isdigit() and (not timeline.since_id or int(tweet_id) > int(timeline.since_id)):
+                    timeline.since_id = tweet_id
+                key = (agent.id, tweet_id)
+                if key in self._seen:
+                    continue
+                self._seen[key] = None
+                if len(self._seen) > self.seen_size:
+                    self._seen.popitem(last=False)
+                age = _tweet_age(tweet, wall_now)
+                if age is not None and age > self.max_age:
+                    continue
+                fresh.append(tweet)
+        return fresh
+
+    def _resolve_authors(self, fetched: List[Tuple[_Timeline, Dict[str, Any]]]) -> Dict[str, "AccountCandidate"]:
+        """
+        Profiles of the round's mention authors, looked up in bulk per mentioned agent.
+
+        Each agent's authors are resolved with its own credential at read
+        priority, so replies to mentions don't wait behind discovery's
+        budget; authors cached by an earlier lookup are not fetched again.
+        """
+        by_agent: Dict[str, Tuple["EnhancedAIAgent", List[str]]] = {}
+        for timeline, tweet in fetched:
+            if tweet.get("author_id"):
+                agent = timeline.agent
+                by_agent.setdefault(agent.id, (agent, []))[1].append(str(tweet["author_id"]))
+
+        profiles: Dict[str, "AccountCandidate"] = {}
+        for agent, author_ids in by_agent.values():
+            missing = [author_id for author_id in dict.fromkeys(author_ids) if author_id not in profiles]
+            if not missing:
+                continue
+            x_client = agent.x_client
+            if isinstance(x_client, RateLimitedXClient):
+                x_client = x_client.at_priority(PRIORITY_READ)
+            try:
+                profiles.update(agent.discovery.resolve_profiles(missing, x_client))
+            except Exception as e:
+                print(f"[MentionsPoller] Error resolving mention authors for {agent.id}: {e}")
+        return profiles
+
+    def _enqueue(self, fetched: List[Tuple[_Timeline, Dict[str, Any]]]) -> int:
+        profiles = self._resolve_authors(fetched)
+
+        received_at = time.monotonic()
+        woken: List[str] = []
+        queued = 0
+        for timeline, tweet in fetched:
+            agent_id = timeline.agent.id
+            author = profiles.get(str(tweet.get("author_id", "")))
+            username = (author.username if author else tweet.get("author_username") or "").lower()
+            author_agent = self._agent_usernames.get(username) if username else None
+            if author_agent == agent_id or (author_agent and not self.engage_with_other_agents):
+                continue
+            reach = author.followers if author else int(
+                (tweet.get("author") or {}).get("public_metrics", {}).get("followers_count", 0)
+            )
+            mention = Mention(reach, tweet, author, received_at)
+            with self._lock:
+                heapq.heappush(timeline.queue, mention)
+                if len(timeline.queue) > self.queue_size:
+                    timeline.queue.remove(max(timeline.queue))
+                    heapq.heapify(timeline.queue)
+            metrics.inc("mentions_received_total", agent=agent_id)
+            queued += 1
+            if reach >= self.priority_followers and agent_id not in woken:
+                woken.append(agent_id)
+        for agent_id in woken:
+            for listener in self._listeners:
+                listener(agent_id)
+        return queued
+
+    def _seconds_until_next(self) -> float:
+        with self._lock:
+            if not self._schedule:
+                return self.max_poll_interval
+            return max(0.0, self._schedule[0][0] - time.monotonic())
+
+    def start(self) -> None:
+        """
+        Poll on a background thread.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mentions-poller", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_due()
+            except Exception as e:
+                print(f"[MentionsPoller] Error during poll: {e}")
+            self._wakeup.wait(self._seconds_until_next())
+            self._wakeup.clear()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
@@ -0,0 +1,354 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bounds in seconds; covers fast cache hits up to slow LLM completions
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_NULL_SPAN = nullcontext()
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Bucket upper bound containing the q-th observation; an estimate, like Prometheus.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _Span:
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: LabelKey):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.registry._observe(f"{self.name}_seconds", self.labels, time.perf_counter() - self.started)
+        if exc_type is not None and exc_type is not asyncio.CancelledError:
+            self.registry._inc(f"{self.name}_errors_total", self.labels, 1.0)
+
+
+class MetricsRegistry:
+    """
+    Counters and latency histograms keyed by name and label set.
+
+    span() times a block into <name>_seconds and counts exceptions raised
+    inside it as <name>_errors_total.
+    """
+
+    enabled = True
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **labels: Any) -> _Span:
+        return _Span(self, name, _labels(labels))
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        self._inc(name, _labels(labels), value)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        self._observe(name, _labels(labels), value)
+
+    def _inc(self, name: str, labels: LabelKey, value: float) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+
+    def _observe(self, name: str, labels: LabelKey, value: float) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def drain(self) -> Dict[str, Any]:
+        """
+        Take everything recorded so far and reset, for merge() into another process's registry.
+        """
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            histograms, self._histograms = self._histograms, {}
+        return {"counters": counters, "histograms": histograms}
+
+    def merge(self, recorded: Dict[str, Any]) -> None:
+        """
+        Add counters and histogram buckets taken by drain() elsewhere to this registry.
+        """
+        with self._lock:
+            for name, series in recorded["counters"].items():
+                target = self._counters.setdefault(name, {})
+                for labels, value in series.items():
+                    target[labels] = target.get(labels, 0.0) + value
+            for name, series in recorded["histograms"].items():
+                target = self._histograms.setdefault(name, {})
+                for labels, other in series.items():
+                    histogram = target.get(labels)
+                    if histogram is None:
+                        histogram = target[labels] = Histogram(self.buckets)
+                    histogram.counts = [a + b for a, b in zip(histogram.counts, other.counts)]
+                    histogram.total += other.total
+                    histogram.count += other.count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        JSON-serializable view with count, sum and p50/p95 per histogram series.
+        """
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(labels), "value": value} for labels, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "count": h.count,
+                        "sum": round(h.total, 6),
+                        "p50": h.quantile(0.5),
+                        "p95": h.quantile(0.95),
+                    }
+                    for labels, h in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"timestamp": time.time(), "counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        def fmt(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            body = ",".join(
+                '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for k, v in pairs
+            )
+            return "{" + body + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{fmt(labels)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in series.items():
+                    cumulative = 0
+                    for bound, n in zip(h.buckets, h.counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{fmt(labels, (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{fmt(labels, (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{name}_sum{fmt(labels)} {h.total}")
+                    lines.append(f"{name}_count{fmt(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+class NullMetrics:
+    """
+    Disabled registry: every call is a no-op, and span() returns one shared null context.
+    """
+
+    enabled = False
+
+    def span(self, name: str, **labels: Any) -> Any:
+        return _NULL_SPAN
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        pass
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        pass
+
+    def drain(self) -> Dict[str, Any]:
+        return {"counters": {}, "histograms": {}}
+
+    def merge(self, recorded: Dict[str, Any]) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"timestamp": time.time(), "counters": {}, "histograms": {}}
+
+    def render_prometheus(self) -> str:
+        return ""
+
+
+_registry: Any = NullMetrics()
+
+# Bound straight to the active registry so a disabled call is a single no-op method call
+span = _registry.span
+inc = _registry.inc
+observe = _registry.observe
+
+
+def get_registry() -> Any:
+    return _registry
+
+
+def _install(registry: Any) -> None:
+    global _registry, span, inc, observe
+    _registry = registry
+    span, inc, observe = registry.span, registry.inc, registry.observe
+
+
+class MetricsExporter:
+    """
+    Serves /metrics in Prometheus text format and periodically writes a JSON snapshot.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str = "127.0.0.1",
+        port: Optional[int] = 9108,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: float = 60.0,
+    ):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self.port is not None and self._server is None:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self) -> None:
+                    if self.path.split("?")[0] == "/metrics":
+                        body = registry.render_prometheus().encode("utf-8")
+                        content_type = "text/plain; version=0.0.4; charset=utf-8"
+                    elif self.path.split("?")[0] == "/metrics.json":
+                        body = json.dumps(registry.snapshot()).encode("utf-8")
+                        content_type = "application/json"
+                    else:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format: str, *args: Any) -> None:
+                    pass
+
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        if self.snapshot_path:
+            threading.Thread(target=self._write_snapshots, name="metrics-snapshot", daemon=True).start()
+
+    def write_snapshot(self) -> None:
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _write_snapshots(self) -> None:
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                print(f"[Metrics] Error writing snapshot: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+def configure(settings: Dict[str, Any]) -> Optional[MetricsExporter]:
+    """
+    Install the process-wide registry from global_settings.metrics.
+
+    When disabled (the default) the no-op registry stays in place and no
+    exporter is created.
+    """
+    if not settings.get("enabled", False):
+        _install(NullMetrics())
+        return None
+    registry = MetricsRegistry()
+    _install(registry)
+    port = settings.get("port", 9108)
+    return MetricsExporter(
+        registry,
+        host=settings.get("host", "127.0.0.1"),
+        port=int(port) if port is not None else None,
+        snapshot_path=settings.get("snapshot_path"),
+        snapshot_interval=float(settings.get("snapshot_seconds", 60)),
+    )
+
+
+class InstrumentedLLMClient:
+    """
+    llm_clients wrapper that times generate_text by provider and model.
+    """
+
+    def __init__(self, client: Any, provider: str, model: str):
+        self.client = client
+        self.provider = provider
+        self.model = model
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def generate_text(self, system_prompt: str, user_prompt: str) -> str:
+        with span("llm_generate", provider=self.provider, model=self.model):
+            return self.client.generate_text(system_prompt=system_prompt, user_prompt=user_prompt)
+
+    async def agenerate_text(self, system_prompt: str, user_prompt: str) -> str:
+        native = getattr(self.client, "agenerate_text", None)
+        if native is None or not asyncio.iscoroutinefunction(native):
+            return await asyncio.to_thread(self.generate_text, system_prompt, user_prompt)
+        with span("llm_generate", provider=self.provider, model=self.model):
+            return await native(system_prompt=system_prompt, user_prompt=user_prompt)
@@ -0,0 +1,199 @@
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class WindowCap:
+    """
+    At most `limit` events per trailing window.
+
+    Only the newest `limit` timestamps are kept, so the check is O(1): the
+    cap is reached exactly when the oldest retained event is still inside
+    the window.
+    """
+
+    __slots__ = ("limit", "window", "events")
+
+    def __init__(self, limit: int, window: timedelta):
+        self.limit = max(0, limit)
+        self.window = window
+        self.events: Deque[datetime] = deque(maxlen=self.limit or 1)
+
+    def allows(self, now: datetime) -> bool:
+        if self.limit == 0:
+            return False
+        return len(self.events) < self.limit or now - self.events[0] >= self.window
+
+    def record(self, when: datetime) -> None:
+        self.events.append(when)
+
+    def resize(self, limit: int) -> None:
+        """
+        Change the cap in place, keeping the newest events that still fit.
+        """
+        self.limit = max(0, limit)
+        self.events = deque(self.events, maxlen=self.limit or 1)
+
+    def count(self, now: datetime) -> int:
+        return sum(1 for t in self.events if now - t < self.window)
+
+    @property
+    def last(self) -> Optional[datetime]:
+        return self.events[-1] if self.events else None
+
+
+class ReplyRateControl:
+    """
+    Reply cadence for one agent: a daily cap, a per-target daily limit and a
+    same-target cooldown.
+
+    Targets are kept in least-recently-replied order and dropped once their
+    last reply leaves the window, so tracking thousands of targets stays
+    cheap and every check is amortized O(1).
+    """
+
+    def __init__(
+        self,
+        daily_cap: int = 10,
+        per_target_daily_limit: Optional[int] = None,
+        cooldown_same_target: timedelta = timedelta(0),
+        window: timedelta = timedelta(hours=24),
+    ):
+        self.window = window
+        self.daily = WindowCap(daily_cap, window)
+        self.per_target_daily_limit = per_target_daily_limit
+        self.cooldown_same_target = cooldown_same_target
+        self._targets: "OrderedDict[str, WindowCap]" = OrderedDict()
+
+    @classmethod
+    def from_settings(cls, engagement: Dict[str, Any], cadence: Optional[Dict[str, Any]] = None) -> "ReplyRateControl":
+        """
+        Combine an agent's engagement block with its playbook cadence, keeping the stricter value of each field.
+        """
+        cadence = cadence or {}
+
+        def strictest(key: str, cadence_key: str, default: Optional[int]) -> Optional[int]:
+            values = [int(v) for v in (engagement.get(key), cadence.get(cadence_key)) if v is not None]
+            return min(values) if values else default
+
+        return cls(
+            daily_cap=strictest("daily_reply_cap", "max_replies_per_day", 10),
+            per_target_daily_limit=strictest("per_target_daily_limit", "per_target_daily_limit", None),
+            cooldown_same_target=timedelta(
+                minutes=strictest("cooldown_minutes_same_target", "cooldown_minutes_same_target", 0)
+            ),
+        )
+
+    def reconfigure(self, other: "ReplyRateControl") -> None:
+        """
+        Adopt another controller's limits without forgetting replies already made.
+        """
+        self.daily.resize(other.daily.limit)
+        self.per_target_daily_limit = other.per_target_daily_limit
+        self.cooldown_same_target = other.cooldown_same_target
+        for target in self._targets.values():
+            target.resize(self.per_target_daily_limit or self.daily.limit)
+
+    def can_reply(self, now: Optional[datetime] = None) -> bool:
+        return self.daily.allows(now or datetime.now())
+
+    def can_reply_to(self, target_id: str, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now()
+        if not self.daily.allows(now):
+            return False
+        self._prune(now)
+        target = self._targets.get(target_id)
+        if not target:
+            return True
+        if target.last and now - target.last < self.cooldown_same_target:
+            return False
+        return target.allows(now)
+
+    def record(self, target_id: Optional[str], when: Optional[datetime] = None) -> None:
+        when = when or datetime.now()
+        self.daily.record(when)
+        if not target_id:
+            return
+        target = self._targets.get(target_id)
+        if target is None:
+            target = WindowCap(self.per_target_daily_limit or self.daily.limit, self.window)
+            self._targets[target_id] = target
+        target.record(when)
+        self._targets.move_to_end(target_id)
+
+    def next_allowed(self, now: datetime) -> datetime:
+        """
+        Earliest time the daily cap allows another reply.
+        """
+        if self.daily.allows(now):
+            return now
+        if not self.daily.events:
+            return datetime.max
+        return self.daily.events[0] + self.window
+
+    def replies_today(self, now: Optional[datetime] = None) -> int:
+        return self.daily.count(now or datetime.now())
+
+    def _prune(self, now: datetime) -> None:
+        horizon = max(self.window, self.cooldown_same_target)
+        while self._targets:
+            target_id, target = next(iter(self._targets.items()))
+            if target.last and now - target.last < horizon:
+                break
+            self._targets.popitem(last=False)
+
+
+class ClaimRegistry:
+    """
+    Which agent is replying to which tweet, shared by every agent in a manager.
+
+    A tweet claimed by one agent can't be claimed by another until the claim
+    window passes, so each target tweet gets at most one agent reply per
+    window. Claims are kept in time order and expire from the front.
+    """
+
+    def __init__(self, window: timedelta = timedelta(hours=1)):
+        self.window = window
+        self._claims: "OrderedDict[str, Tuple[str, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, engagement: Dict[str, Any]) -> "ClaimRegistry":
+        """
+        Build a registry from the global_settings.engagement block.
+        """
+        return cls(window=timedelta(minutes=float(engagement.get("reply_claim_minutes", 60))))
+
+    def claim(self, tweet_id: str, agent_id: str, now: Optional[datetime] = None) -> bool:
+        """
+        Claim a tweet for an agent; False if another agent holds a live claim.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            self._prune(now)
+            holder = self._claims.get(tweet_id)
+            if holder and holder[0] != agent_id:
+                return False
+            self._claims[tweet_id] = (agent_id, now)
+            self._claims.move_to_end(tweet_id)
+            return True
+
+    def release(self, tweet_id: str, agent_id: str) -> None:
+        """
+        Drop an agent's claim, e.g. when its reply was never posted.
+        """
+        with self._lock:
+            holder = self._claims.get(tweet_id)
+            if holder and holder[0] == agent_id:
+                del self._claims[tweet_id]
+
+    def __len__(self) -> int:
+        return len(self._claims)
+
+    def _prune(self, now: datetime) -> None:
+        while self._claims:
+            _, (_, claimed_at) = next(iter(self._claims.items()))
+            if now - claimed_at < self.window:
+                break
+            self._claims.popitem(last=False)
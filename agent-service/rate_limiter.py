@@ -0,0 +1,275 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+
+# Request priorities; lower values are served first
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+PRIORITY_DISCOVERY = 2
+
+# Default (limit, window_seconds) per X API v2 endpoint in user context.
+# post_tweet and post_reply both hit POST /2/tweets and so share one budget.
+DEFAULT_ENDPOINT_LIMITS: Dict[str, Tuple[int, float]] = {
+    "POST /2/tweets": (200, 900),
+    "GET /2/tweets/search/recent": (180, 900),
+    "GET /2/users": (900, 900),
+    "GET /2/users/:id/tweets": (900, 900),
+    "GET /2/tweets": (900, 900),
+    "GET /2/users/:id/mentions": (180, 900),
+}
+
+# XClient method -> (endpoint, priority)
+METHOD_ENDPOINTS: Dict[str, Tuple[str, int]] = {
+    "post_tweet": ("POST /2/tweets", PRIORITY_WRITE),
+    "post_reply": ("POST /2/tweets", PRIORITY_WRITE),
+    "search_recent": ("GET /2/tweets/search/recent", PRIORITY_DISCOVERY),
+    "get_user": ("GET /2/users", PRIORITY_DISCOVERY),
+    "get_users": ("GET /2/users", PRIORITY_DISCOVERY),
+    "get_user_tweets": ("GET /2/users/:id/tweets", PRIORITY_DISCOVERY),
+    "get_tweets": ("GET /2/tweets", PRIORITY_READ),
+    "get_mentions": ("GET /2/users/:id/mentions", PRIORITY_READ),
+}
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request cannot be scheduled within its budget.
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket for one (credential, endpoint) budget, resynced from response headers.
+    """
+
+    def __init__(self, limit: int, window_seconds: float):
+        self.capacity = float(max(1, limit))
+        self.refill_rate = self.capacity / max(1.0, window_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until: Optional[float] = None
+
+    def refill(self, now: float) -> None:
+        if self.blocked_until is not None:
+            if now < self.blocked_until:
+                self.updated = now
+                return
+            # X resets the whole window at once
+            self.tokens = self.capacity
+            self.blocked_until = None
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def seconds_until_token(self, now: float) -> float:
+        if self.blocked_until is not None and now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.refill_rate
+
+    def sync(self, remaining: int, reset_epoch: Optional[float], limit: Optional[int] = None) -> None:
+        """
+        Adopt the server's view of the budget (x-rate-limit-remaining / -reset / -limit).
+        """
+        now = time.monotonic()
+        if limit:
+            self.capacity = float(limit)
+        self.tokens = float(min(self.capacity, max(0, remaining)))
+        self.updated = now
+        if remaining <= 0 and reset_epoch:
+            self.blocked_until = now + max(0.0, reset_epoch - time.time())
+
+
+class RequestScheduler:
+    """
+    Shared scheduler holding one token bucket per (credential, endpoint).
+
+    Callers waiting on an empty bucket are served in priority order, so
+    writes go out before discovery reads. Discovery requests are shed
+    outright once a bucket falls below its reserve.
+    """
+
+    def __init__(
+        self,
+        endpoint_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        discovery_reserve: float = 0.2,
+        max_wait_seconds: Optional[Dict[int, float]] = None,
+    ):
+        self.endpoint_limits = dict(DEFAULT_ENDPOINT_LIMITS)
+        self.endpoint_limits.update(endpoint_limits or {})
+        self.discovery_reserve = discovery_reserve
+        self.max_wait_seconds = {PRIORITY_WRITE: 60.0, PRIORITY_READ: 10.0, PRIORITY_DISCOVERY: 0.0}
+        self.max_wait_seconds.update(max_wait_seconds or {})
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._waiters: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.shed_count = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> "RequestScheduler":
+        """
+        Build a scheduler from the global_settings.rate_limits block.
+        """
+        endpoint_limits = {
+            endpoint: (int(spec["limit"]), float(spec.get("window_seconds", 900)))
+            for endpoint, spec in (settings.get("endpoints") or {}).items()
+        }
+        waits = settings.get("max_wait_seconds", {})
+        return cls(
+            endpoint_limits=endpoint_limits,
+            discovery_reserve=float(settings.get("discovery_reserve", 0.2)),
+            max_wait_seconds={
+                PRIORITY_WRITE: float(waits.get("write", 60)),
+                PRIORITY_READ: float(waits.get("read", 10)),
+                PRIORITY_DISCOVERY: float(waits.get("discovery", 0)),
+            },
+        )
+
+    def bucket(self, credential: str, endpoint: str) -> TokenBucket:
+        key = (credential, endpoint)
+        if key not in self._buckets:
+            limit, window = self.endpoint_limits.get(endpoint, (900, 900))
+            self._buckets[key] = TokenBucket(limit, window)
+        return self._buckets[key]
+
+    def acquire(self, credential: str, endpoint: str, priority: int = PRIORITY_READ) -> bool:
+        """
+        Take one token, waiting behind higher-priority callers if the bucket is empty.
+
+        Returns False when the request was shed (low budget or wait exceeded).
+        """
+        key = (credential, endpoint)
+        deadline = time.monotonic() + self.max_wait_seconds.get(priority, 0.0)
+        with self._cond:
+            bucket = self.bucket(credential, endpoint)
+            bucket.refill(time.monotonic())
+            if priority >= PRIORITY_DISCOVERY and bucket.tokens < bucket.capacity * self.discovery_reserve:
+                self.shed_count += 1
+                return False
+
+            ticket = (priority, next(self._seq))
+            waiters = self._waiters.setdefault(key, [])
+            heapq.heappush(waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    bucket.refill(now)
+                    if waiters[0] == ticket and bucket.tokens >= 1:
+                        bucket.tokens -= 1
+                        return True
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.shed_count += 1
+                        return False
+                    self._cond.wait(timeout=min(remaining, max(0.01, bucket.seconds_until_token(now))))
+            finally:
+                waiters.remove(ticket)
+                heapq.heapify(waiters)
+                self._cond.notify_all()
+
+    def observe_headers(self, credential: str, endpoint: str, headers: Optional[Dict[str, Any]]) -> None:
+        """
+        Resync a bucket from X rate-limit response headers, if present.
+        """
+        if not headers:
+            return
+        lowered = {str(k).lower(): v for k, v in headers.items()}
+        remaining = lowered.get("x-rate-limit-remaining")
+        if remaining is None:
+            return
+        reset = lowered.get("x-rate-limit-reset")
+        limit = lowered.get("x-rate-limit-limit")
+        with self._cond:
+            self.bucket(credential, endpoint).sync(
+                int(remaining),
+                float(reset) if reset is not None else None,
+                int(limit) if limit is not None else None,
+            )
+            self._cond.notify_all()
+
+
+class RateLimitedXClient:
+    """
+    XClient wrapper that routes every request through a RequestScheduler.
+
+    Shed reads return None, so discovery degrades gracefully and callers
+    can still tell "not fetched" from an empty result; writes that cannot
+    be scheduled raise RateLimitExceeded.
+    Headers are read from the wrapped client's last_response_headers
+    attribute, or from the response attached to an exception on a 429.
+    A view from at_priority() schedules its reads at another priority,
+    e.g. author lookups for mentions that shouldn't wait behind discovery.
+    """
+
+    def __init__(self, client: Any, scheduler: RequestScheduler, credential: str, read_priority: Optional[int] = None):
+        self.client = client
+        self.scheduler = scheduler
+        self.credential = credential
+        self.read_priority = read_priority
+
+    def at_priority(self, priority: int) -> "RateLimitedXClient":
+        """
+        Same client and budgets, with every read scheduled at priority.
+        """
+        return RateLimitedXClient(self.client, self.scheduler, self.credential, read_priority=priority)
+
+    def __getattr__(self, name: str) -> Any:
+        # Hide native async variants of scheduled methods so async callers go through _request
+        if name.startswith("a") and name[1:] in METHOD_ENDPOINTS:
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _request(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        endpoint, priority = METHOD_ENDPOINTS[method]
+        if self.read_priority is not None and priority != PRIORITY_WRITE:
+            priority = self.read_priority
+        if not self.scheduler.acquire(self.credential, endpoint, priority):
+            metrics.inc("x_requests_shed_total", endpoint=endpoint)
+            if priority == PRIORITY_WRITE:
+                raise RateLimitExceeded(f"{endpoint} budget exhausted for {self.credential}")
+            return None
+        metrics.inc("x_requests_total", endpoint=endpoint)
+        try:
+            with metrics.span("x_request", endpoint=endpoint):
+                result = getattr(self.client, method)(*args, **kwargs)
+        except Exception as e:
+            response = getattr(e, "response", None)
+            if getattr(response, "status_code", None) == 429:
+                metrics.inc("x_rate_limited_total", endpoint=endpoint)
+                headers = dict(getattr(response, "headers", {}) or {})
+                headers.setdefault("x-rate-limit-remaining", 0)
+                self.scheduler.observe_headers(self.credential, endpoint, headers)
+            raise
+        self.scheduler.observe_headers(
+            self.credential, endpoint, getattr(self.client, "last_response_headers", None)
+        )
+        return result
+
+    def post_tweet(self, text: str) -> Optional[Dict[str, Any]]:
+        return self._request("post_tweet", text)
+
+    def post_reply(self, tweet_id: str, content: str) -> Optional[Dict[str, Any]]:
+        return self._request("post_reply", tweet_id=tweet_id, content=content)
+
+    def search_recent(self, query: str, max_results: int = 100, **kwargs: Any) -> Optional[List[Dict[str, Any]]]:
+        return self._request("search_recent", query=query, max_results=max_results, **kwargs)
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._request("get_user", user_id=user_id)
+
+    def get_users(self, user_ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+        return self._request("get_users", user_ids=user_ids)
+
+    def get_user_tweets(self, user_id: str, max_results: int = 10, **kwargs: Any) -> Optional[List[Dict[str, Any]]]:
+        return self._request("get_user_tweets", user_id=user_id, max_results=max_results, **kwargs)
+
+    def get_tweets(self, tweet_ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+        return self._request("get_tweets", tweet_ids=tweet_ids)
+
+    def get_mentions(self, max_results: int = 100, **kwargs: Any) -> Optional[List[Dict[str, Any]]]:
+        return self._request("get_mentions", max_results=max_results, **kwargs)
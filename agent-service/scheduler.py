@@ -0,0 +1,266 @@
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+if TYPE_CHECKING:
+    from enhanced_agent import AgentManager, EnhancedAIAgent
+
+
+class PostingHours:
+    """
+    Active and peak posting hours from global_settings.posting_hours.
+
+    Times passed in and returned are naive local datetimes, matching the
+    timestamps agents keep in their history.
+    """
+
+    def __init__(
+        self,
+        tz: str = "UTC",
+        active_hours: Optional[Tuple[int, int]] = None,
+        peak_hours: Optional[List[int]] = None,
+        peak_cooldown_factor: float = 1.0,
+    ):
+        self.tz = ZoneInfo(tz)
+        self.active_hours = tuple(active_hours) if active_hours else None
+        self.peak_hours = set(peak_hours or [])
+        self.peak_cooldown_factor = peak_cooldown_factor
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], peak_cooldown_factor: float = 1.0) -> "PostingHours":
+        return cls(
+            tz=settings.get("timezone", "UTC"),
+            active_hours=settings.get("active_hours"),
+            peak_hours=settings.get("peak_hours"),
+            peak_cooldown_factor=peak_cooldown_factor,
+        )
+
+    def _local(self, when: datetime) -> datetime:
+        return when.astimezone(self.tz)
+
+    def is_active(self, when: Optional[datetime] = None) -> bool:
+        if not self.active_hours:
+            return True
+        start, end = self.active_hours
+        hour = self._local(when or datetime.now()).hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def is_peak(self, when: Optional[datetime] = None) -> bool:
+        return self._local(when or datetime.now()).hour in self.peak_hours
+
+    def scale_cooldown(self, cooldown: timedelta, when: Optional[datetime] = None) -> timedelta:
+        """
+        Shorten a posting cooldown during peak hours.
+        """
+        if self.is_peak(when):
+            return cooldown * self.peak_cooldown_factor
+        return cooldown
+
+    def next_active(self, when: datetime) -> datetime:
+        """
+        Earliest time at or after `when` that falls inside the active hours.
+        """
+        if self.is_active(when):
+            return when
+        local = self._local(when)
+        start = local.replace(hour=self.active_hours[0], minute=0, second=0, microsecond=0)
+        if start <= local:
+            start += timedelta(days=1)
+        return start.astimezone().replace(tzinfo=None)
+
+
+class AgentScheduler:
+    """
+    Event-driven replacement for the fixed sleep loop.
+
+    Each agent sits in a priority queue keyed by its next eligible time
+    (post cooldown, reply caps, active hours). The loop sleeps until the
+    earliest entry and starts every agent that is due as a batch task, so
+    the loop keeps dispatching while a batch runs; each batch reschedules
+    its agents when it finishes. An agent that is eligible but found nothing
+    to do is rechecked after recheck_interval, unless a market or news event
+    arrives first: events wake such agents immediately and are merged into
+    their context. An event or wake() for an agent that is still running is
+    remembered and honoured once its batch finishes.
+    """
+
+    def __init__(self, manager: "AgentManager", recheck_interval: timedelta = timedelta(minutes=5)):
+        self.manager = manager
+        self.recheck_interval = recheck_interval
+        self._queue: List[Tuple[datetime, int, int]] = []
+        self._version: Dict[int, int] = {}
+        self._eligible_at: Dict[int, datetime] = {}
+        self._pending_events: List[Dict[str, Any]] = []
+        self._in_flight: Set[int] = set()
+        # In-flight agents to reconsider after their run: True for wake(), False for an event
+        self._deferred: Dict[int, bool] = {}
+        self._batches: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = False
+
+    @classmethod
+    def from_config(cls, manager: "AgentManager") -> "AgentScheduler":
+        settings = manager.global_settings.get("scheduler", {})
+        return cls(manager, recheck_interval=timedelta(seconds=float(settings.get("recheck_seconds", 300))))
+
+    def next_eligible_time(self, agent: "EnhancedAIAgent", now: datetime) -> datetime:
+        """
+        Earliest time the agent could post or reply, honouring active hours.
+        """
+        eligible = max(now, min(agent.next_post_time(), agent.next_reply_time(now)))
+        if agent.posting_hours:
+            eligible = agent.posting_hours.next_active(eligible)
+        return eligible
+
+    def schedule(self, index: int, now: datetime, ran: bool = False) -> datetime:
+        agent = self.manager.agents[index]
+        eligible = self.next_eligible_time(agent, now)
+        self._eligible_at[index] = eligible
+        when = max(eligible, now + self.recheck_interval) if ran else eligible
+        version = self._version.get(index, 0) + 1
+        self._version[index] = version
+        heapq.heappush(self._queue, (when, version, index))
+        return when
+
+    def add_agent(self, index: int) -> None:
+        """
+        Start scheduling an agent appended to manager.agents while running; safe to call from any thread.
+        """
+        def add() -> None:
+            self.schedule(index, datetime.now())
+            if self._wakeup:
+                self._wakeup.set()
+
+        if self._loop:
+            self._loop.call_soon_threadsafe(add)
+        else:
+            self.schedule(index, datetime.now())
+
+    def wake(self, agent_id: str) -> None:
+        """
+        Run one agent now, e.g. for a high-reach mention; safe to call from any thread.
+
+        An agent whose reply cap or active hours rule out a reply keeps its slot.
+        """
+        def wake_now() -> None:
+            for index, agent in enumerate(self.manager.agents):
+                if agent.id != agent_id:
+                    continue
+                if index in self._in_flight:
+                    self._deferred[index] = True
+                elif agent.should_reply_now():
+                    self._run_now(index, datetime.now())
+                return
+
+        if self._loop:
+            self._loop.call_soon_threadsafe(wake_now)
+
+    def notify(self, event: Dict[str, Any]) -> None:
+        """
+        Preempt the queue with a market or news event; safe to call from any thread.
+        """
+        self._pending_events.append(dict(event))
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _apply_events(self, now: datetime) -> Dict[str, Any]:
+        """
+        Pull agents that are only waiting for a recheck forward to now; return the merged event context.
+        """
+        events, self._pending_events = self._pending_events, []
+        merged: Dict[str, Any] = {}
+        for event in events:
+            merged.update(event)
+        if events:
+            for index, eligible in self._eligible_at.items():
+                if index in self._in_flight:
+                    # Its eligibility is recomputed when the run ends
+                    self._deferred.setdefault(index, False)
+                elif eligible <= now:
+                    self._run_now(index, now)
+        return merged
+
+    def _run_now(self, index: int, now: datetime) -> None:
+        version = self._version.get(index, 0) + 1
+        self._version[index] = version
+        heapq.heappush(self._queue, (now, version, index))
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due: List[int] = []
+        while self._queue and self._queue[0][0] <= now:
+            _, version, index = heapq.heappop(self._queue)
+            # Skip entries superseded by a later reschedule
+            if version == self._version.get(index) and index not in due and index not in self._in_flight:
+                due.append(index)
+        return due
+
+    def _seconds_until_next(self, now: datetime) -> float:
+        while self._queue and self._queue[0][1] != self._version.get(self._queue[0][2]):
+            heapq.heappop(self._queue)
+        if not self._queue:
+            return self.recheck_interval.total_seconds()
+        return max(0.0, (self._queue[0][0] - now).total_seconds())
+
+    async def run_forever(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._running = True
+        now = datetime.now()
+        for index in range(len(self.manager.agents)):
+            self.schedule(index, now)
+
+        while self._running:
+            timeout = self._seconds_until_next(datetime.now())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            now = datetime.now()
+            event_context = self._apply_events(now)
+            due = self._pop_due(now)
+            if not due:
+                continue
+
+            # Events only add fields; the fresh snapshot's values (e.g. top news relevance) win
+            context = {**event_context, **self.manager.get_market_context()}
+            self._in_flight.update(due)
+            batch = asyncio.create_task(self._run_batch(due, context))
+            self._batches.add(batch)
+            batch.add_done_callback(self._batches.discard)
+
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    async def _run_batch(self, due: List[int], context: Dict[str, Any]) -> None:
+        try:
+            await self.manager.run_agents([self.manager.agents[i] for i in due], context)
+        except Exception as e:
+            print(f"[AgentScheduler] Error running batch: {e}")
+        finally:
+            now = datetime.now()
+            for index in due:
+                self._in_flight.discard(index)
+                self.schedule(index, now, ran=True)
+                woken = self._deferred.pop(index, None)
+                if woken is None:
+                    continue
+                # Eligibility is fresh now; an agent that can still act goes again right away
+                agent = self.manager.agents[index]
+                if agent.should_reply_now() if woken else self._eligible_at[index] <= now:
+                    self._run_now(index, now)
+            if self._wakeup:
+                self._wakeup.set()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
@@ -0,0 +1,448 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection, wait
+from typing import Any, Deque, Dict, Iterable, List, Mapping, Optional
+
+import metrics
+from account_index import AccountIndex
+from config_compiler import CompiledConfig, compile_config
+from enhanced_agent import AgentManager, EnhancedAIAgent
+from market_data import MarketIngester
+from scheduler import AgentScheduler
+from triggers import agent_rules
+
+
+class SharedSnapshot:
+    """
+    Market snapshot published to every worker process through shared memory.
+
+    One writer (the coordinator) and any number of readers. A sequence
+    number guards the payload like a seqlock: it is odd while a write is in
+    progress, and a reader retries if it changed while copying. Readers
+    only parse when the sequence moved, so reading an unchanged snapshot
+    costs one header unpack.
+    """
+
+    _HEADER = struct.Struct("<QI")
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._seq = -1
+        self._cached: Dict[str, Any] = {}
+
+    @classmethod
+    def create(cls, size: int = 65536) -> "SharedSnapshot":
+        shm = shared_memory.SharedMemory(create=True, size=cls._HEADER.size + size)
+        cls._HEADER.pack_into(shm.buf, 0, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedSnapshot":
+        # Spawned workers share the coordinator's resource tracker, which unlinks the segment
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def write(self, snapshot: Mapping[str, Any]) -> None:
+        data = json.dumps(dict(snapshot), default=str).encode("utf-8")
+        capacity = self._shm.size - self._HEADER.size
+        if len(data) > capacity:
+            raise ValueError(f"Snapshot is {len(data)} bytes; shared segment holds {capacity}")
+        buf = self._shm.buf
+        seq, length = self._HEADER.unpack_from(buf, 0)
+        self._HEADER.pack_into(buf, 0, seq + 1, length)
+        buf[self._HEADER.size:self._HEADER.size + len(data)] = data
+        self._HEADER.pack_into(buf, 0, seq + 2, len(data))
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the latest snapshot, or None if nothing was written yet.
+        """
+        buf = self._shm.buf
+        while True:
+            seq, length = self._HEADER.unpack_from(buf, 0)
+            if seq == 0:
+                return None
+            if seq == self._seq:
+                return dict(self._cached)
+            if seq % 2:
+                time.sleep(0)
+                continue
+            data = bytes(buf[self._HEADER.size:self._HEADER.size + length])
+            if self._HEADER.unpack_from(buf, 0)[0] == seq:
+                self._cached = json.loads(data)
+                self._seq = seq
+                return dict(self._cached)
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def rendezvous_owner(agent_id: str, workers: Iterable[int]) -> int:
+    """
+    Highest-random-weight owner of an agent among the given worker slots.
+
+    Removing a slot only moves the agents that slot owned; everyone else
+    keeps their worker.
+    """
+    def score(worker: int) -> bytes:
+        return hashlib.blake2b(f"{worker}:{agent_id}".encode("utf-8"), digest_size=8).digest()
+
+    return max(workers, key=score)
+
+
+def assign_agents(agent_ids: Iterable[str], workers: Iterable[int]) -> Dict[int, List[str]]:
+    slots = list(workers)
+    assignment: Dict[int, List[str]] = {worker: [] for worker in slots}
+    for agent_id in agent_ids:
+        assignment[rendezvous_owner(agent_id, slots)].append(agent_id)
+    return assignment
+
+
+class ShardWorkerManager(AgentManager):
+    """
+    AgentManager for one worker process.
+
+    Market context comes from the coordinator's shared snapshot, so a
+    worker runs no ingester of its own. The discovery cache is replicated:
+    after each cycle the accounts and topic cursors this worker changed go
+    to the coordinator, which merges them and forwards them to the other
+    workers. Metrics recorded since the last cycle go along too and are
+    merged into the coordinator's registry, which is the one exported.
+    """
+
+    def __init__(self, config_path: str, agent_ids: Iterable[str], snapshot_name: str, conn: Connection):
+        super().__init__(config_path, agent_ids=agent_ids)
+        # The coordinator persists the merged cache; workers start from it and never write it
+        self.account_index.path = None
+        # The coordinator serves metrics for the whole pool
+        self.metrics_exporter = None
+        self.shared_snapshot = SharedSnapshot.attach(snapshot_name)
+        self.conn = conn
+
+    def _create_market(self, compiled: CompiledConfig) -> Optional[MarketIngester]:
+        return None
+
+    def get_market_context(self) -> Dict[str, Any]:
+        with metrics.span("context_fetch"):
+            # The coordinator publishes a snapshot before it spawns any worker
+            return self.shared_snapshot.read() or {}
+
+    def adopt(self, agent_ids: List[str]) -> List[int]:
+        """
+        Take over agents from a worker that was removed; returns their indices.
+        """
+        compiled = self.config_watcher.current
+        owned = {agent.id for agent in self.agents}
+        configs = [compiled.agent(agent_id) for agent_id in agent_ids if agent_id not in owned]
+        return self.add_agents([agent_config for agent_config in configs if agent_config is not None])
+
+    async def run_agents(self, agents: List[EnhancedAIAgent], context: Dict[str, Any]):
+        await super().run_agents(agents, context)
+        rows, topics = self.account_index.export_changes()
+        if rows or topics:
+            self.send("sync", (rows, topics))
+        self.flush_metrics()
+
+    def flush_metrics(self) -> None:
+        recorded = metrics.get_registry().drain()
+        if recorded["counters"] or recorded["histograms"]:
+            self.send("metrics", recorded)
+
+    def send(self, kind: str, payload: Any) -> None:
+        try:
+            self.conn.send((kind, payload))
+        except (BrokenPipeError, OSError):
+            pass
+
+
+def _listen(conn: Connection, loop: asyncio.AbstractEventLoop, handle) -> None:
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except (EOFError, OSError):
+            # Coordinator is gone; shut down rather than run unsupervised
+            kind, payload = "stop", None
+        loop.call_soon_threadsafe(handle, kind, payload)
+        if kind == "stop":
+            return
+
+
+def _worker_main(worker_id: int, config_path: str, agent_ids: List[str], snapshot_name: str, conn: Connection) -> None:
+    manager = ShardWorkerManager(config_path, agent_ids, snapshot_name, conn)
+    scheduler = AgentScheduler.from_config(manager)
+    manager.events.start()
+    # Each worker polls mentions for the agents it owns, adopted ones included
+    if manager.mentions:
+        manager.mentions.subscribe(scheduler.wake)
+        manager.mentions.start()
+    print(f"[Shard {worker_id}] Running {len(manager.agents)} agents")
+
+    def handle(kind: str, payload: Any) -> None:
+        if kind == "event":
+            scheduler.notify(payload)
+        elif kind == "sync":
+            manager.account_index.merge(*payload)
+        elif kind == "adopt":
+            for index in manager.adopt(payload):
+                scheduler.add_agent(index)
+            print(f"[Shard {worker_id}] Adopted {len(payload)} agents")
+        elif kind == "stop":
+            scheduler.stop()
+
+    async def main() -> None:
+        threading.Thread(
+            target=_listen, args=(conn, asyncio.get_running_loop(), handle), name="shard-listener", daemon=True
+        ).start()
+        await scheduler.run_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if manager.mentions:
+            manager.mentions.stop()
+        manager.flush_metrics()
+        manager.events.stop()
+        manager.shared_snapshot.close()
+
+
+@dataclass(eq=False)
+class _Worker:
+    slot: int
+    agent_ids: List[str]
+    process: Any = None
+    conn: Optional[Connection] = None
+    restarts: Deque[float] = field(default_factory=deque)
+
+
+class ShardCoordinator:
+    """
+    Runs agents across a pool of worker processes.
+
+    Agents are assigned to worker slots by rendezvous hashing and stay on
+    their worker for its lifetime. The coordinator owns the market ingester
+    and the persisted discovery cache: it publishes market snapshots through
+    shared memory, forwards news events, relays discovery cache changes
+    between workers over their pipes, and exports the metrics the workers
+    send back. A crashed worker is respawned with the
+    same agents; one that keeps crashing is dropped and its agents move to
+    the remaining workers, restoring their state from the state store.
+    """
+
+    def __init__(
+        self,
+        config_path: str = "agent_config.yaml",
+        workers: int = 0,
+        max_restarts: int = 3,
+        restart_window: timedelta = timedelta(minutes=5),
+        snapshot_bytes: int = 65536,
+        save_interval: float = 60.0,
+        tick: float = 0.25,
+    ):
+        compiled = compile_config(config_path)
+        settings = compiled.global_settings
+        self.config_path = config_path
+        self.agent_ids = [agent.id for agent in compiled.agents]
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.snapshot_bytes = snapshot_bytes
+        self.save_interval = save_interval
+        self.tick = tick
+        self.metrics_exporter = metrics.configure(settings.get("metrics", {}))
+        self.market = MarketIngester.from_config(compiled.data_sources, settings.get("market_data", {}))
+        # Workers only see forwarded events, so crossings of any agent's post triggers are published too
+        self.market.watch(
+            rule for agent in compiled.agents for rule in agent_rules(agent.id, agent.strategy.get("triggers", {}))
+        )
+        self.account_index = AccountIndex.from_config(settings.get("engagement", {}).get("discovery_cache", {}))
+        if settings.get("state", {}).get("backend") == "memory":
+            print("[ShardCoordinator] In-memory state: agents moved between workers lose their history")
+
+        count = min(len(self.agent_ids), workers or os.cpu_count() or 1)
+        self.workers: Dict[int, _Worker] = {
+            slot: _Worker(slot, agent_ids)
+            for slot, agent_ids in assign_agents(self.agent_ids, range(max(1, count))).items()
+        }
+        self.shared_snapshot: Optional[SharedSnapshot] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=1000)
+        self._published: Optional[Mapping[str, Any]] = None
+        self._saved_at = time.monotonic()
+        self._running = False
+
+    @classmethod
+    def from_config(cls, config_path: str = "agent_config.yaml") -> "ShardCoordinator":
+        """
+        Build a coordinator from the global_settings.sharding block.
+        """
+        settings = compile_config(config_path).global_settings.get("sharding", {})
+        return cls(
+            config_path,
+            workers=int(settings.get("workers", 0)),
+            max_restarts=int(settings.get("max_restarts", 3)),
+            restart_window=timedelta(seconds=float(settings.get("restart_window_seconds", 300))),
+            snapshot_bytes=int(settings.get("snapshot_bytes", 65536)),
+            save_interval=float(settings.get("save_seconds", 60)),
+        )
+
+    def start(self) -> None:
+        self.shared_snapshot = SharedSnapshot.create(self.snapshot_bytes)
+        self.market.subscribe(self._events.append)
+        self.market.poll_once()
+        self._publish_snapshot()
+        self.market.start()
+        if self.metrics_exporter:
+            self.metrics_exporter.start()
+        for worker in self.workers.values():
+            self._spawn(worker)
+        self._running = True
+
+    def _spawn(self, worker: _Worker) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.slot, self.config_path, list(worker.agent_ids), self.shared_snapshot.name, child_conn),
+            name=f"shard-{worker.slot}",
+            daemon=True,
+        )
+        worker.process.start()
+        child_conn.close()
+        worker.conn = parent_conn
+
+    def run_forever(self) -> None:
+        self.start()
+        try:
+            while self._running:
+                self.step()
+        finally:
+            self.stop()
+
+    def step(self) -> None:
+        """
+        Handle worker messages and exits, then publish market changes.
+        """
+        by_handle: Dict[Any, _Worker] = {}
+        for worker in self.workers.values():
+            by_handle[worker.conn] = worker
+            by_handle[worker.process.sentinel] = worker
+        exited: List[_Worker] = []
+        for handle in wait(list(by_handle), timeout=self.tick):
+            worker = by_handle[handle]
+            if handle is not worker.conn:
+                exited.append(worker)
+                continue
+            try:
+                while worker.conn.poll():
+                    self._handle(worker, *worker.conn.recv())
+            except (EOFError, OSError):
+                exited.append(worker)
+        for worker in dict.fromkeys(exited):
+            self._on_exit(worker)
+
+        self._publish_snapshot()
+        while self._events:
+            self._broadcast("event", self._events.popleft())
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self._saved_at = time.monotonic()
+            self.account_index.save()
+
+    def _handle(self, worker: _Worker, kind: str, payload: Any) -> None:
+        if kind == "sync":
+            self.account_index.merge(*payload)
+            self._broadcast("sync", payload, exclude=worker)
+            metrics.inc("shard_syncs_total")
+        elif kind == "metrics":
+            metrics.get_registry().merge(payload)
+
+    def _broadcast(self, kind: str, payload: Any, exclude: Optional[_Worker] = None) -> None:
+        for worker in self.workers.values():
+            if worker is exclude:
+                continue
+            try:
+                worker.conn.send((kind, payload))
+            except (BrokenPipeError, OSError):
+                # The exit is picked up from the process sentinel
+                pass
+
+    def _publish_snapshot(self) -> None:
+        snapshot = self.market.snapshot()
+        if snapshot is self._published:
+            return
+        try:
+            self.shared_snapshot.write(snapshot)
+            self._published = snapshot
+        except ValueError as e:
+            print(f"[ShardCoordinator] Market snapshot not published: {e}")
+
+    def _on_exit(self, worker: _Worker) -> None:
+        if self.workers.get(worker.slot) is not worker or not self._running:
+            return
+        worker.process.join(timeout=1)
+        worker.conn.close()
+        print(f"[ShardCoordinator] Worker {worker.slot} exited with code {worker.process.exitcode}")
+
+        now = time.monotonic()
+        while worker.restarts and now - worker.restarts[0] > self.restart_window.total_seconds():
+            worker.restarts.popleft()
+        # Respawned and adopting workers load the discovery cache from disk
+        self.account_index.save()
+        if len(worker.restarts) < self.max_restarts:
+            worker.restarts.append(now)
+            metrics.inc("shard_restarts_total")
+            self._spawn(worker)
+            return
+
+        del self.workers[worker.slot]
+        if not self.workers:
+            self._running = False
+            print("[ShardCoordinator] No workers left; stopping")
+            return
+        metrics.inc("shard_rebalances_total")
+        for slot, agent_ids in assign_agents(worker.agent_ids, self.workers).items():
+            if not agent_ids:
+                continue
+            self.workers[slot].agent_ids.extend(agent_ids)
+            try:
+                self.workers[slot].conn.send(("adopt", agent_ids))
+            except (BrokenPipeError, OSError):
+                pass
+        print(f"[ShardCoordinator] Worker {worker.slot} kept failing; moved {len(worker.agent_ids)} agents")
+
+    def stop(self) -> None:
+        self._running = False
+        self.market.stop()
+        self._broadcast("stop", None)
+        for worker in self.workers.values():
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self.account_index.save()
+        if self.shared_snapshot:
+            self.shared_snapshot.close()
+            self.shared_snapshot = None
+
+
+if __name__ == "__main__":
+    coordinator = ShardCoordinator.from_config(sys.argv[1] if len(sys.argv) > 1 else "agent_config.yaml")
+    try:
+        coordinator.run_forever()
+    except KeyboardInterrupt:
+        pass
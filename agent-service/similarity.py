@@ -0,0 +1,160 @@
+import random
+import re
+import threading
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"[a-z0-9$#@']+")
+
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """
+    Hash the word n-grams of a normalized text; short texts fall back to single words.
+    """
+    words = _TOKEN_RE.findall(text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {zlib.crc32(g.encode("utf-8")) for g in grams}
+
+
+class MinHasher:
+    """
+    MinHash signatures from a fixed family of universal hash permutations.
+    """
+
+    def __init__(self, num_perm: int = 32, seed: int = 7):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, tokens: Set[int]) -> Tuple[int, ...]:
+        if not tokens:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * t + b) % _MERSENNE_PRIME) & _MAX_HASH for t in tokens)
+            for a, b in self._perms
+        )
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of recent agent output for near-duplicate detection.
+
+    Signatures are split into bands; two texts are compared only if they
+    share a band bucket, so a lookup touches a handful of candidates no
+    matter how many posts are in the window. Entries expire in insertion
+    order once they leave the window.
+    """
+
+    def __init__(
+        self,
+        window: timedelta = timedelta(hours=24),
+        threshold: float = 0.6,
+        max_similar_per_window: int = 2,
+        max_regenerations: int = 2,
+        num_perm: int = 32,
+        bands: int = 8,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.window = window
+        self.threshold = threshold
+        self.max_similar_per_window = max(1, max_similar_per_window)
+        # How many fresh drafts a caller should request before giving up
+        self.max_regenerations = max(0, max_regenerations)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm)
+        self._entries: Deque[Tuple[datetime, int, str, Tuple[int, ...]]] = deque()
+        self._signatures: Dict[int, Tuple[str, Tuple[int, ...]]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, quality_control: Dict[str, Any]) -> "NearDuplicateIndex":
+        """
+        Build an index from the global_settings.quality_control block.
+        """
+        return cls(
+            window=timedelta(hours=float(quality_control.get("avoid_repetition_window", 24))),
+            threshold=float(quality_control.get("similarity_threshold", 0.6)),
+            max_similar_per_window=int(quality_control.get("max_similar_posts_per_day", 2)),
+            max_regenerations=int(quality_control.get("max_regenerations", 2)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(b, signature[b * self.rows:(b + 1) * self.rows]) for b in range(self.bands)]
+
+    def _expire(self, now: datetime) -> None:
+        cutoff = now - self.window
+        while self._entries and self._entries[0][0] <= cutoff:
+            _, doc_id, _, signature = self._entries.popleft()
+            self._signatures.pop(doc_id, None)
+            for key in self._band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket:
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def similar_count(self, text: str, agent_id: str, now: Optional[datetime] = None) -> int:
+        """
+        Number of the agent's posts in the window estimated at or above the similarity threshold.
+        """
+        signature = self.hasher.signature(shingles(text))
+        with self._lock:
+            self._expire(now or datetime.now())
+            candidates: Set[int] = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            count = 0
+            for doc_id in candidates:
+                owner, other = self._signatures[doc_id]
+                if owner != agent_id:
+                    continue
+                matches = sum(1 for x, y in zip(signature, other) if x == y)
+                if matches / len(signature) >= self.threshold:
+                    count += 1
+            return count
+
+    def is_repetitive(self, text: str, agent_id: str, now: Optional[datetime] = None) -> bool:
+        """
+        True if posting text would exceed max_similar_posts_per_day.
+        """
+        return self.similar_count(text, agent_id, now) + 1 > self.max_similar_per_window
+
+    def add(self, text: str, agent_id: str, when: Optional[datetime] = None) -> None:
+        """
+        Index text; entries should arrive in time order, an older one is placed by timestamp.
+        """
+        when = when or datetime.now()
+        signature = self.hasher.signature(shingles(text))
+        with self._lock:
+            self._expire(datetime.now())
+            doc_id = self._next_id
+            self._next_id += 1
+            entry = (when, doc_id, agent_id, signature)
+            if self._entries and when < self._entries[-1][0]:
+                # Keep the deque sorted so _expire can stop at the first live entry
+                position = len(self._entries)
+                while position and self._entries[position - 1][0] > when:
+                    position -= 1
+                self._entries.insert(position, entry)
+            else:
+                self._entries.append(entry)
+            self._signatures[doc_id] = (agent_id, signature)
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, set()).add(doc_id)
@@ -0,0 +1,343 @@
+import atexit
+import bisect
+import json
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS posts (
+    agent_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    content TEXT,
+    tweet_id TEXT,
+    post_type TEXT,
+    template TEXT
+);
+CREATE INDEX IF NOT EXISTS posts_agent_ts ON posts (agent_id, ts);
+CREATE TABLE IF NOT EXISTS replies (
+    agent_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    content TEXT,
+    tweet_id TEXT,
+    reply_id TEXT,
+    target_user_id TEXT
+);
+CREATE INDEX IF NOT EXISTS replies_agent_ts ON replies (agent_id, ts);
+CREATE TABLE IF NOT EXISTS memory (
+    agent_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS memory_agent_ts ON memory (agent_id, ts);
+CREATE TABLE IF NOT EXISTS metrics (
+    agent_id TEXT PRIMARY KEY,
+    payload TEXT
+);
+"""
+
+# Columns added after the first release; older databases are migrated on open
+_ADDED_COLUMNS = {"posts": ("post_type TEXT", "template TEXT")}
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    for table, columns in _ADDED_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column in columns:
+            if column.split()[0] not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+    conn.commit()
+
+
+class StateStore(ABC):
+    """
+    Durable agent state: posts, replies, memory and performance metrics.
+
+    Writes never block the posting path; reads are time-range queries used
+    to rebuild cooldowns and daily caps after a restart.
+    """
+
+    @abstractmethod
+    def record_post(self, agent_id: str, post: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def record_reply(self, agent_id: str, reply: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def record_memory(self, agent_id: str, item: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def save_metrics(self, agent_id: str, metrics: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def posts_between(self, agent_id: str, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def replies_between(self, agent_id: str, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def recent_memory(self, agent_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def load_metrics(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryStateStore(StateStore):
+    """
+    Process-local store for tests and offline runs.
+    """
+
+    def __init__(self):
+        self._posts: Dict[str, List[Tuple[float, Dict[str, Any]]]] = {}
+        self._replies: Dict[str, List[Tuple[float, Dict[str, Any]]]] = {}
+        self._memory: Dict[str, List[Dict[str, Any]]] = {}
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _insert(rows: List[Tuple[float, Dict[str, Any]]], record: Dict[str, Any]) -> None:
+        ts = record["timestamp"].timestamp()
+        rows.insert(bisect.bisect_right([r[0] for r in rows], ts), (ts, dict(record)))
+
+    @staticmethod
+    def _between(rows: List[Tuple[float, Dict[str, Any]]], start: datetime, end: Optional[datetime]) -> List[Dict[str, Any]]:
+        keys = [r[0] for r in rows]
+        lo = bisect.bisect_right(keys, start.timestamp())
+        hi = bisect.bisect_right(keys, end.timestamp()) if end else len(rows)
+        return [dict(r[1]) for r in rows[lo:hi]]
+
+    def record_post(self, agent_id: str, post: Dict[str, Any]) -> None:
+        with self._lock:
+            self._insert(self._posts.setdefault(agent_id, []), post)
+
+    def record_reply(self, agent_id: str, reply: Dict[str, Any]) -> None:
+        with self._lock:
+            self._insert(self._replies.setdefault(agent_id, []), reply)
+
+    def record_memory(self, agent_id: str, item: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory.setdefault(agent_id, []).append(dict(item))
+
+    def save_metrics(self, agent_id: str, metrics: Dict[str, Any]) -> None:
+        with self._lock:
+            self._metrics[agent_id] = dict(metrics)
+
+    def posts_between(self, agent_id: str, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._between(self._posts.get(agent_id, []), start, end)
+
+    def replies_between(self, agent_id: str, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._between(self._replies.get(agent_id, []), start, end)
+
+    def recent_memory(self, agent_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(m) for m in self._memory.get(agent_id, [])[-limit:]]
+
+    def load_metrics(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            metrics = self._metrics.get(agent_id)
+            return dict(metrics) if metrics is not None else None
+
+
+class SQLiteStateStore(StateStore):
+    """
+    Embedded SQLite store in WAL mode with time-indexed tables.
+
+    Writes are queued and applied by a background thread in batches
+    (write-behind), so recording state costs the caller one queue put.
+    Reads flush pending writes first so they always see them.
+    """
+
+    def __init__(self, path: str = "agent_state.sqlite3", batch_size: int = 100, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Tuple[str, tuple]]]" = queue.Queue()
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._reader.executescript(_SCHEMA)
+        _migrate(self._reader)
+        self._writer = threading.Thread(target=self._write_loop, name="state-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _write_loop(self) -> None:
+        conn = sqlite3.connect(self.path)
+        conn.executescript(_SCHEMA)
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+            self._write_batch(conn, [entry for entry in batch if entry is not None and entry[1] is not None])
+            for entry in batch:
+                if entry is not None and entry[1] is None:
+                    # Flush barrier: everything queued before it is now committed
+                    entry[0].set()  # type: ignore[attr-defined]
+                self._queue.task_done()
+        conn.close()
+
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, writes: List[Tuple[str, tuple]]) -> None:
+        """
+        Commit a batch in one transaction, falling back to one transaction per row if it fails.
+
+        A single bad row then only loses itself instead of the whole batch.
+        """
+        if not writes:
+            return
+        try:
+            with conn:
+                for sql, params in writes:
+                    conn.execute(sql, params)
+            return
+        except Exception as e:
+            print(f"[StateStore] Error writing batch of {len(writes)}, retrying row by row: {e}")
+        for sql, params in writes:
+            try:
+                with conn:
+                    conn.execute(sql, params)
+            except Exception as e:
+                print(f"[StateStore] Dropped write {sql.split('(')[0].strip()!r}: {e}")
+
+    def _enqueue(self, sql: str, params: tuple) -> None:
+        self._queue.put((sql, params))
+
+    def record_post(self, agent_id: str, post: Dict[str, Any]) -> None:
+        self._enqueue(
+            "INSERT INTO posts (agent_id, ts, content, tweet_id, post_type, template) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                agent_id, post["timestamp"].timestamp(), post.get("content"),
+                post.get("tweet_id"), post.get("post_type"), post.get("template"),
+            ),
+        )
+
+    def record_reply(self, agent_id: str, reply: Dict[str, Any]) -> None:
+        self._enqueue(
+            "INSERT INTO replies VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                agent_id, reply["timestamp"].timestamp(), reply.get("content"),
+                reply.get("tweet_id"), reply.get("reply_id"), reply.get("target_user_id"),
+            ),
+        )
+
+    def record_memory(self, agent_id: str, item: Dict[str, Any]) -> None:
+        self._enqueue(
+            "INSERT INTO memory VALUES (?, ?, ?)",
+            (agent_id, datetime.now().timestamp(), json.dumps(item, default=str)),
+        )
+
+    def save_metrics(self, agent_id: str, metrics: Dict[str, Any]) -> None:
+        self._enqueue(
+            "INSERT OR REPLACE INTO metrics VALUES (?, ?)",
+            (agent_id, json.dumps(metrics, default=str)),
+        )
+
+    def flush(self) -> None:
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put((done, None))  # type: ignore[arg-type]
+        done.wait()
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        self.flush()
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def posts_between(self, agent_id: str, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT ts, content, tweet_id, post_type, template FROM posts "
+            "WHERE agent_id = ? AND ts > ? AND ts <= ? ORDER BY ts",
+            (agent_id, start.timestamp(), end.timestamp() if end else float("inf")),
+        )
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(ts),
+                "content": content,
+                "tweet_id": tweet_id,
+                "post_type": post_type,
+                "template": template,
+            }
+            for ts, content, tweet_id, post_type, template in rows
+        ]
+
+    def replies_between(self, agent_id: str, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT ts, content, tweet_id, reply_id, target_user_id FROM replies "
+            "WHERE agent_id = ? AND ts > ? AND ts <= ? ORDER BY ts",
+            (agent_id, start.timestamp(), end.timestamp() if end else float("inf")),
+        )
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(ts),
+                "content": content,
+                "tweet_id": tweet_id,
+                "reply_id": reply_id,
+                "target_user_id": target_user_id,
+            }
+            for ts, content, tweet_id, reply_id, target_user_id in rows
+        ]
+
+    def recent_memory(self, agent_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT payload FROM memory WHERE agent_id = ? ORDER BY ts DESC LIMIT ?",
+            (agent_id, limit),
+        )
+        return [json.loads(payload) for (payload,) in reversed(rows)]
+
+    def load_metrics(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT payload FROM metrics WHERE agent_id = ?", (agent_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._read_lock:
+            self._reader.close()
+
+
+def create_state_store(settings: Dict[str, Any]) -> StateStore:
+    """
+    Build the store selected by the global_settings.state block.
+    """
+    backend = settings.get("backend", "sqlite")
+    if backend == "memory":
+        return InMemoryStateStore()
+    if backend == "sqlite":
+        return SQLiteStateStore(
+            path=settings.get("path", "agent_state.sqlite3"),
+            batch_size=int(settings.get("batch_size", 100)),
+            flush_interval=float(settings.get("flush_interval_seconds", 1.0)),
+        )
+    raise ValueError(f"Unknown state backend: {backend}")
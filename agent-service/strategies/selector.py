@@ -1,8 +1,8 @@
 import random
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
-def choose_reply_angles(playbook: Dict[str, Any], k: int = 1) -> List[str]:
+def choose_reply_angles(playbook: Dict[str, Any], k: int = 1, rng: Optional[random.Random] = None) -> List[str]:
     """
     Randomly choose k reply angles from a playbook definition.
     """
@@ -11,6 +11,6 @@ def choose_reply_angles(playbook: Dict[str, Any], k: int = 1) -> List[str]:
         return []
     if k >= len(angles):
         return angles
-    return random.sample(angles, k)
+    return (rng or random).sample(angles, k)
 
 
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeBackend, LatencyModel  # noqa: E402
+
+# x_discovery and enhanced_agent import x_client / llm_clients at module level;
+# use the benchmark fakes, without latency, unless the real clients are installed
+try:
+    import x_client  # noqa: F401
+    import llm_clients  # noqa: F401
+except ImportError:
+    FakeBackend(
+        topics=["Bitcoin", "Ethereum"],
+        num_accounts=50,
+        x_latency=LatencyModel(scale=0.0),
+        llm_latency=LatencyModel(scale=0.0),
+    ).install()
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    """
+    agent_config.yaml with in-memory state and caches, for building a full AgentManager.
+    """
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agent_config.yaml")) as f:
+        raw = yaml.safe_load(f)
+    settings = raw["global_settings"]
+    settings["state"] = {"backend": "memory"}
+    settings["engagement"].setdefault("discovery_cache", {})["path"] = None
+    settings["metrics"] = {"enabled": False}
+    settings["event_stream"] = {"enabled": False}
+    path = tmp_path / "agent_config.yaml"
+    path.write_text(yaml.safe_dump(raw))
+    return str(path)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from account_index import AccountIndex
+from x_discovery import AccountCandidate
+
+
+def account(user_id: str, followers: int = 20_000) -> AccountCandidate:
+    return AccountCandidate(
+        user_id=user_id,
+        username=f"user{user_id}",
+        display_name="",
+        followers=followers,
+        avg_engagement=0.0,
+        engagement_to_followers_ratio=0.0,
+        last_tweet_time=None,
+        topics_matched=[],
+        score=0.0,
+    )
+
+
+def test_profile_expires_after_ttl():
+    index = AccountIndex(profile_ttl=timedelta(minutes=10))
+    index.put_profile(account("1"))
+    assert index.get_profile("1").followers == 20_000
+    index._accounts["1"].profile_at = datetime.utcnow() - timedelta(minutes=11)
+    assert index.get_profile("1") is None
+
+
+def test_least_recently_used_account_is_evicted():
+    index = AccountIndex(max_accounts=2)
+    index.put_profile(account("1"))
+    index.put_profile(account("2"))
+    index.get_profile("1")
+    index.put_profile(account("3"))
+    assert index.get_profile("2") is None
+    assert index.get_profile("1") is not None
+
+
+def test_seed_is_reserved_for_one_caller_until_seeded():
+    index = AccountIndex(activity_ttl=timedelta(hours=1))
+    index.put_profile(account("1"))
+    assert index.reserve_seeds(["1"]) == ["1"]
+    assert index.reserve_seeds(["1"]) == []
+    index.seed_activity("1", [("10", 100.0, None), ("11", 300.0, None)])
+    assert index.reserve_seeds(["1"]) == []
+    assert index.query(["1"])[0].avg_engagement == 200.0
+
+    index._accounts["1"].activity_at = datetime.utcnow() - timedelta(hours=2)
+    assert index.reserve_seeds(["1"]) == ["1"]
+
+
+def test_incremental_activity_only_folds_newer_tweets():
+    index = AccountIndex()
+    index.put_profile(account("1"))
+    index.seed_activity("1", [("10", 100.0, None)])
+    index.fold_activity("1", "10", 900.0, None)
+    index.fold_activity("1", "12", 300.0, None)
+    assert index.query(["1"])[0].avg_engagement == 200.0
+
+
+def test_unseeded_accounts_are_not_queried():
+    index = AccountIndex()
+    index.put_profile(account("1"))
+    index.fold_activity("1", "10", 500.0, None)
+    assert index.query(["1"]) == []
+
+
+def test_merge_keeps_newer_side():
+    local, remote = AccountIndex(), AccountIndex()
+    local.put_profile(account("1", followers=10))
+    remote.put_profile(account("1", followers=99))
+    remote.seed_activity("1", [("50", 80.0, None)])
+    remote.record_search("Bitcoin", ["1"], "50")
+    local.record_search("Bitcoin", ["2"], "40")
+    local.export_changes()
+
+    local.merge(*remote.export_changes())
+    merged = local.query(["1"])[0]
+    assert merged.followers == 99
+    assert merged.avg_engagement == 80.0
+    assert local.get_cursor("Bitcoin") == "50"
+    assert sorted(local.get_search("Bitcoin")) == ["1", "2"]
+    # Merged changes are not handed out again
+    assert local.export_changes() == ([], [])
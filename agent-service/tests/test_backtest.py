@@ -0,0 +1,120 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from backtest import EngagementModel, MarketSeries, _apply_cooldown, backtest_agent
+from config_compiler import compile_agent_config
+from scheduler import PostingHours
+
+T0 = 1_767_225_600.0  # 2026-01-01 00:00 UTC
+QUARTER = 900.0
+
+
+def _agent(agent_id="a", frequency="medium", triggers=None):
+    return compile_agent_config(
+        {
+            "id": agent_id,
+            "name": agent_id,
+            "llm_provider": "openai",
+            "x_username": agent_id,
+            "system_prompt": "sys",
+            "personality": {"archetype": "analyst", "tone": "calm"},
+            "strategy": {
+                "posting_frequency": frequency,
+                "triggers": triggers or {"price_movement_threshold": 5},
+                "post_types": [
+                    {"type": "insight", "weight": 3, "templates": ["t"]},
+                    {"type": "meme", "weight": 1, "templates": ["t"]},
+                ],
+            },
+        },
+        {},
+    )
+
+
+def _series(points=24, **fields):
+    """
+    One context every 15 minutes from T0; each field is a value or a per-point list.
+    """
+    rows = []
+    for i in range(points):
+        row = {"ts": T0 + i * QUARTER}
+        for name, value in fields.items():
+            row[name] = value[i] if isinstance(value, list) else value
+        rows.append(row)
+    return MarketSeries.from_rows(rows)
+
+
+def _naive_cooldown(times, cooldowns):
+    posted, last = [], -math.inf
+    for i, t in enumerate(times):
+        if t - last > cooldowns[i]:
+            posted.append(i)
+            last = t
+    return posted
+
+
+def test_cooldown_must_be_strictly_exceeded():
+    times = T0 + np.arange(24) * QUARTER
+    posted = _apply_cooldown(times, np.full(24, 3600.0))
+    # 0:00, then 1:15 (1:00 is exactly one cooldown later), 2:30, 3:45, 5:00
+    assert posted.tolist() == [0, 5, 10, 15, 20]
+    assert _apply_cooldown(np.zeros(0), np.zeros(0)).tolist() == []
+
+
+def test_cooldown_skip_matches_naive_scan_with_mixed_cooldowns():
+    rng = random.Random(7)
+    times = np.cumsum([rng.uniform(0, 1200) for _ in range(500)])
+    cooldowns = np.array([rng.choice([1800.0, 3600.0]) for _ in range(500)])
+    assert _apply_cooldown(times, cooldowns).tolist() == _naive_cooldown(times, cooldowns)
+
+
+def test_trigger_mask_counts_and_posts_on_fixed_series():
+    # Price moves above 5% for the first 4 hours only; one point has no value
+    change = [6.0] * 16 + [1.0] * 8
+    change[3] = None
+    result = backtest_agent(_agent(), _series(price_change=change))
+    assert result.triggers == 15
+    assert result.posts == 4
+    assert [t - T0 for t in result.post_times] == [0.0, 4500.0, 9000.0, 13500.0]
+    assert result.post_type_shares == {"insight": 0.75, "meme": 0.25}
+
+
+def test_agent_specific_rules_only_fire_for_their_agent():
+    series = _series(fear_greed_index=80.0)
+    assert backtest_agent(_agent("grok_crypto"), series).triggers == 24
+    assert backtest_agent(_agent("other"), series).triggers == 0
+    # Thresholds come from the agent's strategy.triggers
+    assert backtest_agent(_agent("grok_crypto", triggers={"extreme_greed": 85}), series).triggers == 0
+
+
+def test_posting_hours_limit_and_peak_hours_shorten_cooldown():
+    series = _series(price_change=6.0)
+    active = PostingHours(active_hours=(0, 3))
+    assert backtest_agent(_agent(), series, active).posts == 3
+
+    peak = PostingHours(peak_hours=[0, 1, 2, 3, 4, 5], peak_cooldown_factor=0.5)
+    # 30 minute cooldown at peak: a post every 45 minutes
+    assert backtest_agent(_agent(), series, peak).posts == 8
+
+
+def test_engagement_model_shrinks_sparse_arms_toward_parent_means():
+    model = EngagementModel(prior_samples=5.0)
+    for _ in range(5):
+        model.add({"agent_id": "a", "post_type": "insight", "engagement": 10.0, "ts": T0 + 12 * 3600})
+        model.add({"agent_id": "b", "post_type": "insight", "engagement": 0.0, "ts": T0})
+
+    hours = np.array([12, 0, 6])
+    # Agent a: (5*10 + 5*5) / 10 = 7.5; its insight arm: (5*10 + 5*7.5) / 10 = 8.75
+    # Hour 12: 7.5 / 5 = 1.5, hour 0: 2.5 / 5 = 0.5, hours without posts: 1.0
+    assert model.expected("a", [("insight", 1.0)], hours) == pytest.approx([13.125, 4.375, 8.75])
+    # An arm without posts sits at the agent's mean
+    assert model.expected("a", [("insight", 1.0), ("meme", 1.0)], hours[2:]) == pytest.approx([8.125])
+    assert model.expected("new", [], hours[2:]) == pytest.approx([5.0])
+
+
+def test_engagement_model_without_posts_expects_nothing():
+    assert EngagementModel().expected("a", [("insight", 1.0)], np.array([1, 2])).tolist() == [0.0, 0.0]
+    assert backtest_agent(_agent(), _series(price_change=6.0)).expected_engagement.tolist() == [0.0] * 5
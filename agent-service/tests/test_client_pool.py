@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+from client_pool import ClientPool
+
+LATER = time.monotonic() + 3600
+
+
+class _Client:
+    def __init__(self, built):
+        built.append(self)
+        self.closed = False
+        self.model = "default"
+        self.during_call = None
+
+    def generate_text(self, prompt):
+        if self.during_call:
+            self.during_call()
+        return f"{id(self)}: {prompt}"
+
+    async def agenerate_text(self, prompt):
+        await asyncio.sleep(0)
+        if self.during_call:
+            self.during_call()
+        return f"{id(self)}: {prompt}"
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(built, idle_timeout=60.0):
+    # Keep the background reaper out of the way; tests call reap() directly
+    pool = ClientPool(idle_timeout=idle_timeout, reap_interval=3600.0)
+    return pool, pool.get(("llm", "openai"), lambda: _Client(built))
+
+
+def test_client_is_built_lazily_and_shared_per_key():
+    built = []
+    pool, handle = _pool(built)
+    assert built == [] and len(pool) == 0
+    assert pool.get(("llm", "openai"), lambda: _Client(built)) is handle
+
+    handle.generate_text("a")
+    handle.generate_text("b")
+    assert len(built) == 1 and len(pool) == 1
+    assert handle.model == "default"
+    pool.close()
+    assert built[0].closed
+
+
+def test_in_flight_call_blocks_reap():
+    built = []
+    pool, handle = _pool(built)
+    reaped = []
+    handle.generate_text("warm up")
+    built[0].during_call = lambda: reaped.append(pool.reap(now=LATER))
+
+    handle.generate_text("hi")
+    assert reaped == [0]
+    assert not built[0].closed
+    pool.close()
+
+
+def test_recently_used_client_is_not_reaped():
+    built = []
+    pool, handle = _pool(built)
+    handle.generate_text("hi")
+    assert pool.reap() == 0
+    assert handle.is_open
+    pool.close()
+
+
+def test_reaped_client_is_rebuilt_on_next_call():
+    built = []
+    pool, handle = _pool(built)
+    first = handle.generate_text("hi")
+    assert pool.reap(now=LATER) == 1
+    assert built[0].closed and not handle.is_open and len(pool) == 0
+
+    second = handle.generate_text("hi")
+    assert len(built) == 2 and first != second
+    assert second.startswith(str(id(built[1])))
+    pool.close()
+
+
+def test_async_methods_stay_async_and_count_as_in_flight():
+    built = []
+    pool, handle = _pool(built)
+    reaped = []
+
+    async def main():
+        await handle.agenerate_text("warm up")
+        built[0].during_call = lambda: reaped.append(pool.reap(now=LATER))
+        return await handle.agenerate_text("hi")
+
+    assert asyncio.iscoroutinefunction(handle.agenerate_text)
+    assert asyncio.run(main()).endswith("hi")
+    assert reaped == [0]
+    assert pool.reap(now=LATER) == 1
+    # The cached wrapper resolves the rebuilt client
+    assert asyncio.run(handle.agenerate_text("again")).startswith(str(id(built[1])))
+    pool.close()
+
+
+def test_from_config_derives_reap_interval_from_idle_timeout():
+    pool = ClientPool.from_config({"client_idle_seconds": 30})
+    assert pool.idle_timeout == 30.0
+    assert pool.reap_interval == 15.0
+    assert ClientPool.from_config({}).reap_interval == 60.0
@@ -0,0 +1,139 @@
+import os
+
+import pytest
+import yaml
+
+from config_compiler import ConfigError, ConfigWatcher, WeightedTable, compile_agent_config, compile_config
+
+
+def _agent(agent_id="a", **overrides):
+    agent = {
+        "id": agent_id,
+        "name": "Agent",
+        "llm_provider": "openai",
+        "x_username": agent_id,
+        "system_prompt": "You post about crypto.",
+        "personality": {"archetype": "analyst", "tone": "calm"},
+        "strategy": {"post_types": [{"type": "insight", "weight": 2, "templates": ["{topic}"]}]},
+    }
+    agent.update(overrides)
+    return agent
+
+
+def _write(path, agents):
+    path.write_text(yaml.safe_dump({"agents": agents}))
+    return str(path)
+
+
+class _Rng:
+    def __init__(self, value):
+        self.value = value
+
+    def uniform(self, low, high):
+        return self.value
+
+
+def test_compile_agent_config_fills_defaults():
+    compiled = compile_agent_config(_agent(), {})
+    assert compiled.model == "default"
+    assert compiled.playbook is None
+    assert compiled.post_types.items[0].templates == ("{topic}",)
+    with pytest.raises(TypeError):
+        compiled.personality["tone"] = "loud"
+
+
+@pytest.mark.parametrize(
+    "overrides, message",
+    [
+        ({"x_username": ""}, "missing required field 'x_username'"),
+        ({"personality": {"archetype": "analyst"}}, "missing required field 'tone'"),
+        ({"strategy": {"post_types": [{"type": "insight", "weight": 0, "templates": ["t"]}]}}, "positive weight"),
+        ({"strategy": {"post_types": [{"type": "insight", "weight": 1, "templates": []}]}}, "no templates"),
+    ],
+)
+def test_compile_agent_config_rejects_invalid_entries(overrides, message):
+    with pytest.raises(ConfigError, match=message):
+        compile_agent_config(_agent(**overrides), {})
+
+
+def test_compile_config_rejects_empty_and_duplicate_agents(tmp_path):
+    with pytest.raises(ConfigError, match="no agents defined"):
+        compile_config(_write(tmp_path / "empty.yaml", []))
+    with pytest.raises(ConfigError, match="duplicate agent ids"):
+        compile_config(_write(tmp_path / "dupes.yaml", [_agent("a"), _agent("a")]))
+
+
+def test_weighted_table_picks_by_cumulative_weight():
+    table = WeightedTable.build(("x", "y", "z"), [1.0, 3.0, 1.0])
+    assert table.cumulative == (1.0, 4.0, 5.0)
+    assert table.total == 5.0
+    assert table.pick(_Rng(0.5)) == "x"
+    assert table.pick(_Rng(1.0)) == "y"
+    assert table.pick(_Rng(3.9)) == "y"
+    assert table.pick(_Rng(4.5)) == "z"
+    # uniform() may return the upper bound itself
+    assert table.pick(_Rng(5.0)) == "z"
+
+
+def test_weighted_table_defaults_to_item_weights():
+    compiled = compile_agent_config(
+        _agent(
+            strategy={
+                "post_types": [
+                    {"type": "insight", "weight": 1, "templates": ["t"]},
+                    {"type": "meme", "weight": 4, "templates": ["t"]},
+                ]
+            }
+        ),
+        {},
+    )
+    assert compiled.post_types.cumulative == (1.0, 5.0)
+    assert compiled.post_types.pick(_Rng(2.0)).type == "meme"
+
+
+def _touch(path, watcher):
+    # Bump mtime past the watcher's last stat, however coarse the filesystem clock
+    mtime = watcher._mtimes[0] + 10
+    os.utime(path, (mtime, mtime))
+
+
+def test_watcher_reloads_changed_config(tmp_path):
+    path = _write(tmp_path / "agents.yaml", [_agent("a")])
+    watcher = ConfigWatcher(path, check_interval=0.0)
+    assert watcher.poll() is None
+
+    _write(tmp_path / "agents.yaml", [_agent("a"), _agent("b")])
+    _touch(path, watcher)
+    reloaded = []
+    compiled = watcher.poll(on_reload=reloaded.append)
+    assert [agent.id for agent in compiled.agents] == ["a", "b"]
+    assert reloaded == [compiled]
+    assert watcher.current is compiled
+    assert watcher.poll() is None
+
+
+def test_watcher_keeps_previous_config_when_reload_fails(tmp_path):
+    path = _write(tmp_path / "agents.yaml", [_agent("a")])
+    watcher = ConfigWatcher(path, check_interval=0.0)
+    previous = watcher.current
+
+    _write(tmp_path / "agents.yaml", [_agent("a", system_prompt="")])
+    _touch(path, watcher)
+    reloaded = []
+    assert watcher.poll(on_reload=reloaded.append) is None
+    assert watcher.current is previous
+    assert reloaded == []
+
+    # A fixed file is picked up on the next change
+    _write(tmp_path / "agents.yaml", [_agent("b")])
+    _touch(path, watcher)
+    assert watcher.poll().agents[0].id == "b"
+
+
+def test_watcher_waits_for_check_interval(tmp_path):
+    path = _write(tmp_path / "agents.yaml", [_agent("a")])
+    watcher = ConfigWatcher(path, check_interval=3600.0)
+    _write(tmp_path / "agents.yaml", [_agent("b")])
+    _touch(path, watcher)
+    assert watcher.poll() is None
+    assert watcher.current.agents[0].id == "a"
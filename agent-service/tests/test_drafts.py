@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from drafts import CompletionCache, Draft, DraftPool, context_fingerprint
+from enhanced_agent import AgentManager
+
+CONTEXT = {
+    "btc_price": 60_000.0,
+    "price_change_24h": 2.4,
+    "sentiment": "bullish",
+    "latest_news": "ETF inflows",
+    "trending_topics": ["Bitcoin", "ETF"],
+}
+
+
+def test_fingerprint_buckets_small_price_moves_together():
+    assert context_fingerprint(CONTEXT) == context_fingerprint({**CONTEXT, "btc_price": 60_100.0})
+    assert context_fingerprint(CONTEXT) != context_fingerprint({**CONTEXT, "btc_price": 61_500.0})
+    assert context_fingerprint(CONTEXT) == context_fingerprint({**CONTEXT, "price_change_24h": 2.1})
+    assert context_fingerprint(CONTEXT) != context_fingerprint({**CONTEXT, "latest_news": "Exchange hacked"})
+
+
+def test_fingerprint_tolerates_missing_or_bad_values():
+    fingerprint = context_fingerprint({"btc_price": "n/a", "price_change_24h": None})
+    assert fingerprint[:2] == (None, None)
+
+
+def test_draft_is_served_only_for_its_fingerprint_and_age():
+    pool = DraftPool(per_type=2, max_age=timedelta(minutes=30))
+    fingerprint = pool.fingerprint(CONTEXT)
+    pool.put(Draft("old", "insight", "t", fingerprint, created_at=0.0))
+    pool.put(Draft("fresh", "insight", "t", fingerprint, created_at=1700.0))
+    assert pool.missing("insight", fingerprint, now=1800.0) == 1
+    assert pool.take("insight", fingerprint, now=1800.0).text == "fresh"
+    assert pool.take("insight", fingerprint, now=1800.0) is None
+    assert len(pool) == 0
+
+
+def test_fingerprint_mismatch_drops_stale_drafts():
+    pool = DraftPool()
+    fingerprint = pool.fingerprint(CONTEXT)
+    pool.put(Draft("text", "insight", "t", fingerprint, created_at=0.0))
+    moved = pool.fingerprint({**CONTEXT, "sentiment": "bearish"})
+    assert pool.take("insight", moved, now=1.0) is None
+    assert len(pool) == 0
+
+
+def test_completion_cache_evicts_least_recently_used():
+    cache = CompletionCache(max_entries=2)
+    cache.put("sys", "a", "A")
+    cache.put("sys", "b", "B")
+    assert cache.get("sys", "a") == "A"
+    cache.put("sys", "c", "C")
+    assert cache.get("sys", "b") is None
+    assert cache.get("sys", "a") == "A"
+    assert cache.get("other", "a") is None
+    assert len(cache) == 2
+
+
+def test_completion_cache_entries_expire():
+    cache = CompletionCache(ttl=timedelta(0))
+    cache.put("sys", "a", "A")
+    assert cache.get("sys", "a") is None
+    assert len(cache) == 0
+
+
+def test_prefilled_draft_is_served_on_next_post(config_path):
+    manager = AgentManager(config_path)
+    agent = manager.agents[0]
+    assert agent.draft_pool is not None
+    # In cooldown, ending before drafts expire, whatever the time of day
+    agent.posting_hours = None
+    agent.next_post_time = lambda: datetime.now() + timedelta(minutes=10)
+
+    async def prefill():
+        assert manager.prefill_drafts(CONTEXT) == 1
+        await asyncio.gather(*manager._prefill_tasks)
+
+    asyncio.run(prefill())
+    drafted = {draft.text for drafts in agent.draft_pool._drafts.values() for draft in drafts}
+    assert drafted and not agent.wants_drafts(CONTEXT)
+
+    content = agent.generate_post_content({**CONTEXT, "btc_price": 60_050.0})
+    assert content in drafted
+    assert agent.pending_post_info["type"] in agent.draft_pool._drafts
+    assert len(agent.draft_pool) == len(drafted) - 1
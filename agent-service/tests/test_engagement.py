@@ -0,0 +1,107 @@
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+
+from engagement import ArmStats, EngagementCollector, RunningStats, adaptive_weights
+
+NOW = datetime(2026, 1, 2, 12, 0)
+
+
+class _Client:
+    def __init__(self, likes=10):
+        self.likes = likes
+        self.batches = []
+
+    def get_tweets(self, tweet_ids):
+        self.batches.append(list(tweet_ids))
+        return [{"id": t, "public_metrics": {"like_count": self.likes, "impression_count": 1000}} for t in tweet_ids]
+
+
+def _stats(values):
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+def test_running_stats_match_batch_statistics():
+    values = [3.0, 7.0, 7.0, 19.0, 24.0]
+    stats = _stats(values)
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.variance == pytest.approx(statistics.variance(values))
+
+
+def test_running_stats_replace_equals_recompute():
+    stats = _stats([3.0, 7.0, 19.0])
+    stats.replace(7.0, 11.0)
+    expected = _stats([3.0, 11.0, 19.0])
+    assert stats.mean == pytest.approx(expected.mean)
+    assert stats.variance == pytest.approx(expected.variance)
+    assert RunningStats.from_state(stats.state()).as_dict() == stats.as_dict()
+
+
+def test_refresh_batches_by_100_rotating_over_agent_clients():
+    collector = EngagementCollector(track_window=timedelta(hours=48))
+    a, b = _Client(), _Client()
+    collector.add_client("a", a)
+    collector.add_client("b", b)
+    for i in range(250):
+        collector.track("a" if i % 2 else "b", str(i), "insight", None, NOW - timedelta(hours=1))
+    collector.track("a", "old", "insight", None, NOW - timedelta(hours=49))
+
+    assert collector.refresh(NOW) == 250
+    assert [len(batch) for batch in a.batches] == [100, 50]
+    assert [len(batch) for batch in b.batches] == [100]
+    assert all("old" not in batch for batch in a.batches + b.batches)
+    assert collector.stats("a").engagement.n == 125
+
+
+def test_refresh_replaces_a_posts_previous_metrics():
+    collector = EngagementCollector()
+    client = _Client(likes=10)
+    collector.add_client("a", client)
+    collector.track("a", "1", "insight", "t1", NOW)
+    collector.refresh(NOW)
+    client.likes = 30
+    collector.refresh(NOW)
+    arm = collector.stats("a", "insight", "t1")
+    assert arm.engagement.n == 1
+    assert arm.engagement.mean == 30.0
+
+
+def test_export_and_restore_do_not_double_count_tracked_posts():
+    collector = EngagementCollector()
+    client = _Client(likes=10)
+    collector.add_client("a", client)
+    collector.track("a", "1", "insight", None, NOW)
+    collector.track("a", "2", "meme", None, NOW)
+    collector.refresh(NOW)
+    saved = collector.export("a")
+
+    restarted = EngagementCollector()
+    restarted.add_client("a", client)
+    restarted.restore("a", saved)
+    assert restarted.stats("a").engagement.n == 2
+    # Only post 1 is still in the agent's recent history
+    restarted.track("a", "1", "insight", None, NOW)
+    client.likes = 20
+    restarted.refresh(NOW)
+    assert restarted.stats("a").engagement.n == 2
+    assert restarted.stats("a", "insight").engagement.mean == 20.0
+    assert restarted.summary("a")["by_post_type"]["meme"]["engagement"]["mean"] == 10.0
+
+
+def test_adaptive_weights_are_neutral_without_data():
+    base = [("x", 2.0), ("y", 1.0)]
+    assert adaptive_weights(base, [None, None]) == [2.0, 1.0]
+
+
+def test_adaptive_weights_favour_better_arms_within_clamps():
+    winner = ArmStats(_stats([100.0] * 50), RunningStats())
+    loser = ArmStats(_stats([1.0, 2.0] * 25), RunningStats())
+    weights = adaptive_weights([("w", 1.0), ("l", 1.0), ("new", 1.0)], [winner, loser, None], strength=10.0)
+    assert weights[0] == 4.0
+    assert weights[1] == 0.25
+    # An arm with no samples sits at the pooled mean
+    assert weights[2] == pytest.approx(1.0)
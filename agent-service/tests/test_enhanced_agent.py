@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from async_clients import AsyncLLMClient, AsyncXClient
+from config_compiler import compile_config
+from enhanced_agent import EnhancedAIAgent
+from rate_control import ClaimRegistry
+
+
+class _FixedTimelines:
+    """
+    Serves each account's first fetched timeline again on every later fetch.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.timelines = {}
+
+    def get_user_tweets(self, user_id, max_results=10):
+        if user_id not in self.timelines:
+            self.timelines[user_id] = self.client.get_user_tweets(user_id=user_id, max_results=max_results)
+        return self.timelines[user_id]
+
+
+@pytest.fixture
+def agent():
+    agent = EnhancedAIAgent(compile_config("agent_config.yaml").agents[0])
+    agent.x_client = _FixedTimelines(agent.x_client)
+    return agent
+
+
+def test_reply_opportunity_is_claimed_for_the_agent(agent):
+    claims = ClaimRegistry()
+    opportunity = agent.find_reply_opportunity(claims)
+    assert opportunity is not None
+    tweet_id = str(opportunity["tweet"]["id"])
+    assert not claims.claim(tweet_id, "someone_else")
+
+
+def test_answered_tweet_is_not_offered_again_after_target_cooldown(agent, monkeypatch):
+    claims = ClaimRegistry()
+    first = agent.find_reply_opportunity(claims)
+    tweet = first["tweet"]
+    agent._record_reply(tweet, "reply", {"id": "r1"}, first["target_user"].user_id)
+    assert agent.has_replied_to(tweet["id"])
+
+    # Per-target cooldown over; the agent still holds the claim on the tweet it answered
+    monkeypatch.setattr(agent.reply_control, "can_reply_to", lambda user_id: True)
+    second = agent.find_reply_opportunity(claims)
+    assert second is not None
+    assert str(second["tweet"]["id"]) != str(tweet["id"])
+
+
+class _LLM:
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.prompts = []
+
+    def generate_text(self, system_prompt, user_prompt):
+        self.prompts.append(user_prompt)
+        return self.texts.pop(0)
+
+
+class _X:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def post_tweet(self, text):
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return {"id": "t1"}
+
+    def post_reply(self, tweet_id, content):
+        return {"id": "r1"}
+
+
+def _saturate(agent, text):
+    for _ in range(agent.content_index.max_similar_per_window):
+        agent.content_index.add(text, agent.id)
+
+
+def _call(agent, method, *args, use_async=False):
+    if use_async:
+        return asyncio.run(getattr(agent, f"a{method}")(*args))
+    return getattr(agent, method)(*args)
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "async"])
+def use_async(request):
+    return request.param
+
+
+def test_repetitive_post_is_regenerated(agent, use_async):
+    _saturate(agent, "gm, BTC looks strong today")
+    agent.llm_client = _LLM(["gm, BTC looks strong today", "Funding flipped negative while spot bid held"])
+    agent.async_llm = AsyncLLMClient(agent.llm_client)
+    content = _call(agent, "generate_post_content", {"btc_price": 60_000}, use_async=use_async)
+    assert content == "Funding flipped negative while spot bid held"
+    assert len(agent.llm_client.prompts) == 2
+    assert agent.performance_metrics["rejected_drafts"] == 1
+
+
+def test_reply_content_is_dropped_when_every_draft_repeats(agent, use_async):
+    _saturate(agent, "Great point on liquidity")
+    attempts = 1 + agent.content_index.max_regenerations
+    agent.llm_client = _LLM(["Great point on liquidity"] * attempts)
+    agent.async_llm = AsyncLLMClient(agent.llm_client)
+    tweet = {"id": "1", "text": "Liquidity is thin", "author_username": "someone"}
+    assert _call(agent, "generate_reply_content", tweet, use_async=use_async) == ""
+    assert agent.performance_metrics["rejected_drafts"] == attempts
+
+
+def test_post_tweet_records_success_and_survives_errors(agent, use_async):
+    agent.x_client = _X(fail=True)
+    agent.async_x = AsyncXClient(agent.x_client)
+    assert _call(agent, "post_tweet", "hello", use_async=use_async) is False
+    assert agent.performance_metrics["total_posts"] == 0
+
+    agent.x_client.fail = False
+    assert _call(agent, "post_tweet", "hello", use_async=use_async) is True
+    assert agent.recent_posts[-1]["tweet_id"] == "t1"
+    assert agent.performance_metrics["total_posts"] == 1
+
+
+def test_reply_respects_target_cooldown(agent, use_async, monkeypatch):
+    agent.x_client = _X()
+    agent.async_x = AsyncXClient(agent.x_client)
+    tweet = {"id": "1", "author_id": "u1"}
+    monkeypatch.setattr(agent.reply_control, "can_reply_to", lambda user_id: False)
+    assert _call(agent, "reply_to_tweet", tweet, "reply", use_async=use_async) is False
+
+    monkeypatch.setattr(agent.reply_control, "can_reply_to", lambda user_id: True)
+    assert _call(agent, "reply_to_tweet", tweet, "reply", use_async=use_async) is True
+    assert agent.has_replied_to("1")
@@ -0,0 +1,50 @@
+from benchmarks.harness import compare
+
+BASELINE = {
+    "latency_scale": 0.1,
+    "seed": 7,
+    "results": [
+        {
+            "scenario": "run_cycle",
+            "agents": 4,
+            "cycles": 3,
+            "wall_seconds_mean": 1.0,
+            "api_calls_per_cycle": 20.0,
+            "llm_calls_per_cycle": 4.0,
+            "peak_memory_mb": 2.0,
+        }
+    ],
+}
+
+
+def _result(**settings):
+    result = {
+        "scenario": "run_cycle",
+        "agents": 4,
+        "cycles": 3,
+        "latency_scale": 0.1,
+        "seed": 7,
+        "wall_seconds_mean": 1.5,
+        "api_calls_per_cycle": 20.0,
+        "llm_calls_per_cycle": 4.0,
+        "peak_memory_mb": 2.0,
+    }
+    result.update(settings)
+    return result
+
+
+def test_matching_settings_are_compared():
+    (line,) = compare([_result()], BASELINE, tolerance=0.2)
+    assert "wall_seconds_mean=1.5 (+50%) REGRESSION" in line
+    assert "api_calls_per_cycle=20.0 (+0%) " in line
+
+
+def test_differing_run_settings_are_not_compared():
+    lines = compare([_result(cycles=10), _result(latency_scale=1.0, seed=1)], BASELINE, tolerance=0.2)
+    assert lines[0].endswith("(not compared: baseline ran with cycles=3)")
+    assert lines[1].endswith("(not compared: baseline ran with latency_scale=0.1 seed=7)")
+    assert not any("REGRESSION" in line for line in lines)
+
+
+def test_result_without_baseline_entry():
+    assert compare([_result(agents=40)], BASELINE, tolerance=0.2)[0].endswith("(no baseline)")
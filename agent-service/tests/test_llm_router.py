@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_router import CircuitBreaker, LLMDeadlineExceeded, LLMRouter, LLMUnavailable
+
+
+class _Client:
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_text(self, system_prompt, user_prompt):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return f"{self.name}: {user_prompt}"
+
+
+def _router(clients, **kwargs):
+    kwargs.setdefault("backups", {"openai": "gemini"})
+    return LLMRouter(clients.__getitem__, **kwargs)
+
+
+def test_fast_primary_is_not_hedged():
+    clients = {"openai": _Client("openai"), "gemini": _Client("gemini")}
+    router = _router(clients, hedge_after=1.0)
+    assert router.generate_text("openai", "sys", "hi") == "openai: hi"
+    assert clients["gemini"].calls == 0
+    assert router.stats()["openai"]["samples"] == 1
+
+
+def test_slow_primary_is_hedged_to_backup():
+    clients = {"openai": _Client("openai", delay=0.5), "gemini": _Client("gemini")}
+    router = _router(clients, hedge_after=0.05)
+    assert router.generate_text("openai", "sys", "hi") == "gemini: hi"
+    assert clients["openai"].calls == 1
+    router.close()
+
+
+def test_failed_primary_hedges_immediately():
+    clients = {"openai": _Client("openai", fail=True), "gemini": _Client("gemini")}
+    router = _router(clients, hedge_after=10.0)
+    started = time.monotonic()
+    assert router.generate_text("openai", "sys", "hi") == "gemini: hi"
+    assert time.monotonic() - started < 1.0
+
+
+def test_open_circuit_falls_back_then_raises_without_backup():
+    clients = {"openai": _Client("openai", fail=True), "gemini": _Client("gemini", fail=True)}
+    router = _router(clients, failure_threshold=2, reset_timeout=60.0)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            router.generate_text("openai", "sys", "hi")
+    assert router.breaker("openai").state == "open"
+    assert router.breaker("gemini").state == "open"
+    calls = clients["openai"].calls
+    with pytest.raises(LLMUnavailable):
+        router.generate_text("openai", "sys", "hi")
+    assert clients["openai"].calls == calls
+
+
+def test_open_circuit_routes_to_backup():
+    clients = {"openai": _Client("openai", fail=True), "gemini": _Client("gemini")}
+    router = _router(clients, failure_threshold=1, hedge_after=10.0)
+    router.breaker("openai").record_failure()
+    assert router.generate_text("openai", "sys", "hi") == "gemini: hi"
+    assert clients["openai"].calls == 0
+
+
+def test_deadline_exceeded_without_backup():
+    clients = {"qwen": _Client("qwen", delay=0.3)}
+    router = _router(clients, deadline=0.05)
+    with pytest.raises(LLMDeadlineExceeded):
+        router.generate_text("qwen", "sys", "hi")
+    router.close()
+
+
+def test_breaker_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    assert breaker.record_failure()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_async_slow_primary_is_hedged_to_backup():
+    clients = {"openai": _Client("openai", delay=0.5), "gemini": _Client("gemini")}
+    router = _router(clients, hedge_after=0.05)
+    assert asyncio.run(router.agenerate_text("openai", "sys", "hi")) == "gemini: hi"
+
+
+def test_async_deadline_exceeded_opens_breaker():
+    clients = {"qwen": _Client("qwen", delay=0.3)}
+    router = _router(clients, deadline=0.05, failure_threshold=1)
+
+    async def main():
+        with pytest.raises(LLMDeadlineExceeded):
+            await router.agenerate_text("qwen", "sys", "hi")
+        # The timed-out attempt records its failure in the background
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert router.breaker("qwen").state == "open"
+
+
+def test_from_config_accepts_provider_names_and_mappings():
+    router = LLMRouter.from_config(
+        {"enabled": True, "backups": {"openai": "gemini", "qwen": {"provider": "openai"}}}, lambda provider: None
+    )
+    assert router.backups == {"openai": "gemini", "qwen": "openai"}
+    assert LLMRouter.from_config({}, lambda provider: None) is None
+
+
+def test_cancelled_probe_lets_the_next_call_probe():
+    clients = {"qwen": _Client("qwen", delay=0.3)}
+    router = _router(clients, failure_threshold=1, reset_timeout=0.05)
+    router.breaker("qwen").record_failure()
+    time.sleep(0.06)
+
+    async def main():
+        probe = asyncio.ensure_future(router.agenerate_text("qwen", "sys", "hi"))
+        await asyncio.sleep(0.02)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(main())
+    breaker = router.breaker("qwen")
+    assert breaker.state == "half_open"
+    assert breaker.allow()
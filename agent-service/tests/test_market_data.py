@@ -0,0 +1,66 @@
+import pytest
+
+from market_data import MarketIngester, SourceAdapter
+
+
+def _ingester() -> MarketIngester:
+    ingester = MarketIngester([], window_ticks=10)
+    ingester.watch([("price_change", ">", 5.0), ("volume_spike", ">", 2.0)])
+    return ingester
+
+
+def test_source_adapter_is_abstract():
+    with pytest.raises(TypeError):
+        SourceAdapter()
+
+
+def test_price_crossing_threshold_notifies_once():
+    ingester = _ingester()
+    events = []
+    ingester.subscribe(events.append)
+    ingester.ingest([{"type": "tick", "price": 100.0}])
+    ingester.ingest([{"type": "tick", "price": 103.0}])
+    assert events == []
+    ingester.ingest([{"type": "tick", "price": 106.0}])
+    assert events == [{"price_change": 6.0}]
+    # Staying above the threshold is not a new crossing
+    ingester.ingest([{"type": "tick", "price": 107.0}])
+    assert len(events) == 1
+
+
+def test_volume_spike_crossing_notifies():
+    ingester = _ingester()
+    events = []
+    ingester.subscribe(events.append)
+    for volume in (100.0, 100.0, 120.0):
+        ingester.ingest([{"type": "tick", "volume": volume}])
+    assert events == []
+    ingester.ingest([{"type": "tick", "volume": 400.0}])
+    assert len(events) == 1
+    assert events[0]["volume_spike"] > 2.0
+
+
+def test_relevant_news_notifies_once_per_update_with_top_headline():
+    ingester = _ingester()
+    ingester.watch([("news_relevance", ">", 7.0)])
+    events = []
+    ingester.subscribe(events.append)
+    ingester.ingest([
+        {"type": "news", "title": "ETF approved", "relevance": 9},
+        {"type": "news", "title": "Minor listing", "relevance": 5},
+    ])
+    assert events == [{"news_relevance": 9.0, "latest_news": "ETF approved"}]
+    # A later relevant headline wakes agents again while the first is still live
+    ingester.ingest([{"type": "news", "title": "Exchange hacked", "relevance": 8}])
+    assert len(events) == 2
+    assert events[1]["news_relevance"] == 9.0
+
+
+def test_routine_news_does_not_notify():
+    ingester = _ingester()
+    ingester.watch([("news_relevance", ">", 7.0)])
+    events = []
+    ingester.subscribe(events.append)
+    ingester.ingest([{"type": "news", "title": "Weekly recap", "relevance": 5}])
+    assert events == []
+    assert ingester.snapshot()["latest_news"] == "Weekly recap"
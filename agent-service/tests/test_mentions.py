@@ -0,0 +1,83 @@
+import time
+
+from account_index import AccountIndex
+from mentions import MentionsPoller
+from rate_limiter import RateLimitedXClient, RequestScheduler
+from x_discovery import XDiscovery
+
+USERS_ENDPOINT = "GET /2/users"
+
+
+class _Client:
+    def __init__(self, mentions):
+        self.last_response_headers = None
+        self.mentions = mentions
+        self.looked_up = []
+
+    def get_mentions(self, max_results=100, since_id=None):
+        return self.mentions
+
+    def get_users(self, user_ids):
+        self.looked_up.extend(user_ids)
+        return [{"id": u, "username": f"user{u}", "public_metrics": {"followers_count": int(u[1:])}} for u in user_ids]
+
+
+class _ReplyControl:
+    def can_reply_to(self, user_id):
+        return True
+
+
+class _Agent:
+    def __init__(self, agent_id, mentions, scheduler, index):
+        self.id = agent_id
+        self.x_username = agent_id
+        self.raw_client = _Client(mentions)
+        self.x_client = RateLimitedXClient(self.raw_client, scheduler, credential=agent_id)
+        self.discovery = XDiscovery(self.x_client, account_index=index)
+        self.reply_control = _ReplyControl()
+        self.replied = set()
+
+    def has_replied_to(self, tweet_id):
+        return tweet_id in self.replied
+
+
+def _poll(poller):
+    return poller.poll_due(now=time.monotonic() + 3600)
+
+
+def test_authors_are_resolved_with_each_agents_credential_at_read_priority():
+    scheduler = RequestScheduler()
+    index = AccountIndex()
+    a = _Agent("a", [{"id": "11", "author_id": "u500"}, {"id": "12", "author_id": "u20000"}], scheduler, index)
+    b = _Agent("b", [{"id": "21", "author_id": "u20000"}, {"id": "22", "author_id": "u7"}], scheduler, index)
+    # Below the discovery reserve: a discovery-priority lookup would be shed
+    for agent in (a, b):
+        scheduler.bucket(agent.id, USERS_ENDPOINT).tokens = 10
+
+    poller = MentionsPoller(priority_followers=10_000)
+    woken = []
+    poller.subscribe(woken.append)
+    poller.track(a)
+    poller.track(b)
+
+    assert _poll(poller) == 4
+    assert sorted(a.raw_client.looked_up + b.raw_client.looked_up) == ["u20000", "u500", "u7"]
+    # Each author is fetched once, by whichever agent's lookup ran first
+    assert len(set(a.raw_client.looked_up) & set(b.raw_client.looked_up)) == 0
+    assert poller.pending("a") == 2 and poller.pending("b") == 2
+    assert sorted(woken) == ["a", "b"]
+    assert poller.take("a").reach == 20_000
+
+
+def test_take_skips_tweets_the_agent_already_answered():
+    index = AccountIndex()
+    agent = _Agent("a", [{"id": "11", "author_id": "u900"}, {"id": "12", "author_id": "u100"}], RequestScheduler(), index)
+    poller = MentionsPoller()
+    poller.track(agent)
+    _poll(poller)
+
+    agent.replied.add("11")
+    assert poller.take("a").tweet_id == "12"
+    assert poller.take("a") is None
+    assert poller.pending("a") == 0
+    assert poller.pending("unknown") == 0
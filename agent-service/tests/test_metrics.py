@@ -0,0 +1,43 @@
+import pickle
+
+from metrics import MetricsRegistry, NullMetrics
+
+
+def test_drain_resets_and_merge_adds_into_another_registry():
+    worker = MetricsRegistry()
+    worker.inc("agent_errors_total", agent="a")
+    worker.inc("agent_errors_total", 2, agent="a")
+    worker.observe("llm_generate_seconds", 0.2, provider="openai")
+
+    coordinator = MetricsRegistry()
+    coordinator.inc("agent_errors_total", agent="a")
+    coordinator.observe("llm_generate_seconds", 3.0, provider="openai")
+    # Payloads cross a pipe between processes
+    coordinator.merge(pickle.loads(pickle.dumps(worker.drain())))
+
+    assert worker.drain() == {"counters": {}, "histograms": {}}
+    snapshot = coordinator.snapshot()
+    assert snapshot["counters"]["agent_errors_total"] == [{"labels": {"agent": "a"}, "value": 4.0}]
+    (histogram,) = snapshot["histograms"]["llm_generate_seconds"]
+    assert histogram["count"] == 2
+    assert histogram["sum"] == 3.2
+    assert histogram["p50"] == 0.25
+
+
+def test_merge_creates_series_missing_from_the_target():
+    worker = MetricsRegistry()
+    worker.inc("mention_polls_total", agent="b")
+    worker.observe("context_fetch_seconds", 0.001)
+
+    coordinator = MetricsRegistry()
+    coordinator.merge(worker.drain())
+
+    assert 'mention_polls_total{agent="b"} 1.0' in coordinator.render_prometheus()
+    assert coordinator.snapshot()["histograms"]["context_fetch_seconds"][0]["count"] == 1
+
+
+def test_disabled_registry_drains_nothing():
+    null = NullMetrics()
+    null.inc("cycles_total")
+    assert null.drain() == {"counters": {}, "histograms": {}}
+    null.merge(MetricsRegistry().drain())
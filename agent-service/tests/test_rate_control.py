@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from rate_control import ClaimRegistry, ReplyRateControl, WindowCap
+
+T0 = datetime(2026, 1, 1, 12, 0)
+
+
+def test_window_cap_allows_again_once_oldest_event_leaves_window():
+    cap = WindowCap(2, timedelta(hours=1))
+    cap.record(T0)
+    cap.record(T0 + timedelta(minutes=10))
+    assert not cap.allows(T0 + timedelta(minutes=30))
+    assert cap.allows(T0 + timedelta(hours=1))
+    assert cap.count(T0 + timedelta(minutes=65)) == 1
+
+
+def test_window_cap_of_zero_never_allows():
+    assert not WindowCap(0, timedelta(hours=1)).allows(T0)
+
+
+def test_window_cap_resize_keeps_newest_events():
+    cap = WindowCap(3, timedelta(hours=1))
+    for minutes in (0, 1, 2):
+        cap.record(T0 + timedelta(minutes=minutes))
+    cap.resize(2)
+    assert list(cap.events) == [T0 + timedelta(minutes=1), T0 + timedelta(minutes=2)]
+    assert not cap.allows(T0 + timedelta(minutes=3))
+
+
+def test_daily_cap_and_next_allowed():
+    control = ReplyRateControl(daily_cap=2)
+    control.record("a", T0)
+    control.record("b", T0 + timedelta(hours=1))
+    assert not control.can_reply(T0 + timedelta(hours=2))
+    assert control.next_allowed(T0 + timedelta(hours=2)) == T0 + timedelta(hours=24)
+    assert control.can_reply(T0 + timedelta(hours=24))
+
+
+def test_same_target_cooldown_and_per_target_limit():
+    control = ReplyRateControl(daily_cap=10, per_target_daily_limit=2, cooldown_same_target=timedelta(minutes=60))
+    control.record("a", T0)
+    assert not control.can_reply_to("a", T0 + timedelta(minutes=30))
+    assert control.can_reply_to("b", T0 + timedelta(minutes=30))
+    control.record("a", T0 + timedelta(minutes=61))
+    assert not control.can_reply_to("a", T0 + timedelta(minutes=200))
+    assert control.can_reply_to("a", T0 + timedelta(hours=24))
+
+
+def test_targets_are_pruned_after_window():
+    control = ReplyRateControl(daily_cap=100, window=timedelta(hours=24))
+    for i in range(50):
+        control.record(f"t{i}", T0)
+    control.record("late", T0 + timedelta(hours=23))
+    control.can_reply_to("x", T0 + timedelta(hours=25))
+    assert list(control._targets) == ["late"]
+
+
+def test_from_settings_takes_stricter_value():
+    control = ReplyRateControl.from_settings(
+        {"daily_reply_cap": 15, "cooldown_minutes_same_target": 30},
+        {"max_replies_per_day": 8, "cooldown_minutes_same_target": 60, "per_target_daily_limit": 3},
+    )
+    assert control.daily.limit == 8
+    assert control.cooldown_same_target == timedelta(minutes=30)
+    assert control.per_target_daily_limit == 3
+
+
+def test_reconfigure_keeps_history():
+    control = ReplyRateControl(daily_cap=3)
+    control.record("a", T0)
+    control.record("b", T0)
+    control.reconfigure(ReplyRateControl(daily_cap=2))
+    assert not control.can_reply(T0 + timedelta(minutes=1))
+
+
+def test_claim_is_exclusive_until_window_passes():
+    claims = ClaimRegistry(window=timedelta(hours=1))
+    assert claims.claim("t1", "a", T0)
+    assert not claims.claim("t1", "b", T0 + timedelta(minutes=30))
+    # The holder may renew its own claim
+    assert claims.claim("t1", "a", T0 + timedelta(minutes=40))
+    assert not claims.claim("t1", "b", T0 + timedelta(minutes=90))
+    assert claims.claim("t1", "b", T0 + timedelta(minutes=101))
+    assert len(claims) == 1
+
+
+def test_release_only_drops_the_holders_claim():
+    claims = ClaimRegistry()
+    claims.claim("t1", "a", T0)
+    claims.release("t1", "b")
+    assert not claims.claim("t1", "b", T0)
+    claims.release("t1", "a")
+    assert claims.claim("t1", "b", T0)
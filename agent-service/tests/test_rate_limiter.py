@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import (
+    PRIORITY_DISCOVERY,
+    PRIORITY_READ,
+    PRIORITY_WRITE,
+    RateLimitedXClient,
+    RateLimitExceeded,
+    RequestScheduler,
+)
+
+ENDPOINT = "GET /2/users/:id/tweets"
+
+
+def make_scheduler(limit: int = 10, window: float = 900, **kwargs) -> RequestScheduler:
+    return RequestScheduler(endpoint_limits={ENDPOINT: (limit, window)}, **kwargs)
+
+
+def test_discovery_is_shed_below_reserve():
+    scheduler = make_scheduler(limit=10, discovery_reserve=0.2)
+    granted = [scheduler.acquire("a", ENDPOINT, PRIORITY_DISCOVERY) for _ in range(10)]
+    # Discovery stops once the bucket is below 20% of capacity
+    assert granted == [True] * 9 + [False]
+    assert scheduler.shed_count == 1
+    # Reads may still use the reserve
+    assert scheduler.acquire("a", ENDPOINT, PRIORITY_READ)
+
+
+def test_budgets_are_per_credential():
+    scheduler = make_scheduler(limit=1, max_wait_seconds={PRIORITY_READ: 0})
+    assert scheduler.acquire("a", ENDPOINT, PRIORITY_READ)
+    assert not scheduler.acquire("a", ENDPOINT, PRIORITY_READ)
+    assert scheduler.acquire("b", ENDPOINT, PRIORITY_READ)
+
+
+def test_writes_are_served_before_waiting_reads():
+    scheduler = make_scheduler(limit=1, window=1, max_wait_seconds={PRIORITY_READ: 0.5, PRIORITY_WRITE: 5})
+    bucket = scheduler.bucket("a", ENDPOINT)
+    bucket.tokens = 0
+    bucket.blocked_until = time.monotonic() + 0.2
+    results = {}
+
+    def acquire(name: str, priority: int) -> None:
+        results[name] = scheduler.acquire("a", ENDPOINT, priority)
+
+    read = threading.Thread(target=acquire, args=("read", PRIORITY_READ))
+    read.start()
+    while not scheduler._waiters.get(("a", ENDPOINT)):
+        time.sleep(0.001)
+    write = threading.Thread(target=acquire, args=("write", PRIORITY_WRITE))
+    write.start()
+    read.join()
+    write.join()
+    # One token comes back at the reset; the later write jumps the queue and the read times out
+    assert results == {"write": True, "read": False}
+
+
+def test_headers_resync_bucket():
+    scheduler = make_scheduler(limit=10, max_wait_seconds={PRIORITY_READ: 0})
+    scheduler.observe_headers("a", ENDPOINT, {"X-Rate-Limit-Remaining": "3", "X-Rate-Limit-Limit": "50"})
+    bucket = scheduler.bucket("a", ENDPOINT)
+    assert bucket.capacity == 50
+    assert bucket.tokens == pytest.approx(3, abs=0.01)
+
+    scheduler.observe_headers("a", ENDPOINT, {"x-rate-limit-remaining": 0, "x-rate-limit-reset": time.time() + 60})
+    assert not scheduler.acquire("a", ENDPOINT, PRIORITY_READ)
+
+
+class _Client:
+    def __init__(self):
+        self.last_response_headers = None
+        self.calls = []
+
+    def get_user_tweets(self, user_id, max_results=10):
+        self.calls.append(user_id)
+        self.last_response_headers = {"x-rate-limit-remaining": 0, "x-rate-limit-reset": time.time() + 60}
+        return [{"id": "1"}]
+
+    def post_tweet(self, text):
+        return {"id": "2"}
+
+
+def test_rate_limited_client_sheds_reads_and_raises_on_writes():
+    scheduler = RequestScheduler(
+        endpoint_limits={ENDPOINT: (10, 900), "POST /2/tweets": (1, 900)},
+        max_wait_seconds={PRIORITY_WRITE: 0},
+    )
+    client = RateLimitedXClient(_Client(), scheduler, credential="a")
+    assert client.get_user_tweets(user_id="u1") == [{"id": "1"}]
+    # The response said the budget is spent, so the next discovery read is shed without a call
+    assert client.get_user_tweets(user_id="u2") is None
+    assert client.client.calls == ["u1"]
+
+    assert client.post_tweet("hi") == {"id": "2"}
+    with pytest.raises(RateLimitExceeded):
+        client.post_tweet("again")
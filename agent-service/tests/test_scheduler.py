@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from scheduler import AgentScheduler
+
+
+class _Agent:
+    def __init__(self, agent_id: str, next_post: datetime, can_reply: bool = True):
+        self.id = agent_id
+        self.posting_hours = None
+        self.next_post = next_post
+        self.can_reply = can_reply
+
+    def next_post_time(self) -> datetime:
+        return self.next_post
+
+    def next_reply_time(self, now: datetime) -> datetime:
+        return now if self.can_reply else datetime.max
+
+    def should_reply_now(self) -> bool:
+        return self.can_reply
+
+
+class _Manager:
+    """
+    Records each batch; a batch containing a held agent blocks until released.
+    """
+
+    def __init__(self, agents: List[_Agent]):
+        self.agents = agents
+        self.global_settings: Dict[str, Any] = {}
+        self.batches: List[List[str]] = []
+        self.contexts: List[Dict[str, Any]] = []
+        self.hold: Dict[str, asyncio.Event] = {}
+        self.market: Dict[str, Any] = {}
+
+    def get_market_context(self) -> Dict[str, Any]:
+        return dict(self.market)
+
+    async def run_agents(self, agents: List[_Agent], context: Dict[str, Any]) -> None:
+        self.batches.append([a.id for a in agents])
+        self.contexts.append(context)
+        for agent in agents:
+            if agent.id in self.hold:
+                await self.hold[agent.id].wait()
+
+
+async def _settle() -> None:
+    for _ in range(20):
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+
+
+def _run(manager: _Manager, scenario) -> None:
+    scheduler = AgentScheduler(manager, recheck_interval=timedelta(minutes=5))
+
+    async def main() -> None:
+        loop_task = asyncio.create_task(scheduler.run_forever())
+        await _settle()
+        try:
+            await scenario(scheduler)
+        finally:
+            for hold in manager.hold.values():
+                hold.set()
+            scheduler.stop()
+            await asyncio.wait_for(loop_task, timeout=2)
+
+    asyncio.run(main())
+
+
+def test_due_agents_run_once_and_wait_for_recheck():
+    later = datetime.now() + timedelta(hours=1)
+    manager = _Manager([_Agent("a", later), _Agent("b", later, can_reply=False)])
+
+    async def scenario(scheduler):
+        await _settle()
+
+    _run(manager, scenario)
+    # a can reply now; b is capped and its post is an hour out
+    assert manager.batches == [["a"]]
+
+
+def test_wake_dispatches_while_another_batch_runs():
+    later = datetime.now() + timedelta(hours=1)
+    manager = _Manager([_Agent("a", later), _Agent("b", later)])
+    manager.hold["a"] = asyncio.Event()
+    manager.agents[1].can_reply = False
+
+    async def scenario(scheduler):
+        assert manager.batches == [["a"]]
+        manager.agents[1].can_reply = True
+        scheduler.wake("b")
+        await _settle()
+        # b ran even though a's batch is still in flight
+        assert manager.batches == [["a"], ["b"]]
+
+    _run(manager, scenario)
+
+
+def test_wake_during_run_is_honoured_after_it():
+    later = datetime.now() + timedelta(hours=1)
+    manager = _Manager([_Agent("a", later)])
+    manager.hold["a"] = asyncio.Event()
+
+    async def scenario(scheduler):
+        scheduler.wake("a")
+        await _settle()
+        assert manager.batches == [["a"]]
+        manager.hold.pop("a").set()
+        await _settle()
+        # Rescheduling after the run must not swallow the wake
+        assert manager.batches == [["a"], ["a"]]
+
+    _run(manager, scenario)
+
+
+def test_wake_is_ignored_when_agent_cannot_reply():
+    later = datetime.now() + timedelta(hours=1)
+    manager = _Manager([_Agent("a", later, can_reply=False)])
+
+    async def scenario(scheduler):
+        scheduler.wake("a")
+        await _settle()
+
+    _run(manager, scenario)
+    assert manager.batches == []
+
+
+def test_event_pulls_forward_eligible_agents_with_event_context():
+    later = datetime.now() + timedelta(hours=1)
+    manager = _Manager([_Agent("a", later), _Agent("b", later, can_reply=False)])
+
+    async def scenario(scheduler):
+        scheduler.notify({"latest_news": "ETF approved"})
+        await _settle()
+
+    _run(manager, scenario)
+    assert manager.batches == [["a"], ["a"]]
+    assert manager.contexts[1] == {"latest_news": "ETF approved"}
+
+
+def test_snapshot_values_win_over_event_fields():
+    later = datetime.now() + timedelta(hours=1)
+    manager = _Manager([_Agent("a", later)])
+    manager.market = {"latest_news": "ETF approved", "news_relevance": 9.0}
+
+    async def scenario(scheduler):
+        scheduler.notify({"latest_news": "ETF approved", "news_relevance": 9.0, "price_change": 6.0})
+        scheduler.notify({"latest_news": "Minor listing", "news_relevance": 5.0})
+        await _settle()
+
+    _run(manager, scenario)
+    assert manager.contexts[1] == {"latest_news": "ETF approved", "news_relevance": 9.0, "price_change": 6.0}
+
+
+def test_event_during_run_is_honoured_after_it():
+    later = datetime.now() + timedelta(hours=1)
+    manager = _Manager([_Agent("a", later)])
+    manager.hold["a"] = asyncio.Event()
+
+    async def scenario(scheduler):
+        scheduler.notify({"latest_news": "ETF approved"})
+        await _settle()
+        assert manager.batches == [["a"]]
+        manager.hold.pop("a").set()
+        await _settle()
+        assert manager.batches == [["a"], ["a"]]
+
+    _run(manager, scenario)
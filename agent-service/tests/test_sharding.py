@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+import sharding
+from sharding import SharedSnapshot, assign_agents, rendezvous_owner
+
+AGENTS = [f"agent_{i}" for i in range(200)]
+
+
+@pytest.fixture
+def snapshot():
+    snapshot = SharedSnapshot.create(size=1024)
+    yield snapshot
+    snapshot.close()
+
+
+def test_rendezvous_owner_ignores_worker_order():
+    for agent_id in AGENTS[:20]:
+        assert rendezvous_owner(agent_id, [0, 1, 2, 3]) == rendezvous_owner(agent_id, [3, 1, 0, 2])
+
+
+def test_assign_agents_places_every_agent_once():
+    assignment = assign_agents(AGENTS, range(4))
+    assert sorted(assignment) == [0, 1, 2, 3]
+    assert sorted(a for agents in assignment.values() for a in agents) == sorted(AGENTS)
+    # Roughly even: no slot more than twice its fair share
+    assert all(10 < len(agents) < 100 for agents in assignment.values())
+
+
+def test_removing_a_worker_only_moves_its_agents():
+    before = assign_agents(AGENTS, [0, 1, 2, 3])
+    after = assign_agents(AGENTS, [0, 1, 3])
+    for worker in (0, 1, 3):
+        assert set(before[worker]) <= set(after[worker])
+    moved = {a for w in after for a in after[w]} - {a for w in (0, 1, 3) for a in before[w]}
+    assert moved == set(before[2])
+
+
+def test_adding_a_worker_only_takes_agents_for_itself():
+    before = assign_agents(AGENTS, [0, 1, 2])
+    after = assign_agents(AGENTS, [0, 1, 2, 3])
+    assert after[3]
+    for worker in (0, 1, 2):
+        assert set(after[worker]) == set(before[worker]) - set(after[3])
+
+
+def test_snapshot_round_trips_through_an_attached_reader(snapshot):
+    reader = SharedSnapshot(snapshot._shm, owner=False)
+    assert reader.read() is None
+
+    snapshot.write({"btc_price": 60_000.0, "sentiment": "bullish"})
+    assert reader.read() == {"btc_price": 60_000.0, "sentiment": "bullish"}
+    snapshot.write({"btc_price": 61_000.0})
+    assert reader.read() == {"btc_price": 61_000.0}
+    assert SharedSnapshot._HEADER.unpack_from(snapshot._shm.buf, 0)[0] == 4
+
+
+def test_unchanged_snapshot_is_not_parsed_again(snapshot, monkeypatch):
+    snapshot.write({"btc_price": 60_000.0})
+    first = snapshot.read()
+    first["btc_price"] = 0.0
+
+    def fail(data):
+        raise AssertionError("parsed an unchanged snapshot")
+
+    monkeypatch.setattr(sharding.json, "loads", fail)
+    assert snapshot.read() == {"btc_price": 60_000.0}
+
+
+def test_reader_waits_out_a_write_in_progress(snapshot):
+    snapshot.write({"btc_price": 60_000.0})
+    header = SharedSnapshot._HEADER
+    buf = snapshot._shm.buf
+    seq, length = header.unpack_from(buf, 0)
+    # Simulate a writer stopped between its two header updates
+    header.pack_into(buf, 0, seq + 1, length)
+    reader = SharedSnapshot(snapshot._shm, owner=False)
+
+    def finish():
+        time.sleep(0.05)
+        data = b'{"btc_price": 61000.0}'
+        buf[header.size:header.size + len(data)] = data
+        header.pack_into(buf, 0, seq + 2, len(data))
+
+    writer = threading.Thread(target=finish)
+    writer.start()
+    assert reader.read() == {"btc_price": 61_000.0}
+    writer.join()
+
+
+def test_oversized_snapshot_is_rejected_and_previous_kept(snapshot):
+    snapshot.write({"btc_price": 60_000.0})
+    with pytest.raises(ValueError):
+        snapshot.write({"latest_news": "x" * 2048})
+    reader = SharedSnapshot(snapshot._shm, owner=False)
+    assert reader.read() == {"btc_price": 60_000.0}
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import yaml
+
+from similarity import NearDuplicateIndex
+from state_store import InMemoryStateStore
+
+# add() expires against the wall clock, so keep the timeline around now
+T0 = datetime.now() - timedelta(minutes=55)
+TEXT = "btc funding flipped negative while spot etf flows keep climbing"
+VARIANT = "btc funding flipped negative while spot etf flows keep climbing higher"
+OTHER = "solana validators shipped a client upgrade with faster block propagation"
+
+
+def test_near_duplicates_are_counted_per_agent():
+    index = NearDuplicateIndex(threshold=0.5, max_similar_per_window=1)
+    index.add(TEXT, "a", T0)
+    assert index.similar_count(VARIANT, "a", T0) == 1
+    assert index.similar_count(OTHER, "a", T0) == 0
+    assert index.similar_count(VARIANT, "b", T0) == 0
+    assert index.is_repetitive(VARIANT, "a", T0)
+    assert not index.is_repetitive(VARIANT, "b", T0)
+
+
+def test_entries_expire_after_window():
+    index = NearDuplicateIndex(window=timedelta(hours=1), threshold=0.5)
+    index.add(TEXT, "a", T0)
+    assert index.similar_count(TEXT, "a", T0 + timedelta(minutes=59)) == 1
+    assert index.similar_count(TEXT, "a", T0 + timedelta(minutes=61)) == 0
+    assert len(index) == 0
+
+
+def test_out_of_order_add_still_expires():
+    index = NearDuplicateIndex(window=timedelta(hours=1), threshold=0.5)
+    index.add(OTHER, "a", T0 + timedelta(minutes=50))
+    index.add(TEXT, "a", T0)
+    # The older entry leaves the window even though it was added last
+    assert index.similar_count(TEXT, "a", T0 + timedelta(minutes=61)) == 0
+    assert index.similar_count(OTHER, "a", T0 + timedelta(minutes=61)) == 1
+
+
+def test_restored_history_is_indexed_in_time_order():
+    from enhanced_agent import EnhancedAIAgent
+
+    with open("agent_config.yaml") as f:
+        config = yaml.safe_load(f)["agents"][0]
+    now = datetime.now()
+    store = InMemoryStateStore()
+    # An old reply restored after a newer post must not outlive the window
+    store.record_post(config["id"], {"timestamp": now - timedelta(hours=1), "content": OTHER})
+    store.record_reply(config["id"], {"timestamp": now - timedelta(hours=23, minutes=55), "content": TEXT})
+    index = NearDuplicateIndex(threshold=0.5)
+    agent = EnhancedAIAgent(config, state_store=store, content_index=index)
+    assert index.similar_count(TEXT, agent.id, now + timedelta(minutes=10)) == 0
+    assert index.similar_count(OTHER, agent.id, now + timedelta(minutes=10)) == 1
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from state_store import InMemoryStateStore, SQLiteStateStore, StateStore
+
+T0 = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryStateStore()
+        return
+    store = SQLiteStateStore(str(tmp_path / "state.sqlite3"), batch_size=50, flush_interval=0.05)
+    yield store
+    store.close()
+
+
+def test_state_store_is_abstract():
+    with pytest.raises(TypeError):
+        StateStore()
+
+
+def test_posts_and_replies_are_queried_by_time_range(store):
+    for minutes in (0, 10, 20):
+        store.record_post("a", {"timestamp": T0 + timedelta(minutes=minutes), "content": f"p{minutes}"})
+    store.record_post("b", {"timestamp": T0, "content": "other agent"})
+    store.record_reply("a", {"timestamp": T0 + timedelta(minutes=5), "content": "r", "target_user_id": "u1"})
+
+    posts = store.posts_between("a", T0, T0 + timedelta(minutes=15))
+    assert [p["content"] for p in posts] == ["p10"]
+    assert [r["target_user_id"] for r in store.replies_between("a", T0 - timedelta(minutes=1))] == ["u1"]
+
+
+def test_metrics_round_trip(store):
+    store.save_metrics("a", {"total_posts": 3})
+    store.save_metrics("a", {"total_posts": 4})
+    assert store.load_metrics("a") == {"total_posts": 4}
+    assert store.load_metrics("missing") is None
+
+
+def test_bad_row_does_not_drop_rest_of_batch(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / "state.sqlite3"), batch_size=50, flush_interval=0.05)
+    try:
+        store.record_post("a", {"timestamp": T0, "content": "before"})
+        # sqlite3 can't bind a dict, so this row fails inside the batch
+        store.record_post("a", {"timestamp": T0 + timedelta(minutes=1), "content": {"not": "text"}})
+        store.record_post("a", {"timestamp": T0 + timedelta(minutes=2), "content": "after"})
+        store.save_metrics("a", {"total_posts": 2})
+        posts = store.posts_between("a", T0 - timedelta(minutes=1))
+        assert [p["content"] for p in posts] == ["before", "after"]
+        assert store.load_metrics("a") == {"total_posts": 2}
+    finally:
+        store.close()
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+from account_index import AccountIndex
+from rate_limiter import RateLimitedXClient, RequestScheduler
+from x_discovery import XDiscovery
+
+SEARCH_ENDPOINT = "GET /2/tweets/search/recent"
+TIMELINE_ENDPOINT = "GET /2/users/:id/tweets"
+
+
+class _Client:
+    def __init__(self):
+        self.last_response_headers = None
+        self.timeline_calls = 0
+        self.now = datetime.now(timezone.utc).isoformat()
+
+    def search_recent(self, query, max_results=100, since_id=None):
+        return [{"id": "100", "author_id": "u1", "created_at": self.now, "public_metrics": {"like_count": 500}}]
+
+    def get_users(self, user_ids):
+        return [{"id": u, "username": f"user{u}", "public_metrics": {"followers_count": 50_000}} for u in user_ids]
+
+    def get_user_tweets(self, user_id, max_results=10):
+        self.timeline_calls += 1
+        return [
+            {"id": str(90 + i), "author_id": user_id, "created_at": self.now, "public_metrics": {"like_count": 400}}
+            for i in range(3)
+        ]
+
+
+def _discover(discovery: XDiscovery):
+    return discovery.search_and_rank_accounts(["Bitcoin"], min_followers=10_000, min_avg_engagement=50)
+
+
+def test_shed_timeline_fetch_is_retried_next_cycle():
+    client = _Client()
+    scheduler = RequestScheduler(endpoint_limits={TIMELINE_ENDPOINT: (10, 900)})
+    index = AccountIndex()
+    discovery = XDiscovery(RateLimitedXClient(client, scheduler, credential="a"), account_index=index)
+
+    # No timeline budget left: the fetch is shed before reaching the client
+    scheduler.bucket("a", TIMELINE_ENDPOINT).tokens = 0
+    assert _discover(discovery) == []
+    assert client.timeline_calls == 0
+    # The account must not be recorded as seeded with zero engagement
+    assert index.reserve_seeds(["u1"]) == ["u1"]
+    index.release_seed("u1")
+
+    scheduler.bucket("a", TIMELINE_ENDPOINT).tokens = 10
+    ranked = _discover(discovery)
+    assert [c.user_id for c in ranked] == ["u1"]
+    assert client.timeline_calls == 1
+
+
+def test_failed_timeline_fetch_is_retried_next_cycle():
+    client = _Client()
+    index = AccountIndex()
+    discovery = XDiscovery(client, account_index=index)
+    fetch = client.get_user_tweets
+
+    def fail(user_id, max_results=10):
+        raise ConnectionError("reset")
+
+    client.get_user_tweets = fail
+    assert _discover(discovery) == []
+    client.get_user_tweets = fetch
+    assert [c.user_id for c in _discover(discovery)] == ["u1"]
+
+
+def test_empty_timeline_is_seeded():
+    client = _Client()
+    client.get_user_tweets = lambda user_id, max_results=10: []
+    index = AccountIndex()
+    discovery = XDiscovery(client, account_index=index)
+    assert _discover(discovery) == []
+    # A real empty timeline counts as seeded for the activity TTL
+    assert index.reserve_seeds(["u1"]) == []
+
+
+def test_shed_search_serves_known_authors_without_refreshing_topic():
+    client = _Client()
+    scheduler = RequestScheduler()
+    index = AccountIndex(search_ttl=timedelta(0))
+    discovery = XDiscovery(RateLimitedXClient(client, scheduler, credential="a"), account_index=index)
+    assert discovery._search_authors("Bitcoin") == ["u1"]
+    searched_at = index._topics["Bitcoin"].searched_at
+
+    searches = []
+    client.search_recent = lambda query, max_results=100, since_id=None: searches.append(query) or []
+    scheduler.bucket("a", SEARCH_ENDPOINT).tokens = 0
+    assert discovery._search_authors("Bitcoin") == ["u1"]
+    assert discovery._search_authors("Ethereum") == []
+    assert searches == []
+    assert index._topics["Bitcoin"].searched_at == searched_at
+    assert "Ethereum" not in index._topics
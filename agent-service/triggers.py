@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Base cooldown between posts per strategy.posting_frequency
+POSTING_COOLDOWNS: Dict[str, timedelta] = {
+    "very_high": timedelta(minutes=15),
+    "high": timedelta(minutes=30),
+    "medium": timedelta(hours=1),
+    "low": timedelta(hours=2),
+}
+
+# Value assumed for a context field the market snapshot doesn't carry
+FIELD_DEFAULTS: Dict[str, float] = {
+    "price_change": 0.0,
+    "volume_spike": 1.0,
+    "news_relevance": 0.0,
+    "fear_greed_index": 50.0,
+    "misinformation_detected": 0.0,
+    "meme_opportunity": 0.0,
+}
+
+
+def posting_cooldown(frequency: Optional[str]) -> timedelta:
+    return POSTING_COOLDOWNS.get(frequency or "medium", timedelta(hours=1))
+
+
+@dataclass(frozen=True)
+class TriggerRule:
+    """
+    One post trigger: `field op threshold`, or a truthy flag when op is "flag".
+
+    The threshold comes from the agent's strategy.triggers[key] when set;
+    rules with an agent_id only apply to that agent.
+    """
+
+    field: str
+    op: str
+    key: Optional[str] = None
+    default: float = 0.0
+    agent_id: Optional[str] = None
+
+
+TRIGGER_RULES: Tuple[TriggerRule, ...] = (
+    TriggerRule("price_change", ">", "price_movement_threshold", 5),
+    TriggerRule("volume_spike", ">", "volume_spike_threshold", 2),
+    TriggerRule("news_relevance", ">", "news_relevance_score", 7),
+    TriggerRule("fear_greed_index", ">", "extreme_greed", 75, agent_id="grok_crypto"),
+    TriggerRule("fear_greed_index", "<", "extreme_fear", 25, agent_id="grok_crypto"),
+    TriggerRule("misinformation_detected", "flag", agent_id="gemini_crypto"),
+    TriggerRule("meme_opportunity", "flag", agent_id="qwen_coin"),
+)
+
+# (field, op, threshold) with thresholds resolved for one agent
+ResolvedRule = Tuple[str, str, float]
+
+
+def agent_rules(agent_id: str, triggers: Mapping[str, Any]) -> List[ResolvedRule]:
+    """
+    Resolve the rules that apply to an agent against its strategy.triggers.
+    """
+    rules: List[ResolvedRule] = []
+    for rule in TRIGGER_RULES:
+        if rule.agent_id is not None and rule.agent_id != agent_id:
+            continue
+        threshold = triggers.get(rule.key, rule.default) if rule.key else rule.default
+        rules.append((rule.field, rule.op, float(threshold)))
+    return rules
+
+
+def fires(rules: List[ResolvedRule], context: Mapping[str, Any]) -> bool:
+    """
+    True if any rule fires for one market context.
+    """
+    for field, op, threshold in rules:
+        value = context.get(field, FIELD_DEFAULTS.get(field, 0.0))
+        if op == "flag":
+            if value:
+                return True
+        elif value is None:
+            continue
+        elif op == ">" and value > threshold:
+            return True
+        elif op == "<" and value < threshold:
+            return True
+    return False
+
+
+def fire_mask(rules: List[ResolvedRule], columns: Mapping[str, np.ndarray], length: int) -> np.ndarray:
+    """
+    Vectorized fires() over a whole series of contexts given as columns.
+
+    Missing values (NaN) never fire, like None in a live context.
+    """
+    mask = np.zeros(length, dtype=bool)
+    for field, op, threshold in rules:
+        values = columns.get(field)
+        if values is None:
+            values = np.full(length, FIELD_DEFAULTS.get(field, 0.0))
+        if op == "flag":
+            mask |= np.nan_to_num(values) != 0
+        elif op == ">":
+            mask |= values > threshold
+        elif op == "<":
+            mask |= values < threshold
+    return mask
@@ -1,12 +1,29 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
-# Assumes an x_client.XClient with search_recent, get_user, get_user_tweets methods exists
+import numpy as np
+
+# Assumes an x_client.XClient with search_recent (accepting since_id), get_users,
+# get_user_tweets methods exists
 from x_client import XClient
 
+import metrics
+from account_index import AccountIndex
+
+# X API v2 accepts at most 100 ids per /2/users lookup
+USER_LOOKUP_BATCH_SIZE = 100
+
+# Overridable per playbook via heuristics.score_weights
+DEFAULT_SCORE_WEIGHTS: Dict[str, float] = {
+    "engagement_ratio": 0.5,
+    "followers": 0.3,
+    "topicality": 0.2,
+}
+
 
 @dataclass
 class AccountCandidate:
@@ -21,38 +38,201 @@ class AccountCandidate:
     score: float
 
 
+class CandidateTable:
+    """
+    Columnar (NumPy) view of candidates for vectorized scoring and top-k selection.
+    """
+
+    def __init__(self, candidates: List[AccountCandidate]):
+        self.candidates = candidates
+        n = len(candidates)
+        self.followers = np.fromiter((c.followers for c in candidates), dtype=np.float64, count=n)
+        self.ratio = np.fromiter((c.engagement_to_followers_ratio for c in candidates), dtype=np.float64, count=n)
+        self.topics = np.fromiter((len(set(c.topics_matched)) for c in candidates), dtype=np.float64, count=n)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def score(
+        self,
+        target_ratio: float,
+        weights: Optional[Dict[str, float]] = None,
+        followers_saturation: float = 100_000,
+        topics_saturation: float = 5,
+    ) -> np.ndarray:
+        """
+        Score every candidate at once; each component is capped at 1.0 before weighting.
+        """
+        w = dict(DEFAULT_SCORE_WEIGHTS)
+        w.update(weights or {})
+        ratio_score = np.minimum(1.0, self.ratio / max(target_ratio, 1e-12))
+        followers_score = np.minimum(1.0, self.followers / max(followers_saturation, 1.0))
+        topicality_score = np.minimum(1.0, self.topics / max(topics_saturation, 1.0))
+        return (
+            w["engagement_ratio"] * ratio_score
+            + w["followers"] * followers_score
+            + w["topicality"] * topicality_score
+        )
+
+    def top_k(self, scores: np.ndarray, k: int) -> List[AccountCandidate]:
+        """
+        Return the k best candidates in descending score order without sorting the whole table.
+        """
+        n = len(self.candidates)
+        if n == 0 or k <= 0:
+            return []
+        if k < n:
+            idx = np.argpartition(-scores, k - 1)[:k]
+        else:
+            idx = np.arange(n)
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        top: List[AccountCandidate] = []
+        for i in idx:
+            candidate = self.candidates[int(i)]
+            candidate.score = float(scores[i])
+            top.append(candidate)
+        return top
+
+
 class XDiscovery:
     """
     Discover and rank key accounts on X (Crypto Twitter) for targeted engagement.
     """
 
-    def __init__(self, x_client: XClient):
+    def __init__(
+        self,
+        x_client: XClient,
+        max_concurrency: int = 8,
+        account_index: Optional[AccountIndex] = None,
+    ):
         self.x = x_client
+        self.max_concurrency = max(1, max_concurrency)
+        # Shared across agents when provided by AgentManager
+        self.index = account_index if account_index is not None else AccountIndex()
 
-    def _estimate_engagement(self, tweets: List[Dict[str, Any]], lookback: int = 10) -> float:
-        if not tweets:
-            return 0.0
-        recent = tweets[:lookback]
-        totals: List[int] = []
-        for t in recent:
-            likes = int(t.get("like_count", 0))
-            rts = int(t.get("retweet_count", 0))
-            replies = int(t.get("reply_count", 0))
-            totals.append(likes + rts + replies)
-        return sum(totals) / max(1, len(totals))
-
-    def _recency(self, tweets: List[Dict[str, Any]]) -> Optional[datetime]:
-        if not tweets:
-            return None
-        ts = tweets[0].get("created_at")
-        if isinstance(ts, datetime):
-            return ts
-        # fallback: try parse RFC3339
+    def _search_authors(self, topic: str) -> List[str]:
+        """
+        Return the authors known for a topic, pulling only tweets newer than the topic's cursor.
+        """
+        cached = self.index.get_search(topic)
+        if cached is not None:
+            return cached
+        since_id = self.index.get_cursor(topic)
+        if since_id:
+            tweets = self.x.search_recent(query=topic, max_results=100, since_id=since_id)
+        else:
+            tweets = self.x.search_recent(query=topic, max_results=100)
+        if tweets is None:
+            # Shed by the rate limiter: nothing was searched, so serve what is known
+            # without marking the topic fresh or touching its cursor
+            return self.index.get_search(topic, allow_stale=True) or []
+
+        author_ids: List[str] = []
+        newest_id: Optional[str] = None
+        for t in tweets or []:
+            author_id = t.get("author_id")
+            tweet_id = str(t.get("id", ""))
+            if tweet_id.isdigit() and (newest_id is None or int(tweet_id) > int(newest_id)):
+                newest_id = tweet_id
+            if not author_id:
+                continue
+            if author_id not in author_ids:
+                author_ids.append(author_id)
+            self.index.fold_activity(author_id, tweet_id, self._engagement(t), self._created_at(t))
+        return self.index.record_search(topic, author_ids, newest_id)
+
+    def resolve_profiles(self, user_ids: List[str], x_client: Optional[XClient] = None) -> Dict[str, AccountCandidate]:
+        """
+        Return profile records for user_ids, bulk-looking-up only those missing from the index.
+
+        Lookups go through x_client when given (e.g. one reading at a higher
+        priority than discovery), otherwise through this discovery's client.
+        """
+        profiles: Dict[str, AccountCandidate] = {}
+        missing: List[str] = []
+        for user_id in user_ids:
+            cached = self.index.get_profile(user_id)
+            if cached:
+                profiles[user_id] = cached
+            else:
+                missing.append(user_id)
+
+        for user_id, user in self._lookup_users(missing, x_client or self.x).items():
+            account = AccountCandidate(
+                user_id=user_id,
+                username=user.get("username", ""),
+                display_name=user.get("name", ""),
+                followers=int(user.get("public_metrics", {}).get("followers_count", 0)),
+                avg_engagement=0.0,
+                engagement_to_followers_ratio=0.0,
+                last_tweet_time=None,
+                topics_matched=[],
+                score=0.0,
+            )
+            self.index.put_profile(account)
+            profiles[user_id] = account
+        return profiles
+
+    def _lookup_users(self, user_ids: List[str], x_client: XClient) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve user objects with bulk lookups of up to 100 ids per request.
+        """
+        users: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(user_ids), USER_LOOKUP_BATCH_SIZE):
+            batch = user_ids[start:start + USER_LOOKUP_BATCH_SIZE]
+            for user in x_client.get_users(user_ids=batch) or []:
+                user_id = str(user.get("id", ""))
+                if user_id:
+                    users[user_id] = user
+        return users
+
+    def _fetch_user_tweets(self, user_id: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recent tweets for one user; None if the request failed or was shed, [] for an empty timeline.
+        """
         try:
-            return datetime.fromisoformat(ts.replace("Z", "+00:00"))  # type: ignore
-        except Exception:
+            return self.x.get_user_tweets(user_id=user_id, max_results=max_results)
+        except Exception as e:
+            print(f"[XDiscovery] Error fetching tweets for {user_id}: {e}")
             return None
 
+    def _fetch_timelines(self, user_ids: List[str], max_results: int = 20) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Fetch recent tweets for each user with at most max_concurrency requests in flight.
+
+        Users whose fetch failed or was shed map to None.
+        """
+        if not user_ids:
+            return {}
+        workers = min(self.max_concurrency, len(user_ids))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            timelines = pool.map(lambda uid: self._fetch_user_tweets(uid, max_results), user_ids)
+            return dict(zip(user_ids, timelines))
+
+    @staticmethod
+    def _engagement(tweet: Dict[str, Any]) -> float:
+        public_metrics = tweet.get("public_metrics") or tweet
+        likes = int(public_metrics.get("like_count", 0))
+        rts = int(public_metrics.get("retweet_count", 0))
+        replies = int(public_metrics.get("reply_count", 0))
+        return float(likes + rts + replies)
+
+    @staticmethod
+    def _created_at(tweet: Dict[str, Any]) -> Optional[datetime]:
+        ts = tweet.get("created_at")
+        if not ts:
+            return None
+        if not isinstance(ts, datetime):
+            # fallback: try parse RFC3339
+            try:
+                ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))  # type: ignore
+            except Exception:
+                return None
+        # Compare against naive UTC cutoffs
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        return ts
+
     def search_and_rank_accounts(
         self,
         topics: List[str],
@@ -61,64 +241,62 @@ class XDiscovery:
         engagement_to_followers_ratio: float = 0.003,
         recency_hours: int = 12,
         limit: int = 50,
+        score_weights: Optional[Dict[str, float]] = None,
+        followers_saturation: float = 100_000,
+        topics_saturation: float = 5,
     ) -> List[AccountCandidate]:
         """
         Search for users tweeting about topics, then rank by engagement and quality heuristics.
         """
-        seen_users: Dict[str, AccountCandidate] = {}
         cutoff = datetime.utcnow() - timedelta(hours=recency_hours)
 
-        for topic in topics:
-            # Search recent tweets for the topic
-            tweets = self.x.search_recent(query=topic, max_results=100)
-            for t in tweets:
-                author_id = t.get("author_id")
-                if not author_id:
-                    continue
-                if author_id in seen_users:
-                    seen_users[author_id].topics_matched.append(topic)
-                    continue
-
-                user = self.x.get_user(user_id=author_id)
-                if not user:
-                    continue
-
-                followers = int(user.get("public_metrics", {}).get("followers_count", 0))
-                if followers < min_followers:
-                    continue
-
-                user_tweets = self.x.get_user_tweets(user_id=author_id, max_results=20)
-                avg_eng = self._estimate_engagement(user_tweets)
-                if avg_eng < min_avg_engagement:
-                    continue
-
-                ratio = avg_eng / max(1, followers)
-                last_time = self._recency(user_tweets)
-                if last_time and last_time < cutoff:
-                    continue
-
-                candidate = AccountCandidate(
-                    user_id=author_id,
-                    username=user.get("username", ""),
-                    display_name=user.get("name", ""),
-                    followers=followers,
-                    avg_engagement=avg_eng,
-                    engagement_to_followers_ratio=ratio,
-                    last_tweet_time=last_time,
-                    topics_matched=[topic],
-                    score=0.0,
-                )
-                seen_users[author_id] = candidate
-
-        # Score and sort
-        candidates = list(seen_users.values())
+        # Collect unique authors across every topic before touching user endpoints
+        topics_by_author: Dict[str, List[str]] = {}
+        with metrics.span("discovery_stage", stage="search"):
+            for topic in topics:
+                for author_id in self._search_authors(topic):
+                    topics_by_author.setdefault(author_id, []).append(topic)
+
+        # Filter on follower count before spending any timeline requests
+        with metrics.span("discovery_stage", stage="profiles"):
+            profiles = self.resolve_profiles(list(topics_by_author))
+        eligible = [
+            author_id for author_id in topics_by_author
+            if author_id in profiles and profiles[author_id].followers >= min_followers
+        ]
+
+        # Timelines are only fetched to seed accounts the index hasn't aggregated yet
+        unseeded = self.index.reserve_seeds(eligible)
+        with metrics.span("discovery_stage", stage="timelines"):
+            timelines = self._fetch_timelines(unseeded, max_results=20)
+        for author_id, user_tweets in timelines.items():
+            if user_tweets is None:
+                # Not fetched: leave the account unseeded so the next cycle retries it
+                self.index.release_seed(author_id)
+                continue
+            self.index.seed_activity(
+                author_id,
+                [(str(t.get("id", "")), self._engagement(t), self._created_at(t)) for t in user_tweets],
+            )
+
+        candidates = self.index.query(
+            eligible,
+            min_followers=min_followers,
+            min_avg_engagement=min_avg_engagement,
+            active_since=cutoff,
+        )
         for c in candidates:
-            ratio_score = min(1.0, c.engagement_to_followers_ratio / engagement_to_followers_ratio)
-            followers_score = min(1.0, c.followers / 100_000)
-            topicality_score = min(1.0, len(set(c.topics_matched)) / 5)
-            c.score = 0.5 * ratio_score + 0.3 * followers_score + 0.2 * topicality_score
+            c.topics_matched = topics_by_author[c.user_id]
 
-        candidates.sort(key=lambda x: x.score, reverse=True)
-        return candidates[:limit]
+        # Score and select the top candidates
+        with metrics.span("discovery_stage", stage="rank"):
+            table = CandidateTable(candidates)
+            scores = table.score(
+                engagement_to_followers_ratio,
+                weights=score_weights,
+                followers_saturation=followers_saturation,
+                topics_saturation=topics_saturation,
+            )
+            return table.top_k(scores, limit)
 
 
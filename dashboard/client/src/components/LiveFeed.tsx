@@ -1,6 +1,7 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useMemo } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { Heart, Repeat2, MessageCircle } from "lucide-react";
+import { useAgentEvents } from "@/hooks/useAgentEvents";
 
 interface Tweet {
   id: string;
@@ -50,6 +51,26 @@ const sampleTweets: Omit<Tweet, "id" | "timestamp">[] = [
 
 export function LiveFeed() {
   const [tweets, setTweets] = useState<Tweet[]>([]);
+  const { connected, events } = useAgentEvents();
+
+  // Posts and replies from the agent service, once the live stream is connected
+  const liveTweets = useMemo<Tweet[]>(
+    () =>
+      events
+        .filter((event) => event.type === "post" || event.type === "reply")
+        .slice(0, 10)
+        .map((event, index) => ({
+          id: String(event.data.tweet_id ?? `${event.agent}-${event.ts}-${index}`),
+          author: String(event.data.name ?? event.agent ?? ""),
+          llm: String(event.data.llm ?? ""),
+          content: String(event.data.content ?? ""),
+          timestamp: new Date(event.ts),
+          likes: 0,
+          retweets: 0,
+          replies: 0,
+        })),
+    [events]
+  );
 
   // Initialize with sample tweets
   useEffect(() => {
@@ -61,8 +82,9 @@ export function LiveFeed() {
     setTweets(initialTweets);
   }, []);
 
-  // Simulate new tweets
+  // Simulate new tweets until the live stream is connected
   useEffect(() => {
+    if (connected) return;
     const interval = setInterval(() => {
       const randomTweet = sampleTweets[Math.floor(Math.random() * sampleTweets.length)];
       const newTweet: Tweet = {
@@ -78,7 +100,9 @@ export function LiveFeed() {
     }, 8000); // New tweet every 8 seconds
 
     return () => clearInterval(interval);
-  }, []);
+  }, [connected]);
+
+  const shownTweets = connected ? liveTweets : tweets;
 
   const formatTimestamp = (date: Date) => {
     const now = new Date();
@@ -102,7 +126,7 @@ export function LiveFeed() {
 
       <div className="space-y-4 relative z-10">
         <AnimatePresence initial={false}>
-          {tweets.map((tweet) => (
+          {shownTweets.map((tweet) => (
             <motion.div
               key={tweet.id}
               initial={{ opacity: 0, y: -20, scale: 0.95 }}
@@ -1,5 +1,9 @@
 import { useState, useEffect } from "react";
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Legend } from "recharts";
+import { useAgentEvents } from "@/hooks/useAgentEvents";
+
+const MAX_POINTS = 21;
+const CHART_COLORS = 5;
 
 interface ChartData {
   time: string;
@@ -28,11 +32,43 @@ const generateInitialData = (): ChartData[] => {
   return data;
 };
 
+interface Series {
+  key: string;
+  color: string;
+  fill?: string;
+}
+
+const DEMO_SERIES: Series[] = ["CryptoGPT", "GeminiCrypto", "QwenCoin", "GrokCrypto"].map((key, index) => ({
+  key,
+  color: `hsl(var(--chart-${index + 1}))`,
+  fill: `url(#color${key})`,
+}));
+
+const formatTime = (ms: number) =>
+  new Date(ms).toLocaleTimeString("en-US", { hour: "2-digit", minute: "2-digit" });
+
+// Total posts per agent id at one metrics update
+type LivePoint = { time: string } & Record<string, number | string>;
+
 export function PerformanceChart() {
   const [data, setData] = useState<ChartData[]>(generateInitialData());
+  const [liveData, setLiveData] = useState<LivePoint[]>([]);
+  const { connected, metrics } = useAgentEvents();
 
-  // Simulate real-time data updates
+  // One point per metrics update from the agent service, once the live stream is connected
   useEffect(() => {
+    const latest = Object.values(metrics);
+    if (!latest.length) return;
+    const point: LivePoint = { time: formatTime(Math.max(...latest.map((metric) => metric.ts))) };
+    for (const metric of latest) {
+      point[metric.agent ?? ""] = Number(metric.data.total_posts ?? 0);
+    }
+    setLiveData((prev) => [...prev, point].slice(-MAX_POINTS));
+  }, [metrics]);
+
+  // Simulate real-time data updates until the live stream is connected
+  useEffect(() => {
+    if (connected) return;
     const interval = setInterval(() => {
       setData((prevData) => {
         const newData = [...prevData.slice(1)]; // Remove oldest
@@ -51,7 +87,17 @@ export function PerformanceChart() {
     }, 5000); // Update every 5 seconds
 
     return () => clearInterval(interval);
-  }, []);
+  }, [connected]);
+
+  const live = connected && liveData.length > 0;
+  const series: Series[] = live
+    ? Object.keys(metrics)
+        .sort()
+        .map((agent, index) => ({
+          key: agent,
+          color: `hsl(var(--chart-${(index % CHART_COLORS) + 1}))`,
+        }))
+    : DEMO_SERIES;
 
   return (
     <div className="glass rounded-xl p-6 relative overflow-hidden group">
@@ -59,12 +105,12 @@ export function PerformanceChart() {
       <div className="absolute top-0 left-0 right-0 h-px bg-gradient-to-r from-transparent via-primary/50 to-transparent opacity-0 group-hover:opacity-100 transition-opacity" />
       
       <div className="mb-4 relative z-10">
-        <h3 className="text-lg font-semibold text-foreground">Follower Growth</h3>
-        <p className="text-sm text-muted-foreground font-mono">Last 20 minutes</p>
+        <h3 className="text-lg font-semibold text-foreground">{live ? "Posts Published" : "Follower Growth"}</h3>
+        <p className="text-sm text-muted-foreground font-mono">{live ? "Live, per agent" : "Last 20 minutes"}</p>
       </div>
       
       <ResponsiveContainer width="100%" height={300}>
-        <LineChart data={data}>
+        <LineChart data={live ? liveData : data}>
           <defs>
             <linearGradient id="colorCryptoGPT" x1="0" y1="0" x2="0" y2="1">
               <stop offset="5%" stopColor="hsl(var(--chart-1))" stopOpacity={0.3}/>
@@ -121,38 +167,18 @@ export function PerformanceChart() {
               fontSize: "12px",
             }}
           />
-          <Line
-            type="monotone"
-            dataKey="CryptoGPT"
-            stroke="hsl(var(--chart-1))"
-            strokeWidth={2}
-            dot={false}
-            fill="url(#colorCryptoGPT)"
-          />
-          <Line
-            type="monotone"
-            dataKey="GeminiCrypto"
-            stroke="hsl(var(--chart-2))"
-            strokeWidth={2}
-            dot={false}
-            fill="url(#colorGeminiCrypto)"
-          />
-          <Line
-            type="monotone"
-            dataKey="QwenCoin"
-            stroke="hsl(var(--chart-3))"
-            strokeWidth={2}
-            dot={false}
-            fill="url(#colorQwenCoin)"
-          />
-          <Line
-            type="monotone"
-            dataKey="GrokCrypto"
-            stroke="hsl(var(--chart-4))"
-            strokeWidth={2}
-            dot={false}
-            fill="url(#colorGrokCrypto)"
-          />
+          {series.map(({ key, color, fill }) => (
+            <Line
+              key={key}
+              type="monotone"
+              dataKey={key}
+              stroke={color}
+              strokeWidth={2}
+              dot={false}
+              fill={fill}
+              connectNulls
+            />
+          ))}
         </LineChart>
       </ResponsiveContainer>
 
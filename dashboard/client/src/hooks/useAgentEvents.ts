@@ -0,0 +1,54 @@
+import { useEffect, useState } from "react";
+import { EVENTS_STREAM_PATH, type AgentEvent, type EventFrame } from "@shared/events";
+
+const MAX_EVENTS = 50;
+
+export interface AgentEventsState {
+  connected: boolean;
+  /** Post, reply and decision events, newest first. */
+  events: AgentEvent[];
+  /** Latest metric event per agent id. */
+  metrics: Record<string, AgentEvent>;
+}
+
+/**
+ * Subscribes to the dashboard server's live agent event stream.
+ * EventSource reconnects on its own; `connected` is false until the first frame arrives.
+ */
+export function useAgentEvents(): AgentEventsState {
+  const [state, setState] = useState<AgentEventsState>({
+    connected: false,
+    events: [],
+    metrics: {},
+  });
+
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return;
+    const source = new EventSource(EVENTS_STREAM_PATH);
+
+    source.onmessage = (message) => {
+      let frame: EventFrame;
+      try {
+        frame = JSON.parse(message.data);
+      } catch {
+        return;
+      }
+      setState((prev) => {
+        const incoming = [...frame.events].reverse();
+        const events = frame.snapshot ? incoming : [...incoming, ...prev.events];
+        const metrics = frame.snapshot ? {} : { ...prev.metrics };
+        for (const metric of frame.metrics) {
+          metrics[metric.agent ?? ""] = metric;
+        }
+        return { connected: true, events: events.slice(0, MAX_EVENTS), metrics };
+      });
+    };
+    source.onerror = () => {
+      setState((prev) => (prev.connected ? { ...prev, connected: false } : prev));
+    };
+
+    return () => source.close();
+  }, []);
+
+  return state;
+}
@@ -0,0 +1,152 @@
+import type { Request, Response } from "express";
+import type { AgentEvent, EventFrame } from "../shared/events";
+
+const EVENT_TYPES = new Set(["post", "reply", "decision", "metric"]);
+
+interface Client {
+  res: Response;
+  /** True while the socket buffer is full; frames are skipped until it drains. */
+  congested: boolean;
+  congestedSince: number;
+}
+
+export interface EventHubOptions {
+  /** How often pending events and coalesced metrics are flushed to viewers. */
+  flushIntervalMs?: number;
+  /** Discrete events replayed to a newly connected or resynced viewer. */
+  historySize?: number;
+  /** A viewer congested for longer than this is disconnected. */
+  maxCongestedMs?: number;
+  heartbeatMs?: number;
+}
+
+/**
+ * Fans agent events out to dashboard viewers over Server-Sent Events.
+ *
+ * Events from the agent service are buffered and flushed as one frame per
+ * interval. Metric events are coalesced per agent, so only the latest value
+ * goes out however often they arrive. Each frame is serialized once and
+ * shared by every viewer. A viewer whose socket can't keep up skips frames
+ * until it drains and then gets a snapshot, so a slow viewer never delays
+ * the others or makes buffers grow.
+ */
+export class EventHub {
+  private clients = new Set<Client>();
+  private pending: AgentEvent[] = [];
+  private pendingMetrics = new Map<string, AgentEvent>();
+  private latestMetrics = new Map<string, AgentEvent>();
+  private history: AgentEvent[] = [];
+  private seq = 0;
+  private flushTimer: NodeJS.Timeout;
+  private heartbeatTimer: NodeJS.Timeout;
+  private readonly historySize: number;
+  private readonly maxCongestedMs: number;
+
+  constructor(options: EventHubOptions = {}) {
+    this.historySize = options.historySize ?? 50;
+    this.maxCongestedMs = options.maxCongestedMs ?? 30_000;
+    this.flushTimer = setInterval(() => this.flush(), options.flushIntervalMs ?? 250);
+    this.heartbeatTimer = setInterval(() => this.heartbeat(), options.heartbeatMs ?? 15_000);
+  }
+
+  get viewerCount(): number {
+    return this.clients.size;
+  }
+
+  ingest(events: unknown[]): number {
+    let accepted = 0;
+    for (const raw of events) {
+      const event = raw as AgentEvent;
+      if (!event || typeof event !== "object" || !EVENT_TYPES.has(event.type)) continue;
+      accepted++;
+      if (event.type === "metric") {
+        this.pendingMetrics.set(event.agent ?? "", event);
+        this.latestMetrics.set(event.agent ?? "", event);
+        continue;
+      }
+      this.pending.push(event);
+      this.history.push(event);
+    }
+    if (this.history.length > this.historySize) {
+      this.history.splice(0, this.history.length - this.historySize);
+    }
+    return accepted;
+  }
+
+  subscribe(req: Request, res: Response): void {
+    res.writeHead(200, {
+      "Content-Type": "text/event-stream",
+      "Cache-Control": "no-cache, no-transform",
+      Connection: "keep-alive",
+      "X-Accel-Buffering": "no",
+    });
+    res.write("retry: 3000\n\n");
+    const client: Client = { res, congested: false, congestedSince: 0 };
+    this.clients.add(client);
+    this.send(client, this.serialize(this.snapshotFrame()));
+
+    res.on("drain", () => {
+      if (!client.congested) return;
+      client.congested = false;
+      // Frames were skipped while congested; catch the viewer up in one go
+      this.send(client, this.serialize(this.snapshotFrame()));
+    });
+    req.on("close", () => this.clients.delete(client));
+  }
+
+  close(): void {
+    clearInterval(this.flushTimer);
+    clearInterval(this.heartbeatTimer);
+    for (const client of this.clients) client.res.end();
+    this.clients.clear();
+  }
+
+  private snapshotFrame(): EventFrame {
+    return {
+      seq: this.seq,
+      events: [...this.history],
+      metrics: [...this.latestMetrics.values()],
+      snapshot: true,
+    };
+  }
+
+  private serialize(frame: EventFrame): string {
+    return `id: ${frame.seq}\ndata: ${JSON.stringify(frame)}\n\n`;
+  }
+
+  private flush(): void {
+    if (this.pending.length === 0 && this.pendingMetrics.size === 0) return;
+    this.seq++;
+    const frame: EventFrame = {
+      seq: this.seq,
+      events: this.pending,
+      metrics: [...this.pendingMetrics.values()],
+    };
+    this.pending = [];
+    this.pendingMetrics.clear();
+    if (this.clients.size === 0) return;
+
+    const payload = this.serialize(frame);
+    for (const client of this.clients) this.send(client, payload);
+  }
+
+  private send(client: Client, payload: string): void {
+    if (client.congested) {
+      if (Date.now() - client.congestedSince > this.maxCongestedMs) {
+        this.clients.delete(client);
+        client.res.destroy();
+      }
+      return;
+    }
+    if (!client.res.write(payload)) {
+      client.congested = true;
+      client.congestedSince = Date.now();
+    }
+  }
+
+  private heartbeat(): void {
+    for (const client of this.clients) {
+      if (!client.congested) client.res.write(": keep-alive\n\n");
+    }
+  }
+}
@@ -2,6 +2,8 @@ import express from "express";
 import { createServer } from "http";
 import path from "path";
 import { fileURLToPath } from "url";
+import { EVENTS_INGEST_PATH, EVENTS_STREAM_PATH } from "../shared/events";
+import { EventHub } from "./events";
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -18,6 +20,25 @@ async function startServer() {
 
   app.use(express.static(staticPath));
 
+  // Live agent events: the agent service posts batches, viewers subscribe over SSE
+  const events = new EventHub();
+  const ingestToken = process.env.DASHBOARD_EVENTS_TOKEN;
+  const loopback = new Set(["127.0.0.1", "::1", "::ffff:127.0.0.1"]);
+
+  app.post(EVENTS_INGEST_PATH, express.json({ limit: "1mb" }), (req, res) => {
+    const authorized = ingestToken
+      ? req.get("authorization") === `Bearer ${ingestToken}`
+      : loopback.has(req.socket.remoteAddress ?? "");
+    if (!authorized) {
+      res.sendStatus(403);
+      return;
+    }
+    const batch = Array.isArray(req.body?.events) ? req.body.events : [];
+    res.json({ accepted: events.ingest(batch), viewers: events.viewerCount });
+  });
+
+  app.get(EVENTS_STREAM_PATH, (req, res) => events.subscribe(req, res));
+
   // Handle client-side routing - serve index.html for all routes
   app.get("*", (_req, res) => {
     res.sendFile(path.join(staticPath, "index.html"));
@@ -0,0 +1,20 @@
+export type AgentEventType = "post" | "reply" | "decision" | "metric";
+
+export interface AgentEvent {
+  type: AgentEventType;
+  agent: string | null;
+  ts: number;
+  data: Record<string, unknown>;
+}
+
+/** One SSE frame: discrete events in order plus the latest value of each coalesced metric. */
+export interface EventFrame {
+  seq: number;
+  events: AgentEvent[];
+  metrics: AgentEvent[];
+  /** Set on the first frame and after a slow client skipped frames. */
+  snapshot?: boolean;
+}
+
+export const EVENTS_STREAM_PATH = "/api/events/stream";
+export const EVENTS_INGEST_PATH = "/api/events";